@@ -3,12 +3,17 @@ import logging.config
 import os
 import signal
 import sys
+import time
+from datetime import datetime, timezone
 
 from dotenv import load_dotenv
 
-from config.configuration import resolve_yaml_config
-from data.cryptoDatabase import CryptoDatabase
+from config.configuration import resolve_yaml_config, start_async_loggers
+from data.columnar import COLUMNAR_PATH, ColumnarBars, replay_bars
+from data.cryptoDatabase import DATABASE_PATH, CryptoDatabase
+from engine.backtest import Backtester
 from engine.engine import Engine
+from engine.sweep import run_sweep
 
 load_dotenv()
 
@@ -28,6 +33,7 @@ def start():
         cfg = resolve_yaml_config(args.config)
         os.makedirs(os.getenv("LOGDIR"), exist_ok=True)
         logging.config.dictConfig(cfg["logging"])
+        listeners = start_async_loggers(cfg.get("async_loggers", []))
     except Exception as e:
         print(f"STARTUP FAILURE: {e}", file=sys.stderr)
         exit(1)
@@ -38,6 +44,113 @@ def start():
         cryptoDatabase.close()
         engine = Engine(cfg, log, cryptoDatabase)
         signal.signal(signal.SIGINT, engine.sig_handler)
+        signal.signal(signal.SIGUSR1, engine.dump_latency)
         engine.start()
         engine.join()
+        for listener in listeners:
+            listener.stop()
         log.info("SHUTDOWN")
+
+
+def _utc_date(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def backtest():
+    parser = argparse.ArgumentParser(prog="Backtest")
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=argparse.FileType("r", encoding="UTF-8"),
+        required=True,
+        help="filepath to YAML configuration",
+    )
+    parser.add_argument("--start", type=_utc_date, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", type=_utc_date, help="day after the last (YYYY-MM-DD)")
+    parser.add_argument("--cash", type=float, default=100000.0)
+    parser.add_argument("--fee-bps", type=float, default=0.0)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    parser.add_argument(
+        "--columnar",
+        nargs="?",
+        const=COLUMNAR_PATH,
+        help=f"read the bars from the columnar store, {COLUMNAR_PATH} by default",
+    )
+    args = parser.parse_args()
+
+    cfg = resolve_yaml_config(args.config)
+    logging.basicConfig(level=logging.INFO)
+    log = logging.getLogger("backtest")
+    started = time.perf_counter()
+    history = None
+    if args.columnar:
+        history = ColumnarBars(args.columnar, until=args.start)
+    backtester = Backtester(
+        cfg,
+        log,
+        start=args.start,
+        end=args.end,
+        cash=args.cash,
+        fee_bps=args.fee_bps,
+        slippage_bps=args.slippage_bps,
+        path=cfg["database"].get("path", DATABASE_PATH),
+        history=history,
+    )
+    bars = None
+    if args.columnar:
+        bars = replay_bars(
+            ColumnarBars(args.columnar), backtester.venues, args.start, args.end
+        )
+    report = backtester.run(bars)
+    elapsed = time.perf_counter() - started
+    for key, value in report.items():
+        print(f"{key:>18}: {value}")
+    print(f"{'elapsed_s':>18}: {elapsed:.3f}")
+
+
+def sweep():
+    parser = argparse.ArgumentParser(prog="Parameter sweep")
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=argparse.FileType("r", encoding="UTF-8"),
+        required=True,
+        help="filepath to YAML configuration, with a 'sweep' section",
+    )
+    parser.add_argument(
+        "--start", type=_utc_date, required=True, help="first day (YYYY-MM-DD)"
+    )
+    parser.add_argument("--end", type=_utc_date, help="day after the last (YYYY-MM-DD)")
+    parser.add_argument(
+        "--samples", type=int, default=0, help="random search points, 0 for the grid"
+    )
+    parser.add_argument("--workers", type=int, help="processes, defaults to cores")
+    parser.add_argument("--output", default="sweep_results.csv")
+    parser.add_argument("--cash", type=float, default=100000.0)
+    parser.add_argument("--fee-bps", type=float, default=0.0)
+    parser.add_argument("--slippage-bps", type=float, default=0.0)
+    args = parser.parse_args()
+
+    cfg = resolve_yaml_config(args.config)
+    logging.basicConfig(level=logging.INFO)
+    log = logging.getLogger("sweep")
+    started = time.perf_counter()
+    results = run_sweep(
+        cfg["sweep"]["strategy"],
+        cfg["sweep"]["grid"],
+        args.start,
+        args.end,
+        samples=args.samples,
+        workers=args.workers,
+        account={
+            "cash": args.cash,
+            "fee_bps": args.fee_bps,
+            "slippage_bps": args.slippage_bps,
+        },
+        path=cfg["database"].get("path", DATABASE_PATH),
+        log=log,
+    )
+    results.to_csv(args.output, index=False)
+    print(results.head(10).to_string())
+    print(f"{len(results)} results written to {args.output}")
+    print(f"elapsed: {time.perf_counter() - started:.3f}s")
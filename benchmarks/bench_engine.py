@@ -0,0 +1,384 @@
+"""
+Load-tests the engine: a ``SyntheticGateway`` streams quotes, trades and
+1-minute bars for ``--symbols`` symbols into a real ``Engine`` running an SMA
+and an RSI strategy per symbol and a quote strategy on all of them, with the
+tick store and the bar aggregation on. After ``--warmup`` seconds, the
+sustained message rate, the stage latencies (see ``engine/latency.py``) and the
+memory growth are measured for ``--duration`` seconds, printed and saved as
+JSON. The run fails, exiting with 1, if a kind of event is sent at less than
+``--min-fraction`` of its target rate. ``--compare`` checks the results against
+an earlier run and exits with 1 if they regressed by more than ``--tolerance``.
+
+    python -m benchmarks.bench_engine [--symbols 10] [--quote-rate 200]
+        [--duration 30] [--output run.json] [--compare baseline.json]
+
+Everything the engine writes goes to a temporary directory.
+"""
+
+# standard
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# local
+from data.cryptoDatabase import BARS_FIELDS, CryptoDatabase
+from engine import latency
+from engine.engine import Engine
+from engine.interface import Venue
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+RESULTS_PATH = "./benchmarks/results"
+
+# end-to-end latencies compared between runs
+KEY_LATENCIES = (
+    "quote gateway->queued",
+    "trade gateway->queued",
+    "bar gateway->processed",
+    "signal gateway->sent",
+)
+
+
+class SyntheticDatabase(CryptoDatabase):
+    """Database seeded with ``history`` synthetic 1-minute bars per symbol."""
+
+    def __init__(self, config, log: logging.Logger, history: int):
+        self.history = history
+        super().__init__(config, log)
+
+    def populate_database(self):
+        rng = np.random.default_rng(0)
+        timestamps = pd.date_range(
+            START - timedelta(minutes=self.history), periods=self.history, freq="min"
+        )
+        frames = []
+        for symbol in self.symbols:
+            close = 100.0 * np.cumprod(1 + rng.normal(0, 0.001, self.history))
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "symbol": symbol,
+                        "timestamp": timestamps,
+                        "open": close,
+                        "high": close,
+                        "low": close,
+                        "close": close,
+                        "volume": 1.0,
+                        "trade_count": 1,
+                        "vwap": close,
+                    }
+                )
+            )
+        bars = pd.concat(frames).set_index(["symbol", "timestamp"])
+        self.store_bars(bars[BARS_FIELDS[2:]])
+
+
+def bench_config(args, root: str) -> dict:
+    symbols = [f"SYN{i}/USD" for i in range(args.symbols)]
+    strategies = []
+    for symbol in symbols:
+        strategies.append(
+            {
+                "type": "sma",
+                "name": f"sma {symbol}",
+                "venues": ["synthetic"],
+                "symbols": [symbol],
+                "short_window": 10,
+                "long_window": 30,
+                "thread": "bar_strategies",
+            }
+        )
+        strategies.append(
+            {
+                "type": "rsi",
+                "name": f"rsi {symbol}",
+                "venues": ["synthetic"],
+                "symbols": [symbol],
+                "rsi_window": 14,
+                "warmup": 200,
+                "thread": "bar_strategies",
+            }
+        )
+    strategies.append(
+        {
+            "type": "strat1",
+            "name": "quotes",
+            "venues": ["synthetic"],
+            "symbols": symbols,
+            "quote_mailbox": args.quote_mailbox,
+        }
+    )
+    return {
+        "venues": [
+            {
+                "api": "synthetic",
+                "name": "gateway_synthetic",
+                "symbols": symbols,
+                "quote_rate": args.quote_rate,
+                "trade_rate": args.trade_rate,
+                "bar_interval": args.bar_interval,
+                "batch_size": args.batch_size,
+                "start": START,
+            }
+        ],
+        "strategies": strategies,
+        "aggregation": {"timeframes": ["5m", "15m", "1h"], "source": "bars"},
+        "latency": {"enabled": True},
+        "dashboard": {"enabled": False},
+        "database": {
+            "api_key": "synthetic",
+            "secret_key": "synthetic",
+            "start_date": f"{START:%Y-%m-%d}",
+            "path": os.path.join(root, "db_crypto.db"),
+            "crypto": {"symbols": symbols},
+            "ticks": {"path": os.path.join(root, "ticks")},
+            "quotes": {"sqlite": False},
+        },
+    }
+
+
+def rss() -> int:
+    """Resident memory of this process in bytes, its peak where not available."""
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def run_benchmark(args, root: str) -> dict:
+    """Runs the load test with the databases of the engine under ``root``."""
+    parameters = {
+        "symbols": args.symbols,
+        "quote_rate": args.quote_rate,
+        "trade_rate": args.trade_rate,
+        "bar_interval": args.bar_interval,
+        "batch_size": args.batch_size,
+        "quote_mailbox": args.quote_mailbox,
+        "duration": args.duration,
+    }
+    log = logging.getLogger("bench")
+    try:
+        config = bench_config(args, root)
+        engine = Engine(config, log, SyntheticDatabase(config, log, 600))
+        gateway = engine.venues[Venue.SYNTHETIC]
+        engine.start()
+        time.sleep(args.warmup)
+
+        latency.reset()
+        sent = dict(gateway.sent)
+        orders = gateway.orders
+        started = time.perf_counter()
+        memory = [(0.0, rss())]
+        while memory[-1][0] < args.duration:
+            time.sleep(min(1.0, args.duration - memory[-1][0]))
+            memory.append((time.perf_counter() - started, rss()))
+        elapsed = memory[-1][0]
+        received = {k: gateway.sent[k] - sent[k] for k in sent}
+        orders = gateway.orders - orders
+        snapshot = latency.snapshot()
+
+        engine.stopEvent.set()
+        engine.join()
+    finally:
+        latency.enable(False)
+        latency.reset()
+
+    seconds, sizes = np.array(memory).T
+    slope = np.polyfit(seconds, sizes, 1)[0] if len(seconds) > 1 else 0.0
+    targets = {
+        "quote": args.quote_rate * args.symbols,
+        "trade": args.trade_rate * args.symbols,
+        "bar": args.symbols / args.bar_interval,
+    }
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "revision": revision(),
+        "parameters": parameters,
+        "throughput": {
+            "messages_per_s": sum(received.values()) / elapsed,
+            "target_per_s": sum(targets.values()),
+            **{f"{k}s_per_s": v / elapsed for k, v in received.items()},
+            "orders": orders,
+        },
+        "memory": {
+            "rss_start_mb": sizes[0] / 2**20,
+            "rss_end_mb": sizes[-1] / 2**20,
+            "growth_mb": (sizes[-1] - sizes[0]) / 2**20,
+            "growth_mb_per_min": slope * 60 / 2**20,
+        },
+        **snapshot,
+    }
+
+
+def shortfalls(result: dict, min_fraction: float) -> List[str]:
+    """The kinds of events sent at less than ``min_fraction`` of their target."""
+    throughput = result["throughput"]
+    parameters = result["parameters"]
+    targets = {
+        "quotes_per_s": parameters["quote_rate"] * parameters["symbols"],
+        "trades_per_s": parameters["trade_rate"] * parameters["symbols"],
+        "bars_per_s": parameters["symbols"] / parameters["bar_interval"],
+    }
+    return [k for k, v in targets.items() if throughput[k] < min_fraction * v]
+
+
+def compare(
+    result: dict, baseline: dict, tolerance: float, memory_tolerance: float
+) -> List[str]:
+    """
+    Prints ``result`` next to ``baseline``, returns the metrics worse by more
+    than ``tolerance`` (relative) or, for memory growth, ``memory_tolerance``
+    megabytes.
+    """
+    if result["parameters"] != baseline["parameters"]:
+        print("warning: the runs have different parameters")
+    rows = [
+        (
+            "messages_per_s",
+            result["throughput"]["messages_per_s"],
+            baseline["throughput"]["messages_per_s"],
+            False,
+        )
+    ]
+    for name in KEY_LATENCIES:
+        new = result["histograms"].get(name)
+        old = baseline["histograms"].get(name)
+        if new and old:
+            for p in ("p50_us", "p99_us"):
+                rows.append((f"{name} {p}", new[p], old[p], True))
+    regressions = []
+    print(f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, new, old, lower_is_better in rows:
+        change = (new - old) / old if old else 0.0
+        worse = change > tolerance if lower_is_better else change < -tolerance
+        print(
+            f"{name:<40} {old:>12.1f} {new:>12.1f} {change:>+8.1%}"
+            f"{'  REGRESSION' if worse else ''}"
+        )
+        if worse:
+            regressions.append(name)
+    new = result["memory"]["growth_mb"]
+    old = baseline["memory"]["growth_mb"]
+    worse = new - old > memory_tolerance
+    print(
+        f"{'memory growth_mb':<40} {old:>12.1f} {new:>12.1f} {new - old:>+8.1f}"
+        f"{'  REGRESSION' if worse else ''}"
+    )
+    if worse:
+        regressions.append("memory growth_mb")
+    return regressions
+
+
+def report(result: dict):
+    throughput = result["throughput"]
+    print(
+        f"{throughput['messages_per_s']:.0f} msg/s sustained "
+        f"(target {throughput['target_per_s']:.0f}): "
+        f"{throughput['quotes_per_s']:.0f} quotes, "
+        f"{throughput['trades_per_s']:.0f} trades, "
+        f"{throughput['bars_per_s']:.1f} bars/s, {throughput['orders']} orders"
+    )
+    memory = result["memory"]
+    print(
+        f"rss {memory['rss_start_mb']:.1f} -> {memory['rss_end_mb']:.1f} MB "
+        f"({memory['growth_mb_per_min']:+.2f} MB/min)"
+    )
+    print(f"{'stage':<40} {'count':>9} {'p50_us':>9} {'p99_us':>9} {'max_us':>9}")
+    for name, h in result["histograms"].items():
+        print(
+            f"{name:<40} {h['count']:>9} {h['p50_us']:>9.1f} "
+            f"{h['p99_us']:>9.1f} {h['max_us']:>9.1f}"
+        )
+    for name, g in result["gauges"].items():
+        print(f"{name:<40} backlog max {g['max']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="Engine benchmark")
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument(
+        "--quote-rate", type=float, default=200, help="quotes per second per symbol"
+    )
+    parser.add_argument(
+        "--trade-rate", type=float, default=50, help="trades per second per symbol"
+    )
+    parser.add_argument(
+        "--bar-interval", type=float, default=1.0, help="seconds per 1-minute bar"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1, help="events per gateway callback"
+    )
+    parser.add_argument("--quote-mailbox", choices=["fifo", "conflate"], default="fifo")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument(
+        "--output",
+        help=f"results file, defaults to {RESULTS_PATH}/engine-<time>.json",
+    )
+    parser.add_argument(
+        "--min-fraction",
+        type=float,
+        default=0.5,
+        help="fraction of the target rates below which the run fails",
+    )
+    parser.add_argument("--compare", help="results of an earlier run")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.25, help="relative change allowed"
+    )
+    parser.add_argument(
+        "--memory-tolerance", type=float, default=16.0, help="MB of growth allowed"
+    )
+    args = parser.parse_args()
+
+    output = args.output or os.path.join(
+        RESULTS_PATH, f"engine-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    output = os.path.abspath(output)
+    with tempfile.TemporaryDirectory() as root:
+        result = run_benchmark(args, root)
+    report(result)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"results written to {output}")
+
+    short = shortfalls(result, args.min_fraction)
+    if short:
+        print(f"below {args.min_fraction:.0%} of the target: {', '.join(short)}")
+        sys.exit(1)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(result, baseline, args.tolerance, args.memory_tolerance)
+        if regressions:
+            print(f"{len(regressions)} regressions")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
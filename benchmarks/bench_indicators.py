@@ -0,0 +1,98 @@
+"""
+Times the vectorized indicators of ``data.indicators`` against the original
+row-by-row implementations on synthetic 1-minute bars and checks that both
+give the same values.
+
+    python -m benchmarks.bench_indicators [--rows 525600]
+"""
+
+# standard
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# local
+from data.indicators import add_ATR_indic, add_RSI_indic
+
+
+def legacy_RSI_indic(data, column_name="close", window_length=14):
+    returns = data[column_name] - data[column_name].shift()
+    gains = returns * (returns >= 0).astype(int)
+    losses = returns * (returns <= 0).astype(int)
+    avg_gains = [0] * window_length + [gains[1 : window_length + 1].mean()]
+    avg_losses = [0] * window_length + [losses[1 : window_length + 1].mean()]
+    for i in range(len(avg_gains), len(gains)):
+        avg_gains.append(
+            (avg_gains[i - 1] * (window_length - 1) + gains[i]) / window_length
+        )
+        avg_losses.append(
+            (avg_losses[i - 1] * (window_length - 1) + losses[i]) / window_length
+        )
+    return 100 - (100 / (1 + pd.DataFrame(avg_gains) / -pd.DataFrame(avg_losses)))
+
+
+def legacy_ATR_indic(data, column_name="close", window_length=14):
+    a = data["high"] - data["low"]
+    b = abs(data["high"] - data[column_name])
+    c = abs(data["low"] - data[column_name])
+    TR = pd.DataFrame({"a": a, "b": b, "c": c}).max(axis=1)
+    data["ATR " + column_name] = TR.rolling(window_length).mean()
+
+
+def synthetic_bars(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 40000 + np.cumsum(rng.normal(0, 25, rows))
+    spread = np.abs(rng.normal(0, 10, rows))
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2023-01-01", periods=rows, freq="min"),
+            "close": close,
+            "high": close + spread,
+            "low": close - spread,
+        }
+    )
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="Indicator benchmark")
+    parser.add_argument(
+        "--rows", type=int, default=525600, help="1-minute bars (default a year)"
+    )
+    parser.add_argument("--window", type=int, default=14)
+    args = parser.parse_args()
+
+    bars = synthetic_bars(args.rows)
+    print(f"{args.rows} bars, window {args.window}")
+
+    legacy, legacy_time = timed(legacy_RSI_indic, bars, "close", args.window)
+    current, current_time = timed(add_RSI_indic, bars, "close", args.window)
+    np.testing.assert_allclose(
+        current[0].to_numpy()[args.window + 1 :],
+        legacy[0].to_numpy()[args.window + 1 :],
+        rtol=1e-9,
+    )
+    print(
+        f"RSI: legacy {legacy_time:.3f}s, vectorized {current_time:.3f}s "
+        f"({legacy_time / current_time:.0f}x)"
+    )
+
+    legacy, current = bars.copy(), bars.copy()
+    _, legacy_time = timed(legacy_ATR_indic, legacy, "close", args.window)
+    _, current_time = timed(add_ATR_indic, current, "close", args.window)
+    pd.testing.assert_frame_equal(current, legacy)
+    print(
+        f"ATR: legacy {legacy_time:.3f}s, vectorized {current_time:.3f}s "
+        f"({legacy_time / current_time:.0f}x)"
+    )
+
+
+if __name__ == "__main__":
+    main()
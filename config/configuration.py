@@ -1,6 +1,10 @@
 import yaml
+import logging
 import os
 import re
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import List
 
 
 def resolve_yaml_config(config_file):
@@ -30,3 +34,36 @@ def resolve_yaml_config(config_file):
         yaml.dump(config, file)
 
     return config
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueues records untouched: formatting is left to the handlers behind the
+    listener, so the logging thread never renders the message and handlers such
+    as the journal still receive the original object.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def start_async_loggers(names: List[str]) -> List[QueueListener]:
+    """
+    Moves the handlers of each named logger behind a queue drained by a
+    background ``QueueListener``, so logging only costs the caller an enqueue.
+    The listeners must be stopped at shutdown to flush what is still queued.
+    """
+    listeners = []
+    for name in names:
+        logger = logging.getLogger(name)
+        handlers = list(logger.handlers)
+        if not handlers:
+            continue
+        queue = SimpleQueue()
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(DeferredQueueHandler(queue))
+        listener = QueueListener(queue, *handlers, respect_handler_level=True)
+        listener.start()
+        listeners.append(listener)
+    return listeners
@@ -0,0 +1,197 @@
+# standard
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from alpaca.data.requests import CryptoBarsRequest
+from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
+
+CHUNKS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS backfill_chunks (
+        symbol TEXT NOT NULL,
+        start DATETIME NOT NULL,
+        end DATETIME NOT NULL,
+        rows INTEGER,
+        completed_on DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (symbol, start)
+    ) WITHOUT ROWID
+"""
+
+# (symbol, chunk start, chunk end)
+Chunk = Tuple[str, datetime, datetime]
+
+
+class RateLimiter:
+    """
+    Token bucket shared by the fetching threads: ``rate`` requests per second
+    on average, up to ``burst`` at once.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.burst, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Backfill:
+    """
+    Fetches the historical bars missing from the database.
+
+    The range is split into ``chunk_days`` chunks per symbol, aligned on the
+    start date so they are the same from one run to the next. Chunks are
+    fetched by ``workers`` threads under a shared rate limit of
+    ``requests_per_minute`` and written as they complete, each in one bulk
+    upsert, on the calling thread. Every chunk that lies entirely in the past is
+    then recorded in ``backfill_chunks``, so an interrupted backfill resumes
+    where it stopped instead of starting over. Chunks skipped because a symbol
+    was filled up to its watermark before it had any checkpoint are recorded
+    too, without a row count.
+    """
+
+    def __init__(
+        self,
+        client,
+        log: logging.Logger,
+        chunk_days: int = 7,
+        workers: int = 4,
+        requests_per_minute: float = 180,
+    ):
+        self.client = client
+        self.log = log
+        self.chunk = timedelta(days=chunk_days)
+        self.workers = workers
+        self.limiter = RateLimiter(requests_per_minute / 60, burst=workers)
+
+    def chunks(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime,
+        watermarks: Optional[Dict[str, datetime]] = None,
+    ) -> List[Chunk]:
+        """
+        Chunks of ``[start, end)`` per symbol, skipping those that end before
+        the symbol's watermark when one is given, i.e. when everything up to
+        it is known to be stored.
+        """
+        chunks = []
+        for symbol in symbols:
+            watermark = (watermarks or {}).get(symbol)
+            chunkStart = start
+            while chunkStart < end:
+                chunkEnd = chunkStart + self.chunk
+                if watermark is None or chunkEnd > watermark:
+                    chunks.append((symbol, chunkStart, chunkEnd))
+                chunkStart = chunkEnd
+        return chunks
+
+    def fetch(self, symbol: str, start: datetime, end: datetime) -> pd.DataFrame:
+        self.limiter.acquire()
+        return self.client.get_crypto_bars(
+            request_params=CryptoBarsRequest(
+                symbol_or_symbols=[symbol],
+                timeframe=TimeFrame(1, TimeFrameUnit.Minute),
+                start=start,
+                end=end,
+            )
+        ).df
+
+    def run(self, database, start: datetime, end: datetime):
+        """
+        Backfills the symbols of ``database`` (a ``CryptoDatabase``) from
+        ``start`` to ``end``, on its open connection.
+        """
+        conn: sqlite3.Connection = database.conn
+        conn.execute(CHUNKS_SCHEMA)
+        done = {
+            (symbol, str(chunkStart))
+            for symbol, chunkStart in conn.execute(
+                "SELECT symbol, start FROM backfill_chunks"
+            )
+        }
+        watermarks = dict(database.watermarks)
+        # symbols never backfilled by chunks were filled in order, day by day,
+        # up to their watermark; otherwise chunks may complete in any order
+        checkpointed = {symbol for symbol, _ in done}
+        contiguous = {s: w for s, w in watermarks.items() if s not in checkpointed}
+        pending = [
+            c
+            for c in self.chunks(database.symbols, start, end, contiguous)
+            if (c[0], str(c[1])) not in done
+        ]
+        # the chunks under those watermarks are stored: record them, as the
+        # watermarks no longer apply once the symbols have checkpoints
+        covered = set(pending)
+        skipped = [
+            c
+            for c in self.chunks(database.symbols, start, end)
+            if c not in covered and (c[0], str(c[1])) not in done
+        ]
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO backfill_chunks (symbol, start, end, rows)
+            VALUES (?, ?, ?, NULL)
+        """,
+            [(symbol, str(s), str(e)) for symbol, s, e in skipped],
+        )
+        conn.commit()
+        self.log.info(f"Backfilling {len(pending)} chunks of {self.chunk}...")
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="backfill"
+        ) as pool:
+            futures = {}
+            for symbol, chunkStart, chunkEnd in pending:
+                # chunks are written at once: one holding the latest bar stored
+                # is stored up to it
+                watermark = watermarks.get(symbol)
+                if watermark is None or not chunkStart <= watermark < chunkEnd:
+                    watermark = None
+                future = pool.submit(
+                    self.fetch, symbol, watermark or chunkStart, min(chunkEnd, end)
+                )
+                futures[future] = (symbol, chunkStart, chunkEnd, watermark)
+            for future in as_completed(futures):
+                symbol, chunkStart, chunkEnd, watermark = futures[future]
+                try:
+                    bars = future.result()
+                except Exception as e:
+                    self.log.error(
+                        f"Backfill of {symbol} from {chunkStart} failed: {e}"
+                    )
+                    continue
+                if watermark is not None and not bars.empty:
+                    # keep the bars already stored as they are
+                    bars = bars[bars.index.get_level_values("timestamp") > watermark]
+                rows = database.store_bars(bars)
+                if chunkEnd <= end:
+                    conn.execute(
+                        """
+                        INSERT OR REPLACE INTO backfill_chunks
+                            (symbol, start, end, rows)
+                        VALUES (?, ?, ?, ?)
+                    """,
+                        (symbol, str(chunkStart), str(chunkEnd), rows),
+                    )
+                    conn.commit()
+        self.log.info("Backfill done")
@@ -0,0 +1,345 @@
+# standard
+import argparse
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+except ImportError:  # optional, only the columnar store needs it
+    pa = None
+
+# local
+from data.cryptoDatabase import DATABASE_PATH
+from data.history import HistoryLoader, _dtype
+from engine.interface import Bar, Venue
+
+COLUMNAR_PATH = "./data/columnar"
+
+# timestamp, then the numeric fields
+FIELDS = HistoryLoader.FIELDS
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError(
+            "the columnar store needs pyarrow, install it with "
+            "`poetry install --extras columnar`"
+        )
+
+
+def _schema() -> "pa.Schema":
+    return pa.schema(
+        [("timestamp", pa.timestamp("ns", tz="UTC"))]
+        + [(field, pa.float64()) for field in FIELDS[1:]]
+    )
+
+
+def _ns(value: Optional[datetime]) -> Optional[int]:
+    if value is None:
+        return None
+    # naive datetimes are taken as UTC
+    return pd.Timestamp(value).as_unit("ns").value
+
+
+def partition(root: str, symbol: str) -> str:
+    """Directory holding the monthly files of ``symbol``."""
+    return os.path.join(root, symbol.replace("/", "-"))
+
+
+def export_bars(
+    path: str = DATABASE_PATH,
+    root: str = COLUMNAR_PATH,
+    symbols: Optional[List[str]] = None,
+    full: bool = False,
+) -> Dict[str, int]:
+    """
+    Mirrors the ``bars`` table of the SQLite database at ``path`` into one
+    Arrow IPC file per symbol and month under ``root``.
+
+    Runs are incremental: each file records a fingerprint of the month it was
+    written from, the row count and the sums of the numeric columns, and only
+    the months whose fingerprint changed since are written again, unless
+    ``full`` is set. Bars backfilled or corrected in an earlier month are
+    exported too. Files are uncompressed so readers can memory-map them, and
+    replaced atomically so they can be read while the export runs. Returns the
+    number of files written per symbol.
+    """
+    _require_pyarrow()
+    schema = _schema()
+    conn = sqlite3.connect(path)
+    try:
+        if symbols is None:
+            symbols = [s for (s,) in conn.execute("SELECT DISTINCT symbol FROM bars")]
+        written = {}
+        for symbol in symbols:
+            directory = partition(root, symbol)
+            fingerprints = _fingerprints(conn, symbol)
+            if not fingerprints:
+                continue
+            os.makedirs(directory, exist_ok=True)
+            written[symbol] = 0
+            for month, fingerprint in fingerprints.items():
+                target = os.path.join(directory, f"{month}.arrow")
+                if not full and _exported(target) == fingerprint:
+                    continue
+                _export_month(conn, schema, target, symbol, month)
+                written[symbol] += 1
+    finally:
+        conn.close()
+    return written
+
+
+def _fingerprints(
+    conn: sqlite3.Connection, symbol: str, month: Optional[str] = None
+) -> Dict[str, str]:
+    """Fingerprints of the months of ``symbol``, or of ``month`` only, by month."""
+    where, params = "symbol = ?", [symbol]
+    if month is not None:
+        start = pd.Timestamp(month + "-01")
+        where += " AND timestamp >= ? AND timestamp < ?"
+        params += [f"{start:%Y-%m-%d}", f"{start + pd.offsets.MonthBegin():%Y-%m-%d}"]
+    sums = ", ".join(f"TOTAL({field})" for field in FIELDS[1:])
+    # timestamps are stored as text, months are contiguous ranges of the key
+    rows = conn.execute(
+        f"""
+        SELECT substr(timestamp, 1, 7) AS month, COUNT(*), {sums}
+        FROM bars
+        WHERE {where}
+        GROUP BY month
+        ORDER BY month
+    """,
+        params,
+    ).fetchall()
+    return {row[0]: " ".join(repr(v) for v in row[1:]) for row in rows}
+
+
+def _exported(target: str) -> Optional[str]:
+    """Fingerprint recorded in the file at ``target``, None if there is none."""
+    if not os.path.exists(target):
+        return None
+    with pa.memory_map(target) as source:
+        metadata = pa.ipc.open_file(source).schema.metadata or {}
+    fingerprint = metadata.get(b"fingerprint")
+    return None if fingerprint is None else fingerprint.decode()
+
+
+def _export_month(
+    conn: sqlite3.Connection,
+    schema: "pa.Schema",
+    target: str,
+    symbol: str,
+    month: str,
+):
+    start = pd.Timestamp(month + "-01")
+    # taken first: rows written meanwhile make the next run export them
+    fingerprint = _fingerprints(conn, symbol, month).get(month, "")
+    rows = conn.execute(
+        f"""
+        SELECT {", ".join(FIELDS)}
+        FROM bars
+        WHERE symbol = ? AND timestamp >= ? AND timestamp < ?
+        ORDER BY timestamp
+    """,
+        (
+            symbol,
+            f"{start:%Y-%m-%d}",
+            f"{start + pd.offsets.MonthBegin():%Y-%m-%d}",
+        ),
+    ).fetchall()
+    columns = list(zip(*rows)) or [[] for _ in FIELDS]
+    arrays = [
+        pa.array(
+            pd.to_datetime(list(columns[0]), utc=True, format="ISO8601")
+            .as_unit("ns")
+            .asi8,
+            type=schema.field("timestamp").type,
+        )
+    ]
+    for field, values in zip(FIELDS[1:], columns[1:]):
+        arrays.append(pa.array(np.array(values, dtype=float)))
+    schema = schema.with_metadata({"fingerprint": fingerprint})
+    table = pa.Table.from_arrays(arrays, schema=schema)
+    with pa.OSFile(target + ".tmp", "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+    os.replace(target + ".tmp", target)
+
+
+def replay_bars(
+    reader: "ColumnarBars",
+    venues: Dict[str, Venue],
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[Bar]:
+    """
+    The bars of the symbols of ``venues`` in ``[start, end)``, read from the
+    columnar store in (timestamp, symbol) order like ``Backtester.load_bars``.
+    """
+    symbols = sorted(venues)
+    parts = [reader.read(symbol, FIELDS, start, end) for symbol in symbols]
+    index = np.concatenate(
+        [np.full(len(part), i, dtype=np.int64) for i, part in enumerate(parts)]
+        or [np.empty(0, dtype=np.int64)]
+    )
+    if not len(index):
+        return
+    rows = np.concatenate(parts)
+    order = np.lexsort((index, rows["timestamp"]))
+    rows, index = rows[order], index[order]
+    for i, symbol in enumerate(index.tolist()):
+        row = rows[i]
+        name = symbols[symbol]
+        bar = Bar(
+            venues[name],
+            name,
+            float(row["open"]),
+            float(row["high"]),
+            float(row["low"]),
+            float(row["close"]),
+            float(row["volume"]),
+            pd.Timestamp(int(row["timestamp"]), tz="UTC").to_pydatetime(),
+        )
+        trade_count, vwap = float(row["trade_count"]), float(row["vwap"])
+        bar.trade_count = None if np.isnan(trade_count) else trade_count
+        bar.vwap = None if np.isnan(vwap) else vwap
+        yield bar
+
+
+class ColumnarBars:
+    """
+    Reads the bars exported by ``export_bars``.
+
+    Only the files of the months overlapping the requested range are opened,
+    memory-mapped, and only the requested columns of the rows in range are
+    copied out: the range is found by binary search on the (sorted) timestamp
+    column. Rows are returned as a NumPy structured array in chronological
+    order, the ``timestamp`` column as int64 ns since the epoch, like
+    ``HistoryLoader`` which it can stand in for.
+    """
+
+    FIELDS = FIELDS
+
+    def __init__(self, root: str = COLUMNAR_PATH, until: Optional[datetime] = None):
+        _require_pyarrow()
+        self.root = root
+        # only bars strictly before this timestamp are visible, for backtests
+        self.until = until
+
+    def months(self, symbol: str) -> List[pd.Timestamp]:
+        directory = partition(self.root, symbol)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            pd.Timestamp(f[:7] + "-01")
+            for f in os.listdir(directory)
+            if f[7:] == ".arrow"
+        )
+
+    def read(
+        self,
+        symbol: str,
+        columns: Sequence[str] = ("close",),
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """The requested columns of the bars of ``symbol`` in ``[start, end)``."""
+        columns = tuple(columns)
+        unknown = set(columns) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"unknown bar columns: {sorted(unknown)}")
+        start_ns, end_ns = _ns(start), _ns(end)
+        if self.until is not None:
+            until = _ns(self.until)
+            end_ns = until if end_ns is None else min(end_ns, until)
+        parts = []
+        for month in self.months(symbol):
+            month_end = _ns(month + pd.offsets.MonthBegin())
+            if start_ns is not None and month_end <= start_ns:
+                continue
+            if end_ns is not None and _ns(month) >= end_ns:
+                break
+            parts.append(self._read_month(symbol, month, columns, start_ns, end_ns))
+        if not parts:
+            return np.empty(0, dtype=_dtype(columns))
+        return np.concatenate(parts)
+
+    def load(
+        self, symbol: str, n: int, columns: Sequence[str] = ("close",)
+    ) -> np.ndarray:
+        """The last ``n`` bars of ``symbol``, as ``HistoryLoader.load``."""
+        columns = tuple(columns)
+        end_ns = None if self.until is None else _ns(self.until)
+        parts, count = [], 0
+        # latest months first, until enough bars are read
+        for month in reversed(self.months(symbol)):
+            if end_ns is not None and _ns(month) >= end_ns:
+                continue
+            part = self._read_month(symbol, month, columns, None, end_ns)
+            parts.append(part)
+            count += len(part)
+            if count >= n:
+                break
+        if not parts:
+            return np.empty(0, dtype=_dtype(columns))
+        rows = np.concatenate(parts[::-1])
+        return rows[len(rows) - min(n, len(rows)) :]
+
+    def clear(self):
+        pass
+
+    def _read_month(
+        self,
+        symbol: str,
+        month: pd.Timestamp,
+        columns: Sequence[str],
+        start_ns: Optional[int],
+        end_ns: Optional[int],
+    ) -> np.ndarray:
+        path = os.path.join(partition(self.root, symbol), f"{month:%Y-%m}.arrow")
+        parts = []
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                timestamps = batch.column(0).to_numpy().view("i8")
+                lo = 0 if start_ns is None else np.searchsorted(timestamps, start_ns)
+                hi = (
+                    len(timestamps)
+                    if end_ns is None
+                    else np.searchsorted(timestamps, end_ns)
+                )
+                rows = np.empty(hi - lo, dtype=_dtype(columns))
+                for column in columns:
+                    values = batch.column(column).to_numpy()[lo:hi]
+                    rows[column] = (
+                        values.view("i8") if column == "timestamp" else values
+                    )
+                parts.append(rows)
+        if not parts:
+            return np.empty(0, dtype=_dtype(columns))
+        return np.concatenate(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="Columnar export")
+    parser.add_argument("--db", default=DATABASE_PATH, help="SQLite database")
+    parser.add_argument("--root", default=COLUMNAR_PATH, help="columnar store")
+    parser.add_argument(
+        "--symbols", nargs="*", help="symbols to export, all by default"
+    )
+    parser.add_argument("--full", action="store_true", help="export every month again")
+    args = parser.parse_args()
+    for symbol, files in export_bars(
+        args.db, args.root, args.symbols, args.full
+    ).items():
+        print(f"{symbol}: {files} monthly files written")
+
+
+if __name__ == "__main__":
+    main()
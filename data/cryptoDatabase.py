@@ -1,9 +1,85 @@
 import logging.config
 import sqlite3
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, List, Union
+
+import pandas as pd
 from alpaca.data.historical.crypto import CryptoHistoricalDataClient
-from alpaca.data.timeframe import TimeFrame, TimeFrameUnit
-from alpaca.data.requests import CryptoBarsRequest
+
+from data.backfill import Backfill
+from engine.interface import Bar, BarBatch
+
+DATABASE_PATH = "./data/db_crypto.db"
+
+# bumped whenever the schema changes, stored in the database's user_version
+SCHEMA_VERSION = 1
+
+BARS_FIELDS = [
+    "symbol",
+    "timestamp",
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "trade_count",
+    "vwap",
+]
+BARS_COLUMNS = ", ".join(BARS_FIELDS)
+BARS_UPDATES = ", ".join(f"{c} = excluded.{c}" for c in BARS_FIELDS[2:])
+
+BARS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS bars (
+        symbol TEXT NOT NULL,
+        timestamp DATETIME NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        trade_count INTEGER,
+        vwap REAL,
+        added_on DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (symbol, timestamp)
+    ) WITHOUT ROWID
+"""
+
+# bars aggregated by the engine from the 1-minute stream, see engine/aggregator.py
+AGG_BARS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS agg_bars (
+        symbol TEXT NOT NULL,
+        timeframe TEXT NOT NULL,
+        timestamp DATETIME NOT NULL,
+        open REAL,
+        high REAL,
+        low REAL,
+        close REAL,
+        volume REAL,
+        added_on DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (symbol, timeframe, timestamp)
+    ) WITHOUT ROWID
+"""
+
+UPSERT_AGG_BARS = """
+    INSERT INTO agg_bars (symbol, timeframe, timestamp, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (symbol, timeframe, timestamp) DO UPDATE SET
+        open = excluded.open,
+        high = excluded.high,
+        low = excluded.low,
+        close = excluded.close,
+        volume = excluded.volume,
+        added_on = CURRENT_TIMESTAMP
+"""
+
+UPSERT_BARS = f"""
+    INSERT INTO bars ({BARS_COLUMNS})
+    VALUES ({", ".join("?" for _ in BARS_FIELDS)})
+    ON CONFLICT (symbol, timestamp) DO UPDATE SET
+        {BARS_UPDATES},
+        added_on = CURRENT_TIMESTAMP
+"""
 
 
 class CryptoDatabase:
@@ -11,100 +87,189 @@ class CryptoDatabase:
         self.log = log
         self.databaseLog = logging.getLogger("database")
         self.symbols = config["database"]["crypto"]["symbols"]
+        self.path = config["database"].get("path", DATABASE_PATH)
         self.start_date = config["database"]["start_date"]
         self.api = CryptoHistoricalDataClient(
             api_key=config["database"]["api_key"],
             secret_key=config["database"]["secret_key"],
         )
+        self.backfill = Backfill(
+            self.api, self.databaseLog, **config["database"].get("backfill", {})
+        )
         self.conn = None
         self.cursor = None
+        # live bars are appended from the gateway thread on their own connection
+        self.liveConn = None
+        self.liveLock = Lock()
+        # per-symbol high-water mark: latest bar timestamp stored in the database
+        self.watermarks: Dict[str, datetime] = {}
         self.open()
         self.initialize_database()
+        self.load_watermarks()
         self.populate_database()
         self.close()
 
     def initialize_database(self):
         self.databaseLog.info("Initializing database...")
-        self.cursor.execute(
+        version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+        columns = [row[1] for row in self.cursor.execute("PRAGMA table_info(bars)")]
+        if version < SCHEMA_VERSION and "id" in columns:
+            self.migrate_legacy_bars()
+        self.cursor.execute(BARS_SCHEMA)
+        self.cursor.execute(AGG_BARS_SCHEMA)
+        self.cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.commit()
+
+    def migrate_legacy_bars(self):
+        """
+        One-time conversion of the original ``id``-keyed bars table, in place,
+        into the ``(symbol, timestamp)``-keyed one. Duplicates collapse onto the
+        most recently inserted row, as ``remove_duplicates`` used to do.
+        """
+        self.databaseLog.info("Migrating bars table to (symbol, timestamp) key...")
+        try:
+            self.cursor.execute("BEGIN")
+            self.cursor.execute("ALTER TABLE bars RENAME TO bars_legacy")
+            self.cursor.execute(BARS_SCHEMA)
+            self.cursor.execute(
+                f"""
+                INSERT INTO bars (
+                    {BARS_COLUMNS}, added_on
+                )
+                SELECT {BARS_COLUMNS}, added_on
+                FROM bars_legacy
+                WHERE symbol IS NOT NULL AND timestamp IS NOT NULL
+                ORDER BY id
+                ON CONFLICT (symbol, timestamp) DO UPDATE SET
+                    {BARS_UPDATES},
+                    added_on = excluded.added_on
             """
-            CREATE TABLE IF NOT EXISTS bars (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME,
-                symbol TEXT,
-                close REAL,
-                high REAL,
-                low REAL,
-                trade_count INTEGER,
-                open REAL,
-                volume REAL,
-                vwap REAL,
-                added_on DATETIME DEFAULT CURRENT_TIMESTAMP
             )
+            self.cursor.execute("DROP TABLE bars_legacy")
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        # give the space held by the legacy table back to the filesystem
+        self.cursor.execute("VACUUM")
+        self.databaseLog.info("Migration of bars table done")
+
+    def upsert_bars(self, conn: sqlite3.Connection, rows: List[tuple]):
         """
-        )
-        self.conn.commit()
+        Inserts rows ordered as ``BARS_COLUMNS``, replacing any bar already
+        stored for the same symbol and timestamp.
+        """
+        conn.executemany(UPSERT_BARS, rows)
+        conn.commit()
+
+    def load_watermarks(self):
+        rows = self.cursor.execute(
+            "SELECT symbol, MAX(timestamp) FROM bars GROUP BY symbol"
+        ).fetchall()
+        self.watermarks = {}
+        for symbol, ts in rows:
+            if ts:
+                watermark = datetime.fromisoformat(ts)
+                if watermark.tzinfo is None:
+                    watermark = watermark.replace(tzinfo=timezone.utc)
+                self.watermarks[symbol] = watermark
 
     def populate_database(self):
-        end_date = datetime.now()
-        current_date = datetime.strptime(self.start_date, "%Y-%m-%d")
-        while current_date <= end_date:
-            self.add_data_for_date(current_date)
-            current_date += timedelta(days=1)
-        self.remove_duplicates()
-
-    def add_data_for_date(self, date: datetime):
-        end_date = date + timedelta(days=1)
-        bars = self.api.get_crypto_bars(
-            request_params=CryptoBarsRequest(
-                symbol_or_symbols=self.symbols,
-                timeframe=TimeFrame(1, TimeFrameUnit.Minute),
-                start=date,
-                end=end_date,
-            )
-        ).df
-        self.databaseLog.info(
-            f"Adding data ({len(bars.index)}) from {date} to the database..."
+        end_date = datetime.now(timezone.utc)
+        start_date = datetime.strptime(self.start_date, "%Y-%m-%d").replace(
+            tzinfo=timezone.utc
         )
-        bars.to_sql("bars", self.conn, if_exists="append", index=True)
+        self.backfill.run(self, start_date, end_date)
 
-    def remove_duplicates(self):
-        self.cursor.execute(
-            """
-            CREATE TEMPORARY TABLE latest_entries AS
-            SELECT MAX(id) AS max_id
-            FROM bars
-            GROUP BY timestamp, symbol
+    def store_bars(self, bars: pd.DataFrame) -> int:
         """
-        )
-
-        self.cursor.execute(
-            """
-            DELETE FROM bars
-            WHERE id NOT IN (SELECT max_id FROM latest_entries)
+        Upserts bars as returned by the REST API, indexed by symbol and
+        timestamp, in one batch and advances the watermarks. Returns the number
+        of rows written.
         """
+        if bars.empty:
+            return 0
+        bars = bars.reset_index()
+        for symbol, ts in bars.groupby("symbol")["timestamp"].max().items():
+            watermark = self.watermarks.get(symbol)
+            if watermark is None or ts > watermark:
+                self.watermarks[symbol] = ts.to_pydatetime()
+        bars["timestamp"] = bars["timestamp"].astype(str)
+        self.upsert_bars(
+            self.conn,
+            list(bars[BARS_FIELDS].itertuples(index=False, name=None)),
         )
-
-        self.conn.commit()
+        return len(bars.index)
 
     def update_database(self):
+        """
+        Catches up with the REST API from the watermarks, fetching only the
+        bars that are missing from the database.
+        """
         self.open()
-        q = """
-        SELECT MAX(timestamp) FROM {table}
-        """.format(
-            table="bars",
-        )
-        # We are adding an entire day every time
-        last_date = self.cursor.execute(q).fetchone()[0][:10]
-        # So there is an overlapping
-        # TODO: Fix this to look at the timestamp
-        # and add the missing data only
-        if last_date:
-            self.populate_database(last_date)
+        self.populate_database()
         self.close()
 
+    def append_bars(self, bars: Union[BarBatch, List[Bar]]):
+        """
+        Writes live bars straight from the stream, read column by column from a
+        ``BarBatch``. Bars are upserted so a re-sent bar replaces the stored one.
+        """
+        if not len(bars):
+            return
+        if not isinstance(bars, BarBatch):
+            bars = BarBatch.from_bars(bars[0].venue, bars)
+        for symbol, timestamp in zip(bars.symbols, bars.timestamps):
+            watermark = self.watermarks.get(symbol)
+            if watermark is None or timestamp > watermark:
+                self.watermarks[symbol] = timestamp
+        rows = list(
+            zip(
+                bars.symbols,
+                map(str, bars.timestamps),
+                bars.open,
+                bars.high,
+                bars.low,
+                bars.close,
+                bars.volume,
+                bars.trade_counts,
+                bars.vwaps,
+            )
+        )
+        with self.liveLock:
+            self.upsert_bars(self.live(), rows)
+
+    def append_agg_bars(self, bars: List[Bar]):
+        """Writes the bars aggregated by the engine, upserted like live bars."""
+        rows = [
+            (
+                bar.symbol,
+                bar.timeframe,
+                str(bar.timestamp),
+                bar.open,
+                bar.high,
+                bar.low,
+                bar.close,
+                bar.volume,
+            )
+            for bar in bars
+        ]
+        if not rows:
+            return
+        with self.liveLock:
+            conn = self.live()
+            conn.executemany(UPSERT_AGG_BARS, rows)
+            conn.commit()
+
+    def live(self) -> sqlite3.Connection:
+        """Connection of the live writes, to be used under ``liveLock``."""
+        if self.liveConn is None:
+            self.liveConn = sqlite3.connect(self.path, check_same_thread=False)
+        return self.liveConn
+
     def open(self):
         if self.conn is None:
-            self.conn = sqlite3.connect("./data/db_crypto.db")
+            self.conn = sqlite3.connect(self.path)
             self.cursor = self.conn.cursor()
 
     def close(self):
@@ -112,3 +277,9 @@ class CryptoDatabase:
             self.conn.close()
             self.conn = None
             self.cursor = None
+
+    def close_live(self):
+        with self.liveLock:
+            if self.liveConn:
+                self.liveConn.close()
+                self.liveConn = None
@@ -0,0 +1,131 @@
+# standard
+import sqlite3
+from threading import Lock
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# local
+from data.cryptoDatabase import BARS_FIELDS, DATABASE_PATH
+
+
+def _dtype(columns: Sequence[str]) -> list:
+    return [(c, "i8" if c == "timestamp" else float) for c in columns]
+
+
+class HistoryLoader:
+    """
+    Loads the latest bars of a symbol for strategy warm starts.
+
+    Only the requested columns of the last ``n`` bars are read, through the
+    ``(symbol, timestamp)`` key, and returned in chronological order as a
+    read-only NumPy structured array. Results are cached so strategies warming
+    up on the same symbol and columns share their reads: a longer request only
+    fetches the older rows that are not cached yet.
+
+    The ``timestamp`` column can be requested too, as int64 ns since the epoch.
+    """
+
+    NUMERIC_FIELDS = BARS_FIELDS[2:]
+    FIELDS = ["timestamp", *NUMERIC_FIELDS]
+
+    def __init__(self, path: str = DATABASE_PATH, until: Optional[str] = None):
+        self.path = path
+        # only bars strictly before this timestamp are visible, for backtests
+        self.until = until
+        self.lock = Lock()
+        # (symbol, columns) -> (rows, timestamp of the oldest row, all read)
+        self.cache: Dict[
+            Tuple[str, Tuple[str, ...]], Tuple[np.ndarray, Optional[str], bool]
+        ] = {}
+
+    def load(
+        self, symbol: str, n: int, columns: Sequence[str] = ("close",)
+    ) -> np.ndarray:
+        columns = tuple(columns)
+        unknown = set(columns) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"unknown bar columns: {sorted(unknown)}")
+        key = (symbol, columns)
+        with self.lock:
+            rows, oldest, complete = self.cache.get(key, (None, None, False))
+            if rows is None or (len(rows) < n and not complete):
+                # only read the part of the history that is not cached yet
+                missing = n if rows is None else n - len(rows)
+                older, oldest_read = self._read(symbol, missing, columns, oldest)
+                complete = len(older) < missing
+                oldest = oldest_read or oldest
+                rows = older if rows is None else np.concatenate([older, rows])
+                rows.flags.writeable = False
+                self.cache[key] = (rows, oldest, complete)
+        return rows[len(rows) - min(n, len(rows)) :]
+
+    def clear(self):
+        with self.lock:
+            self.cache.clear()
+
+    def _read(
+        self,
+        symbol: str,
+        n: int,
+        columns: Tuple[str, ...],
+        before: Optional[str] = None,
+    ) -> Tuple[np.ndarray, Optional[str]]:
+        """
+        Reads the ``n`` latest bars older than ``before``, returns them oldest
+        first along with the timestamp of the oldest one.
+        """
+        where, params = "symbol = ?", [symbol]
+        if self.until is not None:
+            where += " AND timestamp < ?"
+            params.append(self.until)
+        if before is not None:
+            where += " AND timestamp < ?"
+            params.append(before)
+        conn = sqlite3.connect(self.path)
+        try:
+            fetched = conn.execute(
+                f"""
+                SELECT timestamp, {", ".join(columns)}
+                FROM bars
+                WHERE {where}
+                ORDER BY timestamp DESC
+                LIMIT ?
+            """,
+                (*params, n),
+            ).fetchall()
+        finally:
+            conn.close()
+        fetched.reverse()
+        rows = np.empty(len(fetched), dtype=_dtype(columns))
+        for i, column in enumerate(columns, start=1):
+            values = [row[i] for row in fetched]
+            if column == "timestamp":
+                rows[column] = pd.to_datetime(values, utc=True).as_unit("ns").asi8
+            else:
+                rows[column] = np.array(values, dtype=float)
+        return rows, fetched[0][0] if fetched else None
+
+
+class ArrayHistory:
+    """
+    Serves the ``HistoryLoader.load`` interface from bars already in memory,
+    e.g. mapped from shared memory: one structured array per symbol, oldest
+    first. Nothing is copied, the returned rows are views.
+    """
+
+    def __init__(self, bars: Dict[str, np.ndarray]):
+        self.bars = bars
+
+    def load(
+        self, symbol: str, n: int, columns: Sequence[str] = ("close",)
+    ) -> np.ndarray:
+        rows = self.bars.get(symbol)
+        if rows is None:
+            return np.empty(0, dtype=_dtype(columns))
+        rows = rows[list(columns)]
+        return rows[len(rows) - min(n, len(rows)) :]
+
+    def clear(self):
+        pass
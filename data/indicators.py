@@ -1,3 +1,8 @@
+import math
+from collections import deque
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
 import pandas as pd
 
 # Calculate some technical indicators
@@ -22,8 +27,8 @@ def add_mov_std(data, column_name, window):
 def add_mov_dynamic(data: pd.DataFrame, column_name: str, window: int):
     if column_name not in data.columns:
         return
-    m = data[column_name] - data[column_name].rolling(window).mean()
-    dynamic_col = (m) / data[column_name].rolling(window).std()
+    rolling = data[column_name].rolling(window)
+    dynamic_col = (data[column_name] - rolling.mean()) / rolling.std()
     data[column_name + " Dynamic " + str(window)] = dynamic_col
 
 
@@ -37,29 +42,46 @@ def add_macd_indic(data, column_name):
     data[column_name + " MACD"] = diff_MACD_e9
 
 
+def _wilder_average(values: np.ndarray, window_length: int) -> np.ndarray:
+    """
+    Wilder smoothing of ``values[1:]``: NaN for the first ``window_length``
+    rows, the plain mean of ``values[1 : window_length + 1]`` at
+    ``window_length``, then ``(avg * (window_length - 1) + value) / window_length``,
+    which is an EWM with ``alpha=1/window_length``.
+    """
+    avg = np.full(len(values), np.nan)
+    if len(values) <= window_length:
+        return avg
+    seeded = values[window_length:].copy()
+    seeded[0] = values[1 : window_length + 1].mean()
+    avg[window_length:] = (
+        pd.Series(seeded).ewm(alpha=1 / window_length, adjust=False).mean()
+    )
+    return avg
+
+
 def add_RSI_indic(data, column_name="close", window_length=14):
     if column_name not in data.columns:
         return
-    returns = data[column_name] - data[column_name].shift()
-    gains = returns * (returns >= 0).astype(int)
-    losses = returns * (returns <= 0).astype(int)
-    avg_gains = [0] * window_length + [gains[1 : window_length + 1].mean()]
-    avg_losses = [0] * window_length + [losses[1 : window_length + 1].mean()]
-    for i in range(len(avg_gains), len(gains)):
-        avg_gains.append((avg_gains[i - 1] * 13 + gains[i]) / 14)
-        avg_losses.append((avg_losses[i - 1] * 13 + losses[i]) / 14)
-    RSI = 100 - (100 / (1 + pd.DataFrame(avg_gains) / -pd.DataFrame(avg_losses)))
-    # RSI.index = data.index
+    returns = np.diff(data[column_name].to_numpy(dtype=float), prepend=np.nan)
+    gains = np.where(returns > 0, returns, 0.0)
+    losses = np.where(returns < 0, -returns, 0.0)
+    avg_gains = _wilder_average(gains, window_length)
+    avg_losses = _wilder_average(losses, window_length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        RSI = 100 - (100 / (1 + avg_gains / avg_losses))
     # data[column_name + " RSI"] = RSI
-    return RSI
+    return pd.DataFrame(RSI)
 
 
 def add_ATR_indic(data, column_name="close", window_length=14):
-    a = data["high"] - data["low"]
-    b = abs(data["high"] - data[column_name])
-    c = abs(data["low"] - data[column_name])
-    TR = pd.DataFrame({"a": a, "b": b, "c": c}).max(axis=1)
-    data["ATR " + column_name] = TR.rolling(window_length).mean()
+    high = data["high"].to_numpy()
+    low = data["low"].to_numpy()
+    price = data[column_name].to_numpy()
+    TR = np.maximum.reduce([high - low, np.abs(high - price), np.abs(low - price)])
+    data["ATR " + column_name] = (
+        pd.Series(TR, index=data.index).rolling(window_length).mean()
+    )
 
 
 def create_indicators(data):
@@ -85,3 +107,126 @@ def create_indicators(data):
         res.append(df)
 
     return pd.concat(res)
+
+
+# Incremental indicators, updated in O(1) per new value
+
+
+class RollingMean:
+    """
+    Mean of the last ``window`` values, updated in O(1) per value.
+
+    The running sum is kept with Neumaier compensation and recomputed exactly
+    once every ``window`` updates so floating point drift stays bounded.
+
+    ``append`` keeps the window in the instance; callers that already hold it,
+    e.g. as a ``MarketDataStore`` view, ``seed`` and ``slide`` the mean instead.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.compensation = 0.0
+        self.updates = 0
+
+    def __len__(self):
+        return self.count
+
+    def full(self) -> bool:
+        return self.count == self.window
+
+    def _add(self, value: float):
+        total = self.total + value
+        if abs(self.total) >= abs(value):
+            self.compensation += (self.total - total) + value
+        else:
+            self.compensation += (value - total) + self.total
+        self.total = total
+
+    def append(self, value: float):
+        evicted = self.values[0] if self.full() else None
+        self.values.append(value)
+        self.slide(value, evicted, self.values)
+
+    def extend(self, values: Iterable[float]):
+        for value in values:
+            self.append(value)
+
+    def seed(self, values: Sequence[float]):
+        """Restarts the mean over ``values``, the last ``window`` of them."""
+        values = values[len(values) - min(len(values), self.window) :]
+        self.total = math.fsum(values)
+        self.compensation = 0.0
+        self.count = len(values)
+        self.updates = 0
+
+    def slide(self, value: float, evicted: Optional[float], window: Iterable[float]):
+        """
+        Moves the mean over a window held by the caller: ``value`` enters it,
+        ``evicted`` leaves it (None while filling up) and ``window`` holds the
+        values now in it, for the periodic exact re-sum.
+        """
+        if evicted is not None:
+            self._add(-evicted)
+        else:
+            self.count += 1
+        self._add(value)
+        self.updates += 1
+        if self.updates >= self.window:
+            self.total = math.fsum(window)
+            self.compensation = 0.0
+            self.updates = 0
+
+    def mean(self) -> float:
+        return (self.total + self.compensation) / self.count
+
+
+class WilderRSI:
+    """
+    Relative Strength Index with Wilder smoothing, updated in O(1) per close.
+
+    Gives the same values as ``add_RSI_indic`` over the same closes: the
+    average gain/loss is seeded with the plain mean of the first ``window``
+    changes, then smoothed as ``(avg * (window - 1) + change) / window``.
+    """
+
+    def __init__(self, window: int = 14):
+        self.window = window
+        self.prev = None
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def ready(self) -> bool:
+        return self.changes >= self.window
+
+    def append(self, close: float):
+        if self.prev is None:
+            self.prev = close
+            return
+        change = close - self.prev
+        self.prev = close
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.changes += 1
+        if self.changes < self.window:
+            # seeding: accumulate sums until the first window is complete
+            self.avg_gain += gain
+            self.avg_loss += loss
+        elif self.changes == self.window:
+            self.avg_gain = (self.avg_gain + gain) / self.window
+            self.avg_loss = (self.avg_loss + loss) / self.window
+        else:
+            self.avg_gain = (self.avg_gain * (self.window - 1) + gain) / self.window
+            self.avg_loss = (self.avg_loss * (self.window - 1) + loss) / self.window
+
+    def extend(self, closes: Iterable[float]):
+        for close in closes:
+            self.append(close)
+
+    def value(self) -> float:
+        if self.avg_loss == 0:
+            return 100.0 if self.avg_gain > 0 else math.nan
+        return 100 - 100 / (1 + self.avg_gain / self.avg_loss)
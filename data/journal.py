@@ -0,0 +1,239 @@
+"""
+Binary append-only journal of market data and signals.
+
+Every event is stored as one fixed-width little-endian record::
+
+    kind (u8) | venue (u8) | symbol (16 bytes) | timestamp ns (i64) | 6 x f64
+
+so a journal is a flat array of records that can be appended to cheaply and
+scanned or memory-mapped without parsing. Symbols are stored as UTF-8 and may
+not exceed 16 bytes. Decode a journal back to text with::
+
+    python -m data.journal logs/data.journal
+"""
+
+# standard
+import argparse
+import logging
+import math
+import os
+import struct
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Iterator, Union
+
+# local
+from engine.interface import TIMEFRAMES, Bar, Exposure, Quote, Signal, Trade, Venue
+
+SYMBOL_SIZE = 16
+RECORD = struct.Struct(f"<BB{SYMBOL_SIZE}sq6d")
+
+QUOTE = 1
+TRADE = 2
+BAR = 3
+SIGNAL = 4
+
+# the high nibble of a bar's kind is the index of its timeframe, 0 for 1m
+TIMEFRAME_INDEX = {timeframe: i for i, timeframe in enumerate(TIMEFRAMES)}
+TIMEFRAME_NAMES = list(TIMEFRAMES)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAN = math.nan
+
+Event = Union[Quote, Trade, Bar, Signal]
+
+
+def _ns(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def _num(value) -> float:
+    return NAN if value is None else value
+
+
+def _opt(value: float):
+    return None if math.isnan(value) else value
+
+
+def encode(event: Event) -> bytes:
+    symbol = event.symbol.encode()
+    if len(symbol) > SYMBOL_SIZE:
+        # struct would silently cut it to size
+        raise ValueError(f"symbol longer than {SYMBOL_SIZE} bytes: {event.symbol}")
+    if isinstance(event, Quote):
+        return RECORD.pack(
+            QUOTE,
+            event.venue,
+            symbol,
+            _ns(event.timestamp),
+            _num(event.bid_prc),
+            _num(event.bid_qty),
+            _num(event.ask_prc),
+            _num(event.ask_qty),
+            NAN,
+            NAN,
+        )
+    if isinstance(event, Trade):
+        return RECORD.pack(
+            TRADE,
+            event.venue,
+            symbol,
+            _ns(event.timestamp),
+            _num(event.price),
+            _num(event.volume),
+            _num(event.id),
+            NAN,
+            NAN,
+            NAN,
+        )
+    if isinstance(event, Bar):
+        return RECORD.pack(
+            BAR | TIMEFRAME_INDEX[event.timeframe] << 4,
+            event.venue,
+            symbol,
+            _ns(event.timestamp),
+            event.open,
+            event.high,
+            event.low,
+            event.close,
+            event.volume,
+            _num(event.vwap),
+        )
+    if isinstance(event, Signal):
+        # signals carry no timestamp, journal the time they were emitted
+        return RECORD.pack(
+            SIGNAL,
+            event.venue,
+            symbol,
+            time.time_ns(),
+            event.qty,
+            event.prc,
+            1.0 if event.exposure == Exposure.LONG else -1.0,
+            NAN,
+            NAN,
+            NAN,
+        )
+    raise TypeError(f"cannot journal {type(event).__name__}")
+
+
+def decode(record: bytes) -> Event:
+    kind, venue, symbol, ns, a, b, c, d, e, f = RECORD.unpack(record)
+    venue = Venue(venue)
+    symbol = symbol.rstrip(b"\0").decode()
+    timestamp = EPOCH + timedelta(microseconds=ns // 1000)
+    if kind == QUOTE:
+        event = Quote(venue, symbol, timestamp)
+        event.bid_prc, event.bid_qty = _opt(a), _opt(b)
+        event.ask_prc, event.ask_qty = _opt(c), _opt(d)
+    elif kind == TRADE:
+        event = Trade(venue, symbol, timestamp)
+        event.price, event.volume = _opt(a), _opt(b)
+        event.id = None if math.isnan(c) else int(c)
+    elif kind & 0x0F == BAR:
+        event = Bar(venue, symbol, a, b, c, d, e, timestamp)
+        event.vwap = _opt(f)
+        event.timeframe = TIMEFRAME_NAMES[kind >> 4]
+    elif kind == SIGNAL:
+        exposure = Exposure.LONG if c > 0 else Exposure.SHORT
+        event = Signal(venue, symbol, exposure, a, b)
+    else:
+        raise ValueError(f"unknown journal record kind: {kind}")
+    return event
+
+
+class TickJournal:
+    """
+    Appends records to ``filename`` through a write buffer of ``buffer_size``
+    bytes and fsyncs at most every ``fsync_interval`` seconds, plus on close.
+    """
+
+    def __init__(
+        self, filename: str, buffer_size: int = 1 << 20, fsync_interval: float = 1.0
+    ):
+        self.file: BinaryIO = open(filename, "ab", buffering=buffer_size)
+        self.fsyncInterval = fsync_interval
+        self.lastSync = time.monotonic()
+
+    def write(self, event: Event):
+        self.file.write(encode(event))
+        now = time.monotonic()
+        if now - self.lastSync >= self.fsyncInterval:
+            self.sync()
+            self.lastSync = now
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def read_journal(filename: str) -> Iterator[Event]:
+    with open(filename, "rb") as file:
+        while True:
+            record = file.read(RECORD.size)
+            if len(record) < RECORD.size:
+                # end of file, or a record torn by a crash mid-write
+                return
+            yield decode(record)
+
+
+class JournalHandler(logging.Handler):
+    """
+    Logging handler writing the market data objects logged to it, e.g.
+    ``logging.getLogger("data").info(quote)``, to a ``TickJournal`` instead of
+    formatting them as text. Records whose message is anything else are
+    dropped.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        buffer_size: int = 1 << 20,
+        fsync_interval: float = 1.0,
+        level=logging.NOTSET,
+    ):
+        super().__init__(level)
+        self.journal = TickJournal(filename, buffer_size, fsync_interval)
+
+    def emit(self, record: logging.LogRecord):
+        if isinstance(record.msg, (Quote, Trade, Bar, Signal)):
+            try:
+                self.journal.write(record.msg)
+            except Exception:
+                self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self.journal.file.closed:
+                self.journal.file.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.acquire()
+        try:
+            self.journal.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="Journal reader")
+    parser.add_argument("journal", help="filepath to a binary data journal")
+    args = parser.parse_args()
+    try:
+        for event in read_journal(args.journal):
+            print(event)
+    except BrokenPipeError:
+        sys.stderr.close()
+
+
+if __name__ == "__main__":
+    main()
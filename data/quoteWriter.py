@@ -0,0 +1,152 @@
+# standard
+import logging
+import queue
+import sqlite3
+import time
+from queue import SimpleQueue
+from threading import Event, Thread
+from typing import List, Optional
+
+# local
+from data.cryptoDatabase import DATABASE_PATH
+from engine.interface import Quote
+
+
+class QuoteWriter(Thread):
+    """
+    Persists quotes to the ``quotes`` table off the market data hot path.
+
+    Quotes are handed over through a queue and written by a dedicated thread in
+    batches of up to ``batch_size`` rows, or whatever has accumulated after
+    ``flush_interval`` seconds, with a single ``executemany`` per flush on a
+    connection that lives as long as the writer.
+    """
+
+    INSERT = """
+        INSERT INTO quotes (
+            timestamp, symbol, bid_price, bid_qty, ask_price, ask_qty
+        ) VALUES (?, ?, ?, ?, ?, ?)
+    """
+
+    def __init__(
+        self,
+        log: logging.Logger,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        path: str = DATABASE_PATH,
+    ):
+        super().__init__(name="quote_writer")
+        self.log = log
+        self.databaseLog = logging.getLogger("database")
+        self.batchSize = batch_size
+        self.flushInterval = flush_interval
+        self.path = path
+        self.buffer = SimpleQueue()
+        self.stopEvent = Event()
+        self.conn: Optional[sqlite3.Connection] = None
+        # metrics
+        self.flushes = 0
+        self.written = 0
+        self.lastFlushLatency = 0.0
+        self.maxFlushLatency = 0.0
+        self.totalFlushLatency = 0.0
+
+    def submit(self, quote: Quote):
+        self.buffer.put(quote)
+
+    def backlog(self) -> int:
+        return self.buffer.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "backlog": self.backlog(),
+            "flushes": self.flushes,
+            "written": self.written,
+            "last_flush_ms": self.lastFlushLatency * 1e3,
+            "max_flush_ms": self.maxFlushLatency * 1e3,
+            "avg_flush_ms": (
+                self.totalFlushLatency / self.flushes * 1e3 if self.flushes else 0.0
+            ),
+        }
+
+    def run(self):
+        self.log.info(f"{self.name} started")
+        self.conn = sqlite3.connect(self.path)
+        self.initialize()
+        while not self.stopEvent.is_set() or self.backlog():
+            batch = self.collect()
+            if batch:
+                self.flush(batch)
+        self.conn.close()
+        self.conn = None
+        self.log.info(f"{self.name} stopped: {self.stats()}")
+
+    def stop(self):
+        self.stopEvent.set()
+
+    def initialize(self):
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS quotes (
+                timestamp DATETIME,
+                symbol TEXT,
+                bid_price REAL,
+                bid_qty REAL,
+                ask_price REAL,
+                ask_qty REAL
+            )
+        """
+        )
+        self.conn.commit()
+
+    def collect(self) -> List[Quote]:
+        """
+        Blocks for the first quote, then keeps draining the queue until either
+        the batch is full or the flush interval has elapsed.
+        """
+        try:
+            batch = [self.buffer.get(timeout=self.flushInterval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flushInterval
+        while len(batch) < self.batchSize:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.buffer.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self, batch: List[Quote]):
+        start = time.perf_counter()
+        try:
+            self.conn.executemany(
+                self.INSERT,
+                [
+                    (
+                        str(quote.timestamp),
+                        quote.symbol,
+                        quote.bid_prc,
+                        quote.bid_qty,
+                        quote.ask_prc,
+                        quote.ask_qty,
+                    )
+                    for quote in batch
+                ],
+            )
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.databaseLog.error(f"failed to write {len(batch)} quotes: {e}")
+            return
+        latency = time.perf_counter() - start
+        self.flushes += 1
+        self.written += len(batch)
+        self.lastFlushLatency = latency
+        self.maxFlushLatency = max(self.maxFlushLatency, latency)
+        self.totalFlushLatency += latency
+        self.databaseLog.debug(
+            f"wrote {len(batch)} quotes in {latency * 1e3:.3f}ms "
+            f"(backlog={self.backlog()})"
+        )
@@ -0,0 +1,318 @@
+"""
+Append-only store of quotes and trades.
+
+Ticks are kept in one segment file per kind, symbol and UTC day::
+
+    <root>/<kind>/<symbol>/<YYYY-MM-DD>.ticks
+
+a flat array of fixed-width little-endian records (``QUOTE_DTYPE`` or
+``TRADE_DTYPE``) in arrival order, next to a sparse ``.idx`` file holding the
+``(timestamp, record number)`` of every ``index_interval``-th record. Range
+reads search the index, then memory-map only the part of the segment they need.
+"""
+
+# standard
+import logging
+import os
+import queue
+import time
+from datetime import datetime, timedelta, timezone
+from queue import SimpleQueue
+from threading import Event, Thread
+from typing import BinaryIO, Dict, List, Tuple, Union
+
+import numpy as np
+
+# local
+from engine.interface import Quote, Trade
+
+TICKS_PATH = "./data/ticks"
+
+QUOTE_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("bid_price", "<f8"),
+        ("bid_qty", "<f8"),
+        ("ask_price", "<f8"),
+        ("ask_qty", "<f8"),
+    ]
+)
+TRADE_DTYPE = np.dtype(
+    [("timestamp", "<i8"), ("price", "<f8"), ("volume", "<f8"), ("id", "<i8")]
+)
+INDEX_DTYPE = np.dtype([("timestamp", "<i8"), ("record", "<i8")])
+
+DTYPES = {"quotes": QUOTE_DTYPE, "trades": TRADE_DTYPE}
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAN = float("nan")
+
+Tick = Union[Quote, Trade]
+
+
+def _ns(timestamp: datetime) -> int:
+    return (timestamp - EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def _num(value) -> float:
+    return NAN if value is None else value
+
+
+def segment_path(root: str, kind: str, symbol: str, day: str) -> str:
+    return os.path.join(root, kind, symbol.replace("/", "-"), f"{day}.ticks")
+
+
+class Segment:
+    """
+    Appends records to one segment file and its sparse index. A record torn
+    by a crash mid-write is cut off when the segment is opened again.
+    """
+
+    def __init__(self, path: str, dtype: np.dtype, index_interval: int):
+        self.path = path
+        self.dtype = dtype
+        self.indexInterval = index_interval
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.file: BinaryIO = open(path, "ab")
+        size = self.file.tell()
+        if size % dtype.itemsize:
+            self.file.truncate(size - size % dtype.itemsize)
+        self.count = size // dtype.itemsize
+        self.index: BinaryIO = open(path[: -len(".ticks")] + ".idx", "ab")
+        # the index is rebuilt from the segment, it may lag it after a crash
+        self.index.truncate(0)
+        if self.count:
+            records = np.memmap(path, dtype=dtype, mode="r", shape=(self.count,))
+            self._index(records, 0)
+
+    def append(self, records: np.ndarray):
+        self.file.write(records.tobytes())
+        self._index(records, self.count)
+        self.count += len(records)
+
+    def _index(self, records: np.ndarray, first: int):
+        # record numbers of the indexed records among these
+        start = -first % self.indexInterval
+        numbers = np.arange(start, len(records), self.indexInterval)
+        entries = np.empty(len(numbers), dtype=INDEX_DTYPE)
+        entries["timestamp"] = records["timestamp"][numbers]
+        entries["record"] = numbers + first
+        self.index.write(entries.tobytes())
+
+    def flush(self):
+        # records first, so the index never points past them
+        self.file.flush()
+        self.index.flush()
+
+    def sync(self):
+        self.flush()
+        os.fsync(self.file.fileno())
+        os.fsync(self.index.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+            self.index.close()
+
+
+class TickStore(Thread):
+    """
+    Persists quotes and trades to segment files off the market data hot path.
+
+    Ticks are handed over through a queue and written by a dedicated thread in
+    batches of up to ``batch_size``, or whatever has accumulated after
+    ``flush_interval`` seconds, with one write per segment and batch. Files are
+    flushed to the OS after every batch and synced when a day's segment is
+    closed and on stop.
+    """
+
+    def __init__(
+        self,
+        log: logging.Logger,
+        root: str = TICKS_PATH,
+        batch_size: int = 4096,
+        flush_interval: float = 1.0,
+        index_interval: int = 1024,
+    ):
+        super().__init__(name="tick_store")
+        self.log = log
+        self.databaseLog = logging.getLogger("database")
+        self.root = root
+        self.batchSize = batch_size
+        self.flushInterval = flush_interval
+        self.indexInterval = index_interval
+        self.buffer = SimpleQueue()
+        self.stopEvent = Event()
+        # (kind, symbol) -> (day, open segment)
+        self.segments: Dict[Tuple[str, str], Tuple[str, Segment]] = {}
+        # metrics
+        self.flushes = 0
+        self.written = 0
+
+    def submit(self, tick: Tick):
+        self.buffer.put(tick)
+
+    def backlog(self) -> int:
+        return self.buffer.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "backlog": self.backlog(),
+            "flushes": self.flushes,
+            "written": self.written,
+        }
+
+    def run(self):
+        self.log.info(f"{self.name} started")
+        while not self.stopEvent.is_set() or self.backlog():
+            batch = self.collect()
+            if batch:
+                self.write(batch)
+        self.close()
+        self.log.info(f"{self.name} stopped: {self.stats()}")
+
+    def stop(self):
+        self.stopEvent.set()
+
+    def collect(self) -> List[Tick]:
+        """
+        Blocks for the first tick, then keeps draining the queue until either
+        the batch is full or the flush interval has elapsed.
+        """
+        try:
+            batch = [self.buffer.get(timeout=self.flushInterval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flushInterval
+        while len(batch) < self.batchSize:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.buffer.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def write(self, ticks: List[Tick]):
+        groups: Dict[Tuple[str, str, str], List[tuple]] = {}
+        try:
+            for tick in ticks:
+                if isinstance(tick, Quote):
+                    kind = "quotes"
+                    row = (
+                        _ns(tick.timestamp),
+                        _num(tick.bid_prc),
+                        _num(tick.bid_qty),
+                        _num(tick.ask_prc),
+                        _num(tick.ask_qty),
+                    )
+                else:
+                    kind = "trades"
+                    row = (
+                        _ns(tick.timestamp),
+                        _num(tick.price),
+                        _num(tick.volume),
+                        -1 if tick.id is None else tick.id,
+                    )
+                key = (kind, tick.symbol, tick.timestamp.strftime("%Y-%m-%d"))
+                groups.setdefault(key, []).append(row)
+            arrays = {
+                key: np.array(rows, dtype=DTYPES[key[0]])
+                for key, rows in groups.items()
+            }
+        except Exception as e:
+            # e.g. a naive timestamp or a field that is not a number
+            self.databaseLog.error(f"dropped {len(ticks)} ticks: {e!r}")
+            return
+        try:
+            for (kind, symbol, day), records in arrays.items():
+                self.segment(kind, symbol, day).append(records)
+            for _, segment in self.segments.values():
+                segment.flush()
+        except OSError as e:
+            self.databaseLog.error(f"failed to write {len(ticks)} ticks: {e}")
+            return
+        self.flushes += 1
+        self.written += len(ticks)
+
+    def segment(self, kind: str, symbol: str, day: str) -> Segment:
+        opened = self.segments.get((kind, symbol))
+        if opened is not None and opened[0] == day:
+            return opened[1]
+        if opened is not None:
+            # a new day started, or a late tick belongs to another one
+            opened[1].close()
+        segment = Segment(
+            segment_path(self.root, kind, symbol, day),
+            DTYPES[kind],
+            self.indexInterval,
+        )
+        self.segments[(kind, symbol)] = (day, segment)
+        return segment
+
+    def close(self):
+        for _, segment in self.segments.values():
+            segment.close()
+        self.segments.clear()
+
+
+def read_ticks(
+    kind: str,
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    root: str = TICKS_PATH,
+) -> np.ndarray:
+    """
+    The ``kind`` ("quotes" or "trades") ticks of ``symbol`` timestamped in
+    ``[start, end)``, as a structured array of ``QUOTE_DTYPE`` or
+    ``TRADE_DTYPE`` in arrival order. Ticks are expected in timestamp order
+    within a day, as the venues stream them.
+    """
+    dtype = DTYPES[kind]
+    start_ns, end_ns = _ns(start), _ns(end)
+    parts = []
+    day = start.astimezone(timezone.utc).date()
+    while day <= (end - timedelta(microseconds=1)).astimezone(timezone.utc).date():
+        path = segment_path(root, kind, symbol, day.isoformat())
+        day += timedelta(days=1)
+        if not os.path.exists(path):
+            continue
+        part = _read_segment(path, dtype, start_ns, end_ns)
+        if len(part):
+            parts.append(part)
+    if not parts:
+        return np.empty(0, dtype=dtype)
+    return np.concatenate(parts)
+
+
+def _read_segment(path: str, dtype: np.dtype, start_ns: int, end_ns: int) -> np.ndarray:
+    # a record being written may be incomplete, only whole ones are read
+    count = os.path.getsize(path) // dtype.itemsize
+    if not count:
+        return np.empty(0, dtype=dtype)
+    index = np.fromfile(path[: -len(".ticks")] + ".idx", dtype=INDEX_DTYPE)
+    index = index[index["record"] < count]
+    # records between the last indexed one before start and the first after end
+    first, last = 0, count
+    i = int(np.searchsorted(index["timestamp"], start_ns, side="left")) - 1
+    if i >= 0:
+        first = int(index["record"][i])
+    j = int(np.searchsorted(index["timestamp"], end_ns, side="left"))
+    if j < len(index):
+        last = int(index["record"][j])
+    if first >= last:
+        return np.empty(0, dtype=dtype)
+    records = np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        offset=first * dtype.itemsize,
+        shape=(last - first,),
+    )
+    timestamps = records["timestamp"]
+    lo = int(np.searchsorted(timestamps, start_ns, side="left"))
+    hi = int(np.searchsorted(timestamps, end_ns, side="left"))
+    return np.array(records[lo:hi])
@@ -0,0 +1,82 @@
+# standard
+import logging
+from datetime import datetime, timezone
+from threading import Event, Thread
+from typing import Optional
+
+
+class AccountSnapshot:
+    __slots__ = ("equity", "cash", "buying_power", "timestamp")
+
+    def __init__(
+        self, equity: float, cash: float, buying_power: float, timestamp: datetime
+    ):
+        self.equity = equity
+        self.cash = cash
+        self.buying_power = buying_power
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return (
+            f"AccountSnapshot(equity={self.equity} cash={self.cash} "
+            f"buying_power={self.buying_power} ts={self.timestamp})"
+        )
+
+
+class AccountService(Thread):
+    """
+    Keeps the trading account's equity, cash and buying power in memory.
+
+    The account is fetched from ``client`` (anything with a ``get_account()``
+    returning those fields, e.g. an alpaca ``TradingClient`` or a gateway) every
+    ``interval`` seconds and whenever ``request_refresh`` is called, on this
+    thread. Strategies read the latest ``snapshot`` without any round trip, and
+    skip what needs the account while there is none.
+    """
+
+    def __init__(self, client, log: logging.Logger, interval: float = 60.0):
+        super().__init__(name="account")
+        self.client = client
+        self.log = log
+        self.interval = interval
+        self.refreshEvent = Event()
+        self.stopEvent = Event()
+        self.latest: Optional[AccountSnapshot] = None
+
+    def snapshot(self) -> Optional[AccountSnapshot]:
+        """
+        The latest account fetched, None if none could be fetched yet. Never
+        blocks: a refresh is requested instead, made on this service's thread.
+        """
+        if self.latest is None:
+            self.request_refresh()
+        return self.latest
+
+    def refresh(self):
+        try:
+            account = self.client.get_account()
+        except Exception as e:
+            self.log.error(f"failed to refresh account: {e}")
+            return
+        self.latest = AccountSnapshot(
+            float(account.equity),
+            float(account.cash),
+            float(account.buying_power),
+            datetime.now(timezone.utc),
+        )
+        self.log.debug("account refreshed: %s", self.latest)
+
+    def request_refresh(self):
+        self.refreshEvent.set()
+
+    def run(self):
+        self.log.info(f"{self.name} started")
+        while not self.stopEvent.is_set():
+            self.refreshEvent.clear()
+            self.refresh()
+            self.refreshEvent.wait(timeout=self.interval)
+        self.log.info(f"{self.name} stopped")
+
+    def stop(self):
+        self.stopEvent.set()
+        self.refreshEvent.set()
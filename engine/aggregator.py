@@ -0,0 +1,296 @@
+# standard
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# local
+from engine.interface import BASE_TIMEFRAME, TIMEFRAMES, Bar, BarBatch, Trade
+
+BASE_SECONDS = TIMEFRAMES[BASE_TIMEFRAME]
+# columns of the history rows replayed by BarAggregator.seed
+SEED_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def bucket_start(timestamp: datetime, timeframe: str) -> datetime:
+    """Start of the ``timeframe`` interval holding ``timestamp``, UTC aligned."""
+    seconds = TIMEFRAMES[timeframe]
+    start = int(timestamp.timestamp()) // seconds * seconds
+    return datetime.fromtimestamp(start, tz=timezone.utc)
+
+
+def resample(rows: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Aggregates base bars, as loaded by ``HistoryLoader`` with a ``timestamp``
+    column and oldest first, into the complete ``timeframe`` bars they hold.
+    The first and last intervals are dropped if the rows only cover part of
+    them.
+    """
+    if timeframe == BASE_TIMEFRAME or not len(rows):
+        return rows
+    step = TIMEFRAMES[timeframe] * 1_000_000_000
+    timestamps = rows["timestamp"]
+    buckets = timestamps // step
+    firsts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    lasts = np.r_[firsts[1:], len(rows)] - 1
+    out = np.empty(len(firsts), dtype=rows.dtype)
+    for field in rows.dtype.names:
+        column = rows[field]
+        if field == "timestamp":
+            out[field] = buckets[firsts] * step
+        elif field == "open":
+            out[field] = column[firsts]
+        elif field == "high":
+            out[field] = np.maximum.reduceat(column, firsts)
+        elif field == "low":
+            out[field] = np.minimum.reduceat(column, firsts)
+        elif field in ("volume", "trade_count"):
+            out[field] = np.add.reduceat(column, firsts)
+        else:
+            out[field] = column[lasts]
+    keep = np.ones(len(out), dtype=bool)
+    if timestamps[0] > out["timestamp"][0]:
+        keep[0] = False
+    if timestamps[-1] + BASE_SECONDS * 1_000_000_000 < out["timestamp"][-1] + step:
+        keep[-1] = False
+    return out[keep]
+
+
+def load_bars(history, symbol: str, n: int, timeframe: str, columns: Sequence[str]):
+    """The last ``n`` complete ``timeframe`` bars of ``symbol`` in ``history``."""
+    if timeframe == BASE_TIMEFRAME:
+        return history.load(symbol, n, columns)
+    columns = tuple(columns)
+    loaded = columns if "timestamp" in columns else ("timestamp", *columns)
+    # one more interval, as the first and the last may be partial
+    ratio = TIMEFRAMES[timeframe] // BASE_SECONDS
+    rows = resample(history.load(symbol, (n + 2) * ratio, loaded), timeframe)
+    return rows[len(rows) - min(n, len(rows)) :][list(columns)]
+
+
+class BarAggregator:
+    """
+    Builds longer bars incrementally from the base bar stream.
+
+    Every base bar updates the bar being built for each of ``timeframes``, and
+    a bar is complete as soon as the base bar ending its interval arrives, or
+    when the first base bar of a later interval does if that one is missing.
+    With ``source="trades"`` the bars are built from trades instead, and
+    completed by ``flush`` as time passes, e.g. on every base bar.
+
+    Events arriving for an interval already completed are counted in ``late``
+    and ignored. Calls may come from several gateway threads.
+
+    After a restart, the intervals in progress are rebuilt from the base bars
+    in history with ``seed``. An interval still missing base bars, the first
+    one of a stream joined after it began or one around a gap between history
+    and the live stream, is partial: it is dropped when complete rather than
+    returned, so it never replaces the stored bar.
+    """
+
+    def __init__(self, timeframes: Iterable[str], source: str = "bars"):
+        unknown = set(timeframes) - set(TIMEFRAMES)
+        if unknown:
+            raise ValueError(f"unsupported timeframes: {sorted(unknown)}")
+        if source not in ("bars", "trades"):
+            raise ValueError(f"unsupported aggregation source: {source}")
+        self.timeframes = sorted(
+            set(timeframes) - {BASE_TIMEFRAME}, key=TIMEFRAMES.__getitem__
+        )
+        self.source = source
+        self.lock = Lock()
+        # (venue, symbol, timeframe) -> bar being built
+        self.building: Dict[Tuple[int, str, str], Bar] = {}
+        # (venue, symbol, timeframe) -> end of the last bar completed
+        self.closed: Dict[Tuple[int, str, str], datetime] = {}
+        # (venue, symbol, timeframe, start) of the bars missing base bars
+        self.partial: Set[Tuple[int, str, str, datetime]] = set()
+        # (venue, symbol) -> end of the last base bar replayed by seed
+        self.seeded: Dict[Tuple[int, str], datetime] = {}
+        self.late = 0
+        self.dropped = 0
+
+    def seed(self, venue: int, symbol: str, rows: np.ndarray):
+        """
+        Replays base bars of ``symbol`` from history, as loaded by
+        ``HistoryLoader`` with a ``timestamp`` column and oldest first, so the
+        intervals in progress hold the minutes before the live stream. The bars
+        completed meanwhile were aggregated before and are not returned; live
+        events up to the end of the last row are ignored as already counted.
+        """
+        if not len(rows):
+            return
+        timestamps = rows["timestamp"] // 1_000_000_000
+        step = timedelta(seconds=BASE_SECONDS)
+        for row, seconds in zip(rows.tolist(), timestamps.tolist()):
+            values = dict(zip(rows.dtype.names, row))
+            timestamp = datetime.fromtimestamp(seconds, tz=timezone.utc)
+            self._update(
+                venue,
+                symbol,
+                timestamp,
+                timestamp + step,
+                values["open"],
+                values["high"],
+                values["low"],
+                values["close"],
+                values["volume"],
+            )
+        last = datetime.fromtimestamp(int(timestamps[-1]), tz=timezone.utc)
+        self.seeded[(venue, symbol)] = last + step
+
+    def add_bar(self, bar: Bar) -> List[Bar]:
+        """Bars completed by ``bar``, shortest timeframes first."""
+        if self.source != "bars" or bar.timeframe != BASE_TIMEFRAME:
+            return []
+        if not self._resume(bar.venue, bar.symbol, bar.timestamp):
+            return []
+        end = bar.timestamp + timedelta(seconds=BASE_SECONDS)
+        return self._update(
+            bar.venue,
+            bar.symbol,
+            bar.timestamp,
+            end,
+            bar.open,
+            bar.high,
+            bar.low,
+            bar.close,
+            bar.volume,
+        )
+
+    def add_batch(self, batch: BarBatch) -> List[Bar]:
+        """Bars completed by the bars of ``batch``, as ``add_bar`` of each."""
+        if self.source != "bars":
+            return []
+        completed = []
+        step = timedelta(seconds=BASE_SECONDS)
+        venue = batch.venue
+        for i, (symbol, timestamp) in enumerate(zip(batch.symbols, batch.timestamps)):
+            if batch.timeframes[i] != BASE_TIMEFRAME or not self._resume(
+                venue, symbol, timestamp
+            ):
+                continue
+            completed.extend(
+                self._update(
+                    venue,
+                    symbol,
+                    timestamp,
+                    timestamp + step,
+                    batch.open[i],
+                    batch.high[i],
+                    batch.low[i],
+                    batch.close[i],
+                    batch.volume[i],
+                )
+            )
+        return completed
+
+    def add_trade(self, trade: Trade) -> List[Bar]:
+        """Bars completed by ``trade``, shortest timeframes first."""
+        if self.source != "trades" or trade.price is None:
+            return []
+        if not self._resume(trade.venue, trade.symbol, trade.timestamp):
+            return []
+        price = trade.price
+        return self._update(
+            trade.venue,
+            trade.symbol,
+            trade.timestamp,
+            trade.timestamp,
+            price,
+            price,
+            price,
+            price,
+            trade.volume or 0.0,
+        )
+
+    def flush(self, now: datetime) -> List[Bar]:
+        """Completes the bars whose interval ended by ``now``."""
+        completed = []
+        with self.lock:
+            for key, bar in list(self.building.items()):
+                if bar.timestamp + timedelta(seconds=TIMEFRAMES[key[2]]) <= now:
+                    completed.append(self._complete(key))
+        completed = [b for b in completed if b is not None]
+        completed.sort(key=lambda b: (TIMEFRAMES[b.timeframe], b.timestamp))
+        return completed
+
+    def _resume(self, venue: int, symbol: str, timestamp: datetime) -> bool:
+        """
+        False if a live event at ``timestamp`` was already replayed by ``seed``.
+        The first one after the replay marks the intervals around the base bars
+        missing in between partial, if any.
+        """
+        seeded = self.seeded.get((venue, symbol))
+        if seeded is None:
+            return True
+        if timestamp < seeded:
+            return False
+        with self.lock:
+            if self.seeded.pop((venue, symbol), None) is None:
+                return True
+            if bucket_start(timestamp, BASE_TIMEFRAME) > seeded:
+                for timeframe in self.timeframes:
+                    key = (venue, symbol, timeframe)
+                    bar = self.building.get(key)
+                    if bar is not None:
+                        self.partial.add((*key, bar.timestamp))
+                    start = bucket_start(timestamp, timeframe)
+                    if timestamp > start:
+                        self.partial.add((*key, start))
+        return True
+
+    def _update(
+        self,
+        venue: int,
+        symbol: str,
+        timestamp: datetime,
+        end: datetime,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+    ) -> List[Bar]:
+        completed = []
+        with self.lock:
+            for timeframe in self.timeframes:
+                start = bucket_start(timestamp, timeframe)
+                key = (venue, symbol, timeframe)
+                bar = self.building.get(key)
+                if bar is not None and bar.timestamp < start:
+                    # the end of the interval was missed, close it now
+                    completed.append(self._complete(key))
+                    bar = None
+                if bar is None:
+                    if start < self.closed.get(key, start):
+                        self.late += 1
+                        continue
+                    if key not in self.closed and timestamp > start:
+                        # the first interval, joined after it began
+                        self.partial.add((*key, start))
+                    bar = Bar(venue, symbol, open, high, low, close, volume, start)
+                    bar.timeframe = timeframe
+                    self.building[key] = bar
+                elif bar.timestamp > start:
+                    self.late += 1
+                    continue
+                else:
+                    bar.high = max(bar.high, high)
+                    bar.low = min(bar.low, low)
+                    bar.close = close
+                    bar.volume += volume
+                if end >= start + timedelta(seconds=TIMEFRAMES[timeframe]):
+                    completed.append(self._complete(key))
+        return [b for b in completed if b is not None]
+
+    def _complete(self, key: Tuple[int, str, str]) -> Optional[Bar]:
+        """The bar built for ``key``, None if it was partial."""
+        bar = self.building.pop(key)
+        self.closed[key] = bar.timestamp + timedelta(seconds=TIMEFRAMES[key[2]])
+        if (*key, bar.timestamp) in self.partial:
+            self.partial.discard((*key, bar.timestamp))
+            self.dropped += 1
+            return None
+        return bar
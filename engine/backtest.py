@@ -0,0 +1,202 @@
+# standard
+import logging
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, timezone
+from threading import Event
+from typing import DefaultDict, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# local
+from data.cryptoDatabase import DATABASE_PATH
+from data.history import HistoryLoader
+from engine.account import AccountSnapshot
+from engine.aggregator import BarAggregator
+from engine.engine import strategyFactory
+from engine.marketData import MarketDataStore
+from engine.interface import (
+    Bar,
+    Exposure,
+    Signal,
+    StrategyTypeMap,
+    Venue,
+    VenueMap,
+)
+from strategies.strategy import Strategy
+
+
+class SimulatedAccount:
+    """
+    Stands in for ``AccountService`` during a backtest: signals are filled
+    immediately at their price, moved against the strategy by
+    ``slippage_bps`` and charged ``fee_bps`` of the notional.
+    """
+
+    def __init__(self, cash: float, fee_bps: float = 0.0, slippage_bps: float = 0.0):
+        self.initialCash = cash
+        self.cash = cash
+        self.feeRate = fee_bps / 1e4
+        self.slippage = slippage_bps / 1e4
+        self.positions: DefaultDict[str, float] = defaultdict(float)
+        self.prices: Dict[str, float] = {}
+        self.fills = 0
+        self.fees = 0.0
+        self.timestamp: Optional[datetime] = None
+
+    def equity(self) -> float:
+        return self.cash + sum(
+            qty * self.prices.get(symbol, 0.0) for symbol, qty in self.positions.items()
+        )
+
+    def snapshot(self) -> AccountSnapshot:
+        return AccountSnapshot(self.equity(), self.cash, self.cash, self.timestamp)
+
+    def request_refresh(self):
+        pass  # always up to date
+
+    def mark(self, bar: Bar):
+        self.prices[bar.symbol] = bar.close
+        self.timestamp = bar.timestamp
+
+    def fill(self, signal: Signal):
+        if signal.exposure == Exposure.LONG:
+            price = signal.prc * (1 + self.slippage)
+            qty = signal.qty
+        else:
+            price = signal.prc * (1 - self.slippage)
+            qty = -signal.qty
+        fee = abs(qty) * price * self.feeRate
+        self.cash -= qty * price + fee
+        self.positions[signal.symbol] += qty
+        self.fees += fee
+        self.fills += 1
+
+
+class Backtester:
+    """
+    Replays stored bars through the live ``Strategy`` classes.
+
+    Strategies are built from the same configuration as the engine but never
+    started: each bar is handed straight to ``process_bar`` on the calling
+    thread, and the signals they emit are filled by a ``SimulatedAccount``, so
+    a replay runs as fast as the strategies can process bars. Strategies warm up
+    on the history before ``start`` only.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        log: logging.Logger,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        cash: float = 100000.0,
+        fee_bps: float = 0.0,
+        slippage_bps: float = 0.0,
+        path: str = DATABASE_PATH,
+        history: HistoryLoader = None,
+    ):
+        self.log = log
+        self.start = start
+        self.end = end
+        self.path = path
+        self.account = SimulatedAccount(cash, fee_bps, slippage_bps)
+        if history is None:
+            history = HistoryLoader(path, until=str(start) if start else None)
+        self.marketData = MarketDataStore(history)
+        # strategies by (symbol, timeframe)
+        self.routing: DefaultDict[Tuple[str, str], List[Strategy]] = defaultdict(list)
+        self.venues: Dict[str, Venue] = {}
+        self.strategies: List[Strategy] = []
+        self.bars = 0
+        self.peak = cash
+        self.maxDrawdown = 0.0
+
+        for strategyCfg in config["strategies"]:
+            st = StrategyTypeMap[strategyCfg["type"]]
+            strategy = strategyFactory[st](
+                strategyCfg,
+                self.handle_signals,
+                log,
+                Event(),
+                history,
+                self.account,
+                self.marketData,
+            )
+            for symbol in strategyCfg["symbols"]:
+                self.routing[(symbol, strategy.timeframe)].append(strategy)
+                # 0 to get the first venue
+                self.venues[symbol] = VenueMap[strategyCfg["venues"][0]]
+            self.strategies.append(strategy)
+        # longer timeframes are built from the stored bars, as live
+        self.aggregator = BarAggregator({s.timeframe for s in self.strategies})
+
+    def handle_signals(self, signals: List[Signal]):
+        for signal in signals:
+            self.account.fill(signal)
+
+    def load_bars(self, batch: int = 10000) -> Iterator[Bar]:
+        """
+        Streams the bars of every routed symbol between ``start`` and ``end``
+        in timestamp order.
+        """
+        symbols = list(self.venues)
+        where = [f"symbol IN ({', '.join('?' for _ in symbols)})"]
+        params: list = list(symbols)
+        if self.start is not None:
+            where.append("timestamp >= ?")
+            params.append(str(self.start))
+        if self.end is not None:
+            where.append("timestamp < ?")
+            params.append(str(self.end))
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(
+                f"""
+                SELECT symbol, timestamp, open, high, low, close, volume,
+                    trade_count, vwap
+                FROM bars
+                WHERE {" AND ".join(where)}
+                ORDER BY timestamp, symbol
+            """,
+                params,
+            )
+            while True:
+                rows = cursor.fetchmany(batch)
+                if not rows:
+                    break
+                for symbol, ts, o, h, lo, c, v, count, vwap in rows:
+                    timestamp = datetime.fromisoformat(ts)
+                    if timestamp.tzinfo is None:
+                        timestamp = timestamp.replace(tzinfo=timezone.utc)
+                    bar = Bar(self.venues[symbol], symbol, o, h, lo, c, v, timestamp)
+                    bar.trade_count = count
+                    bar.vwap = vwap
+                    yield bar
+        finally:
+            conn.close()
+
+    def run(self, bars: Optional[Iterable[Bar]] = None) -> dict:
+        for bar in self.load_bars() if bars is None else bars:
+            self.account.mark(bar)
+            for b in [bar, *self.aggregator.add_bar(bar)]:
+                self.marketData.append(b)
+                for strategy in self.routing[(b.symbol, b.timeframe)]:
+                    strategy.process_bar(b)
+            self.bars += 1
+            equity = self.account.equity()
+            self.peak = max(self.peak, equity)
+            self.maxDrawdown = max(self.maxDrawdown, (self.peak - equity) / self.peak)
+        return self.report()
+
+    def report(self) -> dict:
+        equity = self.account.equity()
+        return {
+            "bars": self.bars,
+            "fills": self.account.fills,
+            "fees": self.account.fees,
+            "cash": self.account.cash,
+            "equity": equity,
+            "pnl": equity - self.account.initialCash,
+            "return_pct": (equity / self.account.initialCash - 1) * 100,
+            "max_drawdown_pct": self.maxDrawdown * 100,
+            "positions": {s: q for s, q in self.account.positions.items() if q},
+        }
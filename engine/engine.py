@@ -1,18 +1,23 @@
 # standard
 import logging
-import queue
 
-import pandas as pd
 from multiprocessing.context import Process
-from queue import SimpleQueue
 from collections import defaultdict
-from multiprocessing import Pipe
+from datetime import timedelta
 from threading import Event, Thread
-from typing import Dict, Callable, DefaultDict, List
-
-from alpaca.trading import MarketOrderRequest, TimeInForce, OrderType
+from typing import Dict, Callable, DefaultDict, List, Tuple, Union
 
 # local
+from data.history import HistoryLoader
+from data.quoteWriter import QuoteWriter
+from data.tickStore import TICKS_PATH, TickStore
+from engine import latency
+from engine.account import AccountService
+from engine.aggregator import BASE_SECONDS, SEED_COLUMNS, BarAggregator
+from engine.marketData import MarketDataStore
+from engine.orderRouter import OrderRouter, OrderTicket
+from engine.sharedRing import OverwriteRing
+from engine.worker import StrategyProcess
 from engine.interface import (
     Trade,
     Quote,
@@ -21,31 +26,40 @@ from engine.interface import (
     StrategyType,
     StrategyTypeMap,
     VenueMap,
-    ExposureToSideMap,
     Bar,
+    BarBatch,
+    BASE_TIMEFRAME,
+    TIMEFRAMES,
 )
 from gateways.alpaca.alpacaGateway import AlpacaGateway
+from gateways.synthetic.syntheticGateway import SyntheticGateway
 from gui.dashboard import spawn_dashboard
 from strategies.RSI.rsi import RSIStrategy
 from strategies.SMA.sma import SMAStrategy
 from strategies.Strat1.Strat1 import Strat1Strategy
+from strategies.group import StrategyGroup
 from strategies.strategy import Strategy
 from gateways.gateway import Gateway
 
 
 gatewayFactory: Dict[int, Callable[..., Gateway]] = {
-    Venue.ALPACA: lambda cfg, qcb, tcb, bcb, log: AlpacaGateway(cfg, qcb, tcb, bcb, log)
+    Venue.ALPACA: lambda cfg, qcb, tcb, bcb, log: (
+        AlpacaGateway(cfg, qcb, tcb, bcb, log)
+    ),
+    Venue.SYNTHETIC: lambda cfg, qcb, tcb, bcb, log: (
+        SyntheticGateway(cfg, qcb, tcb, bcb, log)
+    ),
 }
 
 strategyFactory: Dict[int, Callable[..., Strategy]] = {
-    StrategyType.SMA: lambda cfg, scb, log, stopper: SMAStrategy(
-        cfg, scb, log, stopper
+    StrategyType.SMA: lambda cfg, scb, log, stopper, history, account, store: (
+        SMAStrategy(cfg, scb, log, stopper, history, account, store)
     ),
-    StrategyType.RSI: lambda cfg, scb, log, stopper: RSIStrategy(
-        cfg, scb, log, stopper
+    StrategyType.RSI: lambda cfg, scb, log, stopper, history, account, store: (
+        RSIStrategy(cfg, scb, log, stopper, history, account, store)
     ),
-    StrategyType.Strat1: lambda cfg, scb, log, stopper: Strat1Strategy(
-        cfg, scb, log, stopper
+    StrategyType.Strat1: lambda cfg, scb, log, stopper, history, account, store: (
+        Strat1Strategy(cfg, scb, log, stopper, history, account, store)
     ),
 }
 
@@ -58,13 +72,50 @@ class Engine(Thread):
         self.routing: DefaultDict[int, DefaultDict[str, List[Strategy]]] = defaultdict(
             lambda: defaultdict(list)
         )
+        # bars are routed by (symbol, timeframe)
+        self.barRouting: DefaultDict[
+            int, DefaultDict[Tuple[str, str], List[Strategy]]
+        ] = defaultdict(lambda: defaultdict(list))
         self.gateways: List[Gateway] = []
+        self.venues: Dict[int, Gateway] = {}
+        self.accounts: Dict[int, AccountService] = {}
         self.strategies: List[Strategy] = []
-        self.signalBuffer = SimpleQueue()
+        self.workers: List[StrategyProcess] = []
+        # threads running the strategies: their own, a shared group, or a proxy
+        self.runners: List[Thread] = []
         self.stopEvent = Event()
         self.dbcxn = cryptoDatabase
-        rx, self.tx = Pipe(duplex=False)
-        self.dashproc = Process(target=spawn_dashboard, args=(rx,))
+        # events published to the dashboard, which may drop the oldest ones
+        dashboardCfg = config.get("dashboard", {})
+        self.publish = set(dashboardCfg.get("publish", ["bar"]))
+        self.feed = OverwriteRing(dashboardCfg.get("feed_capacity", 65536))
+        self.dashproc = None
+        if dashboardCfg.get("enabled", True):
+            self.dashproc = Process(target=spawn_dashboard, args=(self.feed,))
+        else:
+            self.publish = set()
+        # quotes and trades are persisted to the tick store, and quotes to the
+        # quotes table as well unless disabled
+        ticksCfg = config["database"].get("ticks", {})
+        self.tickStore = TickStore(
+            log,
+            root=ticksCfg.get("path", TICKS_PATH),
+            batch_size=ticksCfg.get("batch_size", 4096),
+            flush_interval=ticksCfg.get("flush_interval", 1.0),
+            index_interval=ticksCfg.get("index_interval", 1024),
+        )
+        writerCfg = config["database"].get("quotes", {})
+        self.quoteWriter = None
+        if writerCfg.get("sqlite", True):
+            self.quoteWriter = QuoteWriter(
+                log,
+                batch_size=writerCfg.get("batch_size", 500),
+                flush_interval=writerCfg.get("flush_interval", 0.5),
+                path=cryptoDatabase.path,
+            )
+        self.writers: List[Thread] = [
+            w for w in (self.tickStore, self.quoteWriter) if w is not None
+        ]
 
         try:
             self.dbcxn.open()
@@ -85,6 +136,10 @@ class Engine(Thread):
                     log,
                 )
                 self.gateways.append(gateway)
+                self.venues[v] = gateway
+                self.accounts[v] = AccountService(
+                    gateway, log, venueCfg.get("account_refresh_interval", 60.0)
+                )
             except KeyError:
                 log.critical(f"unsupported venue: {venueCfg['api']}")
                 exit(1)
@@ -92,17 +147,62 @@ class Engine(Thread):
                 log.critical(f"failed to instantiate gateway: {venueCfg['api']}")
                 exit(1)
 
-        # setup strategies
+        # orders go out on per-venue worker threads
+        self.orderRouter = OrderRouter(
+            self.venues,
+            log,
+            workers={
+                VenueMap[venueCfg["api"]]: venueCfg.get("order_workers", 1)
+                for venueCfg in config["venues"]
+            },
+            on_ack=self.handle_ack,
+        )
+
+        # setup strategies, sharing one warm-start read per symbol and one
+        # window of the latest bars per symbol
+        self.history = HistoryLoader(cryptoDatabase.path)
+        self.marketData = MarketDataStore(self.history)
+        groups: DefaultDict[str, List[Strategy]] = defaultdict(list)
         for strategyCfg in config["strategies"]:
+            timeframe = strategyCfg.get("timeframe", BASE_TIMEFRAME)
+            if timeframe not in TIMEFRAMES:
+                log.critical(f"unsupported timeframe: {timeframe}")
+                exit(1)
             try:
                 st = StrategyTypeMap[strategyCfg["type"]]
-                strategy = strategyFactory[st](
-                    strategyCfg, self.handle_signals, log, self.stopEvent
-                )
+                if strategyCfg.get("process", False):
+                    # runs in a child process fed through shared memory
+                    strategy = StrategyProcess(
+                        strategyCfg,
+                        self.handle_signals,
+                        log,
+                        self.stopEvent,
+                        # 0 to get the first venue
+                        client=self.venues[VenueMap[strategyCfg["venues"][0]]],
+                        path=cryptoDatabase.path,
+                    )
+                    self.workers.append(strategy)
+                    self.runners.append(strategy)
+                else:
+                    strategy = strategyFactory[st](
+                        strategyCfg,
+                        self.handle_signals,
+                        log,
+                        self.stopEvent,
+                        self.history,
+                        # 0 to get the first venue
+                        self.accounts[VenueMap[strategyCfg["venues"][0]]],
+                        self.marketData,
+                    )
+                    if "thread" in strategyCfg:
+                        groups[strategyCfg["thread"]].append(strategy)
+                    else:
+                        self.runners.append(strategy)
                 for venue in strategyCfg["venues"]:
                     v = VenueMap[venue]
                     for symbol in strategyCfg["symbols"]:
                         self.routing[v][symbol].append(strategy)
+                        self.barRouting[v][(symbol, timeframe)].append(strategy)
                 self.strategies.append(strategy)
             except KeyError as e:
                 log.critical(f"unsupported venue: {e}")
@@ -110,89 +210,189 @@ class Engine(Thread):
             except Exception as e:
                 log.critical(f"failed to instantiate strategy: {e}")
                 exit(1)
+        self.runners.extend(
+            StrategyGroup(name, members, log, self.stopEvent)
+            for name, members in groups.items()
+        )
+
+        # longer bars built from the 1-minute stream, for the strategies
+        # subscribed to them and for the database, resuming the intervals in
+        # progress from history
+        aggregationCfg = config.get("aggregation", {})
+        self.aggregator = BarAggregator(
+            set(aggregationCfg.get("timeframes", []))
+            | {s.get("timeframe", BASE_TIMEFRAME) for s in config["strategies"]},
+            aggregationCfg.get("source", "bars"),
+        )
+        if self.aggregator.timeframes:
+            longest = TIMEFRAMES[self.aggregator.timeframes[-1]] // BASE_SECONDS
+            for venue in self.venues:
+                for symbol in self.dbcxn.symbols:
+                    self.aggregator.seed(
+                        venue,
+                        symbol,
+                        self.history.load(symbol, longest, SEED_COLUMNS),
+                    )
+        # the store keeps what strategies need, release the warm-start rows
+        self.history.clear()
+
+        # stage latencies, dumped every interval and on SIGUSR1 when enabled
+        latencyCfg = config.get("latency", {})
+        latency.enable(latencyCfg.get("enabled", False))
+        self.latencyPath = latencyCfg.get("path")
+        self.latencyExporter = None
+        if latency.ENABLED and self.latencyPath:
+            self.latencyExporter = latency.Exporter(
+                self.latencyPath, latencyCfg.get("interval", 60.0)
+            )
 
     def run(self):
         self.log.info("engine started")
-        self.dashproc.start()
+        if self.dashproc is not None:
+            self.dashproc.start()
+        # fork the strategy processes before any other thread runs
+        list(w.spawn() for w in self.workers)
+        if self.latencyExporter is not None:
+            self.latencyExporter.start()
+        list(w.start() for w in self.writers)
+        self.orderRouter.start()
         threads: List[Thread] = []
-        threads.extend(self.strategies)
+        threads.extend(self.accounts.values())
+        threads.extend(self.runners)
         threads.extend(self.gateways)
         list(t.start() for t in threads)
-        while not self.stopEvent.is_set():
-            try:
-                sig = self.signalBuffer.get(timeout=1)
-            except queue.Empty:
-                pass
-            else:
-                self.log.debug(f"engine processing signal: {sig}")
+        self.stopEvent.wait()
         self.log.info("engine stopping")
+        list(r.wake() for r in self.runners)
         list(g.stop() for g in self.gateways)
+        list(a.stop() for a in self.accounts.values())
         list(t.join() for t in threads)
-        self.dashproc.terminate()
-        self.dashproc.join()
+        self.orderRouter.stop()
+        self.log.info(f"orders: {self.orderRouter.summary()}")
+        if self.aggregator.late:
+            self.log.warning(f"{self.aggregator.late} late events not aggregated")
+        if self.aggregator.dropped:
+            self.log.info(f"{self.aggregator.dropped} partial bars not aggregated")
+        list(w.stop() for w in self.writers)
+        list(w.join() for w in self.writers)
+        self.dbcxn.close_live()
+        if self.dashproc is not None:
+            self.dashproc.terminate()
+            self.dashproc.join()
+        self.feed.close()
+        if self.latencyExporter is not None:
+            self.latencyExporter.stop()
+            self.latencyExporter.join()
         self.log.info("engine stopped")
 
     def handle_quotes(self, quotes: List[Quote]):
+        if latency.ENABLED:
+            latency.stamp_all(quotes, latency.ENGINE)
+        batches: DefaultDict[Strategy, List[Quote]] = defaultdict(list)
         for quote in quotes:
             self.dataLog.info(quote)
-            # TODO: add a quote message in database log
-            self.dbcxn.open()
-            quote_df = pd.DataFrame(
-                [
-                    [
-                        quote.timestamp,
-                        quote.symbol,
-                        quote.bid_prc,
-                        quote.bid_qty,
-                        quote.ask_prc,
-                        quote.ask_qty,
-                    ]
-                ],
-                columns=[
-                    "timestamp",
-                    "symbol",
-                    "bid_price",
-                    "bid_qty",
-                    "ask_price",
-                    "ask_qty",
-                ],
-            )
-            quote_df.to_sql("quotes", self.dbcxn.conn, if_exists="append", index=False)
-            self.dbcxn.conn.commit()
-            self.dbcxn.close()
-            # self.tx.send(quote)
+            self.tickStore.submit(quote)
+            if self.quoteWriter is not None:
+                self.quoteWriter.submit(quote)
             for strategy in self.routing[quote.venue][quote.symbol]:
-                strategy.handle_quotes([quote])
+                batches[strategy].append(quote)
+        if "quote" in self.publish:
+            self.feed.put_many(quotes)
+        if latency.ENABLED:
+            self.measure(quotes, "quote")
+        for strategy, batch in batches.items():
+            strategy.handle_quotes(batch)
 
     def handle_trades(self, trades: List[Trade]):
+        if latency.ENABLED:
+            latency.stamp_all(trades, latency.ENGINE)
+        batches: DefaultDict[Strategy, List[Trade]] = defaultdict(list)
+        aggregated: List[Bar] = []
         for trade in trades:
             self.dataLog.info(trade)
-            # self.tx.send(trade)
+            self.tickStore.submit(trade)
+            aggregated.extend(self.aggregator.add_trade(trade))
             for strategy in self.routing[trade.venue][trade.symbol]:
-                strategy.handle_trades([trade])
+                batches[strategy].append(trade)
+        if "trade" in self.publish:
+            self.feed.put_many(trades)
+        if latency.ENABLED:
+            self.measure(trades, "trade")
+        for strategy, batch in batches.items():
+            strategy.handle_trades(batch)
+        self.route_aggregated(aggregated)
 
-    def handle_bars(self, bars: List[Bar]):
-        for bar in bars:
-            self.dataLog.info(bar)
-            self.dbcxn.update_database()
-            self.tx.send(bar)
-            for strategy in self.routing[bar.venue][bar.symbol]:
-                strategy.handle_bars([bar])
+    def handle_bars(self, bars: Union[BarBatch, List[Bar]]):
+        if not len(bars):
+            return
+        if not isinstance(bars, BarBatch):
+            bars = BarBatch.from_bars(bars[0].venue, bars)
+        if latency.ENABLED:
+            latency.stamp_all(bars, latency.ENGINE)
+        self.dbcxn.append_bars(bars)
+        if self.aggregator.source == "trades":
+            # the 1-minute bars are the clock completing the trade-built ones
+            aggregated = self.aggregator.flush(
+                max(bars.timestamps) + timedelta(minutes=1)
+            )
+        else:
+            aggregated = self.aggregator.add_batch(bars)
+        self.route_bars(bars)
+        self.route_aggregated(aggregated)
+
+    def route_aggregated(self, bars: List[Bar]):
+        if bars:
+            self.dbcxn.append_agg_bars(bars)
+            self.route_bars(BarBatch.from_bars(bars[0].venue, bars))
+
+    def route_bars(self, bars: BarBatch):
+        """
+        Stores and routes ``bars`` column by column, each strategy gets the rows
+        it subscribed to as a batch of its own.
+        """
+        self.marketData.append_batch(bars)
+        if self.dataLog.isEnabledFor(logging.INFO):
+            for bar in bars:
+                self.dataLog.info(bar)
+        routing = self.barRouting[bars.venue]
+        rows: DefaultDict[Strategy, List[int]] = defaultdict(list)
+        for i, key in enumerate(zip(bars.symbols, bars.timeframes)):
+            for strategy in routing.get(key, ()):
+                rows[strategy].append(i)
+        if "bar" in self.publish:
+            self.feed.put_many(bars)
+        if latency.ENABLED:
+            self.measure(bars, "bar")
+        for strategy, selected in rows.items():
+            strategy.handle_bars(bars.take(selected))
+
+    def measure(self, events: Union[BarBatch, list], name: str):
+        """Records the engine's stages of ``events``, about to be queued."""
+        latency.stamp_all(events, latency.QUEUED)
+        if isinstance(events, BarBatch):
+            stamps = events.stamps
+        else:
+            stamps = [event.stamps for event in events]
+        for s in stamps:
+            latency.record(s, name)
+        latency.gauge("tick_store backlog", self.tickStore.backlog())
 
     def handle_signals(self, signals: List[Signal]):
+        if latency.ENABLED:
+            latency.stamp_all(signals, latency.ROUTED)
         for signal in signals:
             self.dataLog.info(signal)
-            # self.tx.send(signal)
-
-            market_order_data = MarketOrderRequest(
-                order_type=OrderType.MARKET,
-                symbol=signal.symbol,
-                qty=signal.qty,
-                side=ExposureToSideMap[signal.exposure],
-                time_in_force=TimeInForce.GTC,
-            )
+            self.orderRouter.submit(signal)
+        if "signal" in self.publish:
+            self.feed.put_many(signals)
+
+    def handle_ack(self, ticket: OrderTicket):
+        self.accounts[ticket.signal.venue].request_refresh()
 
-            self.gateways[0].trade(market_order_data)  # 0 is hardcoded for Alpaca
+    def dump_latency(self, signum, frame):
+        if latency.ENABLED and self.latencyPath:
+            latency.dump(self.latencyPath)
+            self.log.info(f"latency metrics written to {self.latencyPath}")
 
     def sig_handler(self, signum, frame):
         self.log.info(f"Received signal: {signum}. Initiating shutdown.")
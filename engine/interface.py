@@ -1,18 +1,21 @@
 # standard
+from array import array
 from enum import Enum
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterable, Iterator, List
 
 from alpaca.trading import OrderSide
 
 
 class Venue(int, Enum):
     ALPACA = 1
+    SYNTHETIC = 2  # generated locally, for load tests
     # Add other venues as needed
 
 
 VenueMap: Dict[str, Venue] = {
     "alpaca": Venue.ALPACA,
+    "synthetic": Venue.SYNTHETIC,
     # Add other venues as needed
 }
 
@@ -32,6 +35,18 @@ StrategyTypeMap: Dict[str, StrategyType] = {
 }
 
 
+# bar timeframes, in seconds: the gateways stream the first one and the engine
+# aggregates the others from it
+TIMEFRAMES: Dict[str, int] = {
+    "1m": 60,
+    "5m": 5 * 60,
+    "15m": 15 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+BASE_TIMEFRAME = "1m"
+
+
 class Exposure(str, Enum):
     LONG = "LONG"
     SHORT = "SHORT"
@@ -44,6 +59,17 @@ ExposureToSideMap: Dict[Exposure, OrderSide] = {
 
 
 class Quote:
+    __slots__ = (
+        "venue",
+        "symbol",
+        "bid_prc",
+        "ask_prc",
+        "bid_qty",
+        "ask_qty",
+        "timestamp",
+        "stamps",
+    )
+
     def __init__(self, venue: Venue, symbol: str, timestamp: datetime):
         self.venue = venue
         self.symbol = symbol
@@ -52,26 +78,20 @@ class Quote:
         self.bid_qty: Optional[float] = None
         self.ask_qty: Optional[float] = None
         self.timestamp = timestamp
+        # (stage, perf_counter_ns) pairs, when latency is measured
+        self.stamps: Optional[List[tuple]] = None
 
     def __repr__(self):
-        return """Quote (
-            venue={venue},
-            symbol={symbol},
-            bid={bid_qty}@{bid_prc},
-            ask={ask_qty}@{ask_prc},
-            ts={timestamp}
-        )""".format(
-            venue=self.venue,
-            symbol=self.symbol,
-            bid_qty=self.bid_qty,
-            bid_prc=self.bid_prc,
-            ask_qty=self.ask_qty,
-            ask_prc=self.ask_prc,
-            timestamp=self.timestamp,
+        return (
+            f"Quote({self.venue.name} {self.symbol} "
+            f"bid={self.bid_qty}@{self.bid_prc} ask={self.ask_qty}@{self.ask_prc} "
+            f"ts={self.timestamp})"
         )
 
 
 class Trade:
+    __slots__ = ("venue", "symbol", "price", "volume", "id", "timestamp", "stamps")
+
     def __init__(self, venue: Venue, symbol: str, timestamp: datetime):
         self.venue = venue
         self.symbol = symbol
@@ -79,24 +99,34 @@ class Trade:
         self.volume: Optional[float] = None
         self.id: Optional[int] = None
         self.timestamp = timestamp
+        # (stage, perf_counter_ns) pairs, when latency is measured
+        self.stamps: Optional[List[tuple]] = None
 
     def __repr__(self):
-        return """Trade (
-            venue={venue},
-            symbol={symbol},
-            price={price},
-            volume={volume},
-            ts={timestamp}
-        )""".format(
-            venue=self.venue,
-            symbol=self.symbol,
-            price=self.price,
-            volume=self.volume,
-            timestamp=self.timestamp,
+        return (
+            f"Trade({self.venue.name} {self.symbol} "
+            f"{self.volume}@{self.price} ts={self.timestamp})"
         )
 
 
 class Bar:
+    __slots__ = (
+        "venue",
+        "symbol",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "trade_count",
+        "vwap",
+        "exchange",
+        "timestamp",
+        "timeframe",
+        "seq",
+        "stamps",
+    )
+
     def __init__(
         self,
         venue: Venue,
@@ -119,30 +149,157 @@ class Bar:
         self.vwap: Optional[float] = None
         self.exchange: Optional[float] = None
         self.timestamp = timestamp
+        # timestamp is the start of the interval this bar covers
+        self.timeframe = BASE_TIMEFRAME
+        # position in the MarketDataStore stream of the symbol, once stored
+        self.seq: Optional[int] = None
+        # (stage, perf_counter_ns) pairs, when latency is measured
+        self.stamps: Optional[List[tuple]] = None
 
     def __repr__(self):
-        return """Bar (
-            venue={venue},
-            symbol={symbol},
-            open={open},
-            high={high},
-            low={low},
-            close={close},
-            volume={volume},
-            ts={timestamp}
-        )""".format(
-            venue=self.venue,
-            symbol=self.symbol,
-            open=self.open,
-            high=self.high,
-            low=self.low,
-            close=self.close,
-            volume=self.volume,
-            timestamp=self.timestamp,
+        timeframe = "" if self.timeframe == BASE_TIMEFRAME else f" {self.timeframe}"
+        return (
+            f"Bar({self.venue.name} {self.symbol}{timeframe} o={self.open} "
+            f"h={self.high} l={self.low} c={self.close} v={self.volume} "
+            f"ts={self.timestamp})"
+        )
+
+
+class BarBatch:
+    """
+    Bars of one venue in columnar form, so a gateway can hand a whole batch to
+    the engine in one call and the engine can store and route it without a
+    ``Bar`` per row. Prices and volumes are kept in packed double arrays, the
+    other fields of ``Bar`` in one list each. Iterating or indexing yields
+    ``Bar`` objects carrying every field, so a batch can be passed wherever a
+    ``List[Bar]`` is expected.
+    """
+
+    __slots__ = (
+        "venue",
+        "symbols",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "trade_counts",
+        "vwaps",
+        "exchanges",
+        "timestamps",
+        "timeframes",
+        "seqs",
+        "stamps",
+    )
+
+    def __init__(self, venue: Venue):
+        self.venue = venue
+        self.symbols: List[str] = []
+        self.open = array("d")
+        self.high = array("d")
+        self.low = array("d")
+        self.close = array("d")
+        self.volume = array("d")
+        self.trade_counts: List[Optional[float]] = []
+        self.vwaps: List[Optional[float]] = []
+        self.exchanges: List[Optional[float]] = []
+        self.timestamps: List[datetime] = []
+        self.timeframes: List[str] = []
+        self.seqs: List[Optional[int]] = []
+        self.stamps: List[Optional[List[tuple]]] = []
+
+    @classmethod
+    def from_bars(cls, venue: Venue, bars: Iterable[Bar]) -> "BarBatch":
+        batch = cls(venue)
+        for bar in bars:
+            batch.append_bar(bar)
+        return batch
+
+    def append(
+        self,
+        symbol: str,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        timestamp: datetime,
+        trade_count: Optional[float] = None,
+        vwap: Optional[float] = None,
+        timeframe: str = BASE_TIMEFRAME,
+    ):
+        self.symbols.append(symbol)
+        self.open.append(open)
+        self.high.append(high)
+        self.low.append(low)
+        self.close.append(close)
+        self.volume.append(volume)
+        self.trade_counts.append(trade_count)
+        self.vwaps.append(vwap)
+        self.exchanges.append(None)
+        self.timestamps.append(timestamp)
+        self.timeframes.append(timeframe)
+        self.seqs.append(None)
+        self.stamps.append(None)
+
+    def append_bar(self, bar: Bar):
+        self.append(
+            bar.symbol,
+            bar.open,
+            bar.high,
+            bar.low,
+            bar.close,
+            bar.volume,
+            bar.timestamp,
+            bar.trade_count,
+            bar.vwap,
+            bar.timeframe,
         )
+        self.exchanges[-1] = bar.exchange
+        self.seqs[-1] = bar.seq
+        self.stamps[-1] = bar.stamps
+
+    def take(self, rows: List[int]) -> "BarBatch":
+        """A new batch of the bars at ``rows``, in that order."""
+        batch = BarBatch(self.venue)
+        for field in self.__slots__[1:]:
+            column = getattr(self, field)
+            getattr(batch, field).extend(column[i] for i in rows)
+        return batch
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __getitem__(self, i: int) -> Bar:
+        bar = Bar(
+            self.venue,
+            self.symbols[i],
+            self.open[i],
+            self.high[i],
+            self.low[i],
+            self.close[i],
+            self.volume[i],
+            self.timestamps[i],
+        )
+        bar.trade_count = self.trade_counts[i]
+        bar.vwap = self.vwaps[i]
+        bar.exchange = self.exchanges[i]
+        bar.timeframe = self.timeframes[i]
+        bar.seq = self.seqs[i]
+        bar.stamps = self.stamps[i]
+        return bar
+
+    def __iter__(self) -> Iterator[Bar]:
+        for i in range(len(self.symbols)):
+            yield self[i]
+
+    def __repr__(self):
+        return f"BarBatch({self.venue.name} n={len(self)})"
 
 
 class Signal:
+    __slots__ = ("venue", "symbol", "exposure", "qty", "prc", "stamps")
+
     def __init__(
         self, venue: Venue, symbol: str, exposure: Exposure, qty: float, prc: float
     ):
@@ -151,18 +308,11 @@ class Signal:
         self.exposure = exposure
         self.qty = qty
         self.prc = prc
+        # stamps of the event it was emitted on, then its own
+        self.stamps: Optional[List[tuple]] = None
 
     def __repr__(self):
-        return """Signal (
-            venue={venue},
-            symbol={symbol},
-            exposure={exposure},
-            qty={qty},
-            prc={prc}
-        )""".format(
-            venue=self.venue,
-            symbol=self.symbol,
-            exposure=self.exposure,
-            qty=self.qty,
-            prc=self.prc,
+        return (
+            f"Signal({self.venue.name} {self.symbol} {self.exposure.value} "
+            f"{self.qty}@{self.prc})"
         )
@@ -0,0 +1,259 @@
+"""
+Latency instrumentation of the market data to order pipeline.
+
+Events carry the monotonic time (``perf_counter_ns``) of the stages they went
+through in their ``stamps`` slot, as ``(stage, ns)`` pairs. Stages shared by
+every consumer of an event are stamped on it; the strategies and the order
+router time their own stages and feed them, with the transitions of an event's
+stamps, to per-stage ``Histogram``s. Queue depths are sampled into ``Gauge``s.
+Everything is readable with ``snapshot`` and written as JSON by ``dump``.
+
+Instrumentation is off unless ``enable`` is called: every call site checks
+``ENABLED`` first, so it only costs that lookup when off.
+"""
+
+# standard
+import json
+import os
+import time
+from threading import Event, Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+# local
+from engine.interface import BarBatch
+
+ENABLED = False
+
+# stages, in pipeline order
+GATEWAY = 0  # received from the venue
+ENGINE = 1  # entered the engine
+QUEUED = 2  # routed, about to be put in the strategies' mailboxes
+DEQUEUED = 3  # taken by a strategy
+PROCESSED = 4  # processed by the strategy
+SIGNAL = 5  # signal emitted by the strategy
+ROUTED = 6  # signal handed to the order router
+SENT = 7  # order being sent by a router worker
+ACKED = 8  # venue answered
+
+STAGES = (
+    "gateway",
+    "engine",
+    "queued",
+    "dequeued",
+    "processed",
+    "signal",
+    "routed",
+    "sent",
+    "acked",
+)
+
+now = time.perf_counter_ns
+
+
+def enable(enabled: bool = True):
+    global ENABLED
+    ENABLED = enabled
+
+
+def stamp(event, stage: int):
+    """Records that ``event`` reached ``stage`` now."""
+    entry = (stage, now())
+    if event.stamps is None:
+        event.stamps = [entry]
+    else:
+        event.stamps.append(entry)
+
+
+def stamp_all(events, stage: int):
+    """
+    Records that each of ``events``, e.g. a batch, reached ``stage`` now. A
+    ``BarBatch`` is stamped in its ``stamps`` column.
+    """
+    entry = (stage, now())
+    if isinstance(events, BarBatch):
+        column = events.stamps
+        for i, stamps in enumerate(column):
+            if stamps is None:
+                column[i] = [entry]
+            else:
+                stamps.append(entry)
+        return
+    for event in events:
+        if event.stamps is None:
+            event.stamps = [entry]
+        else:
+            event.stamps.append(entry)
+
+
+class Histogram:
+    """
+    Log-linear histogram of nanosecond values, in the spirit of HdrHistogram:
+    values under ``2 * SUB_BUCKETS`` are counted exactly and every power of two
+    above is split in ``SUB_BUCKETS`` buckets, so any value is known within
+    ``1 / SUB_BUCKETS`` of itself in constant memory. Recording is a few integer
+    operations. Counts may lose increments under contention, which is fine for
+    monitoring.
+    """
+
+    SUB_BITS = 5
+    SUB_BUCKETS = 1 << SUB_BITS
+
+    def __init__(self):
+        self.counts = [0] * (64 * self.SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        if value < 0:
+            value = 0
+        shift = value.bit_length() - self.SUB_BITS - 1
+        if shift <= 0:
+            self.counts[value] += 1
+        else:
+            self.counts[(shift << self.SUB_BITS) + (value >> shift)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def bucket_value(self, index: int) -> float:
+        """Middle of the range of values counted in bucket ``index``."""
+        if index < 2 * self.SUB_BUCKETS:
+            return float(index)
+        shift = (index >> self.SUB_BITS) - 1
+        low = (index - (shift << self.SUB_BITS)) << shift
+        return low + ((1 << shift) - 1) / 2
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = max(1, round(self.count * p / 100))
+        if rank >= self.count:
+            return float(self.max)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_value(index), float(self.max))
+        return float(self.max)
+
+    def summary(self) -> dict:
+        """Count and latencies in microseconds."""
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile(50) / 1e3,
+            "p90_us": self.percentile(90) / 1e3,
+            "p99_us": self.percentile(99) / 1e3,
+            "p999_us": self.percentile(99.9) / 1e3,
+            "max_us": self.max / 1e3,
+        }
+
+
+class Gauge:
+    """Latest and highest value of a sampled quantity, e.g. a queue depth."""
+
+    def __init__(self):
+        self.value = 0
+        self.max = 0
+        self.samples = 0
+
+    def set(self, value: int):
+        self.value = value
+        self.samples += 1
+        if value > self.max:
+            self.max = value
+
+    def summary(self) -> dict:
+        return {"value": self.value, "max": self.max, "samples": self.samples}
+
+
+lock = Lock()
+histograms: Dict[str, Histogram] = {}
+gauges: Dict[str, Gauge] = {}
+# (name, from stage, to stage) -> histogram name
+_transitions: Dict[Tuple[str, int, int], str] = {}
+
+
+def histogram(name: str) -> Histogram:
+    found = histograms.get(name)
+    if found is None:
+        with lock:
+            found = histograms.setdefault(name, Histogram())
+    return found
+
+
+def observe(name: str, ns: int):
+    histogram(name).record(ns)
+
+
+def gauge(name: str, value: int):
+    found = gauges.get(name)
+    if found is None:
+        with lock:
+            found = gauges.setdefault(name, Gauge())
+    found.set(value)
+
+
+def transition(name: str, start: int, end: int) -> str:
+    """Name of the histogram of ``name`` events going from ``start`` to ``end``."""
+    key = (name, start, end)
+    found = _transitions.get(key)
+    if found is None:
+        found = _transitions[key] = f"{name} {STAGES[start]}->{STAGES[end]}"
+    return found
+
+
+def record(stamps: Optional[List[Tuple[int, int]]], name: str, total: bool = True):
+    """
+    Records the time spent between each of ``stamps`` and, with ``total``, from
+    the first to the last, into the ``transition`` histograms of ``name``.
+    """
+    if not stamps:
+        return
+    for (a, start), (b, end) in zip(stamps, stamps[1:]):
+        observe(transition(name, a, b), end - start)
+    if total and len(stamps) > 2:
+        (a, start), (b, end) = stamps[0], stamps[-1]
+        observe(transition(name, a, b), end - start)
+
+
+def snapshot() -> dict:
+    with lock:
+        return {
+            "histograms": {name: h.summary() for name, h in sorted(histograms.items())},
+            "gauges": {name: g.summary() for name, g in sorted(gauges.items())},
+        }
+
+
+def reset():
+    with lock:
+        histograms.clear()
+        gauges.clear()
+
+
+def dump(path: str):
+    """Writes ``snapshot`` to ``path`` as JSON, atomically."""
+    data = {"time": time.time(), **snapshot()}
+    with open(path + ".tmp", "w") as file:
+        json.dump(data, file, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+class Exporter(Thread):
+    """Dumps the metrics to ``path`` every ``interval`` seconds, and on stop."""
+
+    def __init__(self, path: str, interval: float = 60.0):
+        super().__init__(name="latency_exporter", daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopEvent = Event()
+
+    def run(self):
+        while not self.stopEvent.wait(self.interval):
+            dump(self.path)
+        dump(self.path)
+
+    def stop(self):
+        self.stopEvent.set()
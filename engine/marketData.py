@@ -0,0 +1,163 @@
+# standard
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# local
+from engine.aggregator import load_bars
+from engine.interface import BASE_TIMEFRAME, Bar, BarBatch
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class SymbolBuffer:
+    """
+    Ring buffer of the latest ``capacity`` bars of one symbol, one NumPy column
+    per field.
+
+    Every value is written twice, at ``i`` and ``i + capacity`` of columns twice
+    the capacity long, so any window of up to ``capacity`` bars is a contiguous
+    slice and can be handed out as a view instead of being copied. Bars are
+    numbered by ``seq``, their position in the stream of the symbol.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # number of bars written so far, the seq of the next one
+        self.count = 0
+        self.columns: Dict[str, np.ndarray] = {
+            field: np.zeros(2 * capacity, dtype="i8" if field == "timestamp" else "f8")
+            for field in FIELDS
+        }
+        self.ordered = [self.columns[field] for field in FIELDS]
+
+    def write(self, values: tuple) -> int:
+        i = self.count % self.capacity
+        for column, value in zip(self.ordered, values):
+            column[i] = value
+            column[i + self.capacity] = value
+        # publish only once every field is written
+        self.count += 1
+        return self.count - 1
+
+    def load(self, rows: np.ndarray):
+        """Replaces the contents with ``rows``, oldest first."""
+        rows = rows[len(rows) - min(len(rows), self.capacity) :]
+        n = len(rows)
+        for field, column in self.columns.items():
+            column[:n] = rows[field]
+            column[self.capacity : self.capacity + n] = rows[field]
+        self.count = n
+
+    def window(self, field: str, n: int, end: Optional[int] = None) -> np.ndarray:
+        count = self.count
+        end = count if end is None else end
+        if end > count:
+            raise IndexError(f"bar {end - 1} not written yet")
+        n = min(n, end)
+        start = end - n
+        # the oldest slot is the one the writer overwrites next
+        if count - start >= self.capacity:
+            raise IndexError(f"bar {start} already overwritten")
+        i = start % self.capacity
+        view = self.columns[field][i : i + n]
+        view.flags.writeable = False
+        return view
+
+
+class MarketDataStore:
+    """
+    Latest bars of every symbol traded, shared by all the strategies.
+
+    The engine appends each bar once and strategies read read-only views over
+    the windows they need, so memory grows with symbols and window length but
+    not with the number of strategies. Strategies ``require`` the window they
+    need at setup, which sizes the symbol's buffer and warm-starts it from
+    ``history``; bars of symbols nobody required are not stored. Each timeframe
+    of a symbol is a stream of its own, warm-started from the base bars.
+
+    Appends come from a single thread. A reader may lag the writer by up to
+    ``slack`` bars before the window it asks for is overwritten.
+    """
+
+    def __init__(self, history=None, slack: int = 4096):
+        self.history = history
+        self.slack = slack
+        self.lock = Lock()
+        # (symbol, timeframe) -> buffer
+        self.buffers: Dict[Tuple[str, str], SymbolBuffer] = {}
+
+    def __contains__(self, symbol: str) -> bool:
+        return (symbol, BASE_TIMEFRAME) in self.buffers
+
+    def require(self, symbol: str, n: int, timeframe: str = BASE_TIMEFRAME):
+        """
+        Makes sure the last ``n`` bars of ``symbol`` are kept. Meant for setup:
+        a buffer that has to grow is reloaded from the history.
+        """
+        with self.lock:
+            buffer = self.buffers.get((symbol, timeframe))
+            if buffer is not None and buffer.capacity >= n + self.slack:
+                return
+            buffer = SymbolBuffer(n + self.slack)
+            if self.history is not None:
+                buffer.load(load_bars(self.history, symbol, n, timeframe, FIELDS))
+            self.buffers[(symbol, timeframe)] = buffer
+
+    def count(self, symbol: str, timeframe: str = BASE_TIMEFRAME) -> int:
+        return self.buffers[(symbol, timeframe)].count
+
+    def append(self, bar: Bar) -> Optional[int]:
+        """Stores ``bar`` and returns its seq, which is also set on the bar."""
+        buffer = self.buffers.get((bar.symbol, bar.timeframe))
+        if buffer is None:
+            return None
+        bar.seq = buffer.write(
+            (
+                (bar.timestamp - EPOCH) // timedelta(microseconds=1) * 1000,
+                bar.open,
+                bar.high,
+                bar.low,
+                bar.close,
+                bar.volume,
+            )
+        )
+        return bar.seq
+
+    def append_batch(self, batch: BarBatch):
+        """Stores the bars of ``batch``, setting their seqs in its ``seqs``."""
+        for i, (symbol, timeframe) in enumerate(zip(batch.symbols, batch.timeframes)):
+            buffer = self.buffers.get((symbol, timeframe))
+            if buffer is not None:
+                batch.seqs[i] = buffer.write(
+                    (
+                        (batch.timestamps[i] - EPOCH)
+                        // timedelta(microseconds=1)
+                        * 1000,
+                        batch.open[i],
+                        batch.high[i],
+                        batch.low[i],
+                        batch.close[i],
+                        batch.volume[i],
+                    )
+                )
+
+    def window(
+        self,
+        symbol: str,
+        n: int,
+        field: str = "close",
+        end: Optional[int] = None,
+        timeframe: str = BASE_TIMEFRAME,
+    ) -> np.ndarray:
+        """
+        Read-only view of ``field`` over the last ``n`` bars of ``symbol`` (fewer
+        if fewer were stored) before seq ``end``, or before the latest bar when
+        ``end`` is None, oldest first. The view is only valid until the writer
+        wraps around it, copy it to keep it.
+        """
+        return self.buffers[(symbol, timeframe)].window(field, n, end)
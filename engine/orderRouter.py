@@ -0,0 +1,196 @@
+# standard
+import logging
+import time
+from collections import deque
+from queue import SimpleQueue
+from threading import Lock, Thread
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+from alpaca.trading import MarketOrderRequest, OrderType, TimeInForce
+
+# local
+from engine import latency
+from engine.interface import ExposureToSideMap, Signal
+from gateways.gateway import Gateway
+
+
+class OrderTicket:
+    """Tracks one signal from submission to the venue's acknowledgement."""
+
+    __slots__ = (
+        "signal",
+        "submitted",
+        "completed",
+        "order_id",
+        "status",
+        "error",
+    )
+
+    def __init__(self, signal: Signal):
+        self.signal = signal
+        self.submitted = time.perf_counter()
+        self.completed: Optional[float] = None
+        self.order_id: Optional[str] = None
+        self.status = "pending"
+        self.error: Optional[str] = None
+
+    def latency(self) -> Optional[float]:
+        if self.completed is None:
+            return None
+        return self.completed - self.submitted
+
+    def __repr__(self):
+        return (
+            f"OrderTicket({self.signal.venue.name} {self.signal.symbol} "
+            f"status={self.status} order_id={self.order_id})"
+        )
+
+
+class VenueStats:
+    """Acknowledgement counts and submission latencies of one venue."""
+
+    def __init__(self, window: int = 1000):
+        self.lock = Lock()
+        self.submitted = 0
+        self.acknowledged = 0
+        self.failed = 0
+        # seconds from submission to acknowledgement, latest orders only
+        self.latencies: Deque[float] = deque(maxlen=window)
+
+    def record(self, ticket: OrderTicket):
+        with self.lock:
+            if ticket.status == "failed":
+                self.failed += 1
+            else:
+                self.acknowledged += 1
+            self.latencies.append(ticket.latency())
+
+    def summary(self) -> dict:
+        with self.lock:
+            latencies = np.array(self.latencies) * 1e3
+            summary = {
+                "submitted": self.submitted,
+                "acknowledged": self.acknowledged,
+                "failed": self.failed,
+                "pending": self.submitted - self.acknowledged - self.failed,
+            }
+        if len(latencies):
+            summary.update(
+                p50_ms=float(np.percentile(latencies, 50)),
+                p99_ms=float(np.percentile(latencies, 99)),
+                max_ms=float(latencies.max()),
+            )
+        return summary
+
+
+class OrderRouter:
+    """
+    Sends signals to their venue off the strategy threads.
+
+    ``submit`` queues a ticket for the gateway of ``signal.venue`` and returns
+    at once; ``workers[venue]`` threads per venue (1 by default) turn tickets
+    into market orders and wait for the venue's answer. Acknowledged orders are
+    reported to ``on_ack`` from the worker thread, e.g. to refresh the account.
+    """
+
+    def __init__(
+        self,
+        gateways: Dict[int, Gateway],
+        log: logging.Logger,
+        workers: Dict[int, int] = None,
+        on_ack: Callable[[OrderTicket], None] = None,
+    ):
+        self.gateways = gateways
+        self.log = log
+        self.on_ack = on_ack
+        self.workers = {v: (workers or {}).get(v, 1) for v in gateways}
+        self.queues: Dict[int, SimpleQueue] = {v: SimpleQueue() for v in gateways}
+        self.stats: Dict[int, VenueStats] = {v: VenueStats() for v in gateways}
+        self.threads: List[Thread] = [
+            Thread(target=self._work, args=(v,), name=f"orders_{v.name.lower()}_{i}")
+            for v in gateways
+            for i in range(self.workers[v])
+        ]
+
+    def start(self):
+        list(t.start() for t in self.threads)
+
+    def submit(self, signal: Signal) -> OrderTicket:
+        ticket = OrderTicket(signal)
+        if signal.venue not in self.queues:
+            ticket.status = "failed"
+            ticket.error = f"no gateway for venue {signal.venue.name}"
+            self.log.error(f"order rejected: {ticket.error}")
+            return ticket
+        stats = self.stats[signal.venue]
+        with stats.lock:
+            stats.submitted += 1
+        self.queues[signal.venue].put(ticket)
+        if latency.ENABLED:
+            latency.gauge(
+                f"orders {signal.venue.name}", self.queues[signal.venue].qsize()
+            )
+        return ticket
+
+    def _work(self, venue: int):
+        gateway = self.gateways[venue]
+        while True:
+            ticket = self.queues[venue].get()
+            if ticket is None:
+                break
+            self._send(gateway, ticket)
+            try:
+                self.stats[venue].record(ticket)
+            except Exception:
+                self.log.exception(f"failed to record {ticket}")
+            if ticket.status != "failed" and self.on_ack is not None:
+                try:
+                    self.on_ack(ticket)
+                except Exception:
+                    self.log.exception(f"acknowledgement handler failed: {ticket}")
+
+    def _send(self, gateway: Gateway, ticket: OrderTicket):
+        signal = ticket.signal
+        if latency.ENABLED:
+            latency.stamp(signal, latency.SENT)
+        try:
+            market_order_data = MarketOrderRequest(
+                order_type=OrderType.MARKET,
+                symbol=signal.symbol,
+                qty=signal.qty,
+                side=ExposureToSideMap[signal.exposure],
+                time_in_force=TimeInForce.GTC,
+            )
+            order = gateway.trade(market_order_data)
+        except Exception as e:
+            order, ticket.error = None, str(e)
+        ticket.completed = time.perf_counter()
+        if latency.ENABLED:
+            latency.stamp(signal, latency.ACKED)
+            latency.record(signal.stamps, "signal")
+            # market data received to order sent, when emitted on market data
+            (first, received), (_, sent) = signal.stamps[0], signal.stamps[-2]
+            if first != latency.SIGNAL:
+                latency.observe(
+                    latency.transition("signal", first, latency.SENT), sent - received
+                )
+        if order is None:
+            ticket.status = "failed"
+            self.log.error(f"order failed: {ticket} {ticket.error or ''}")
+            return
+        ticket.order_id = str(order.id)
+        ticket.status = str(getattr(order.status, "value", order.status))
+        self.log.debug(
+            "order acknowledged in %.1fms: %s", ticket.latency() * 1e3, ticket
+        )
+
+    def summary(self) -> Dict[str, dict]:
+        return {v.name: stats.summary() for v, stats in self.stats.items()}
+
+    def stop(self):
+        """Sends the orders still queued, then stops the workers."""
+        for venue, queue in self.queues.items():
+            for _ in range(self.workers[venue]):
+                queue.put(None)
+        list(t.join() for t in self.threads)
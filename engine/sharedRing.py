@@ -0,0 +1,171 @@
+# standard
+import multiprocessing
+import os
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, List
+
+import numpy as np
+
+# local
+from data.journal import RECORD, Event, decode, encode
+
+# two u64 counters ahead of the records: written by the producer, read by
+# the consumer, each only ever stored by its own side
+HEADER_SIZE = 16
+
+
+class SharedRing:
+    """
+    Single-consumer ring of market data in shared memory.
+
+    Events are stored as fixed-width journal records (see data/journal.py), so
+    handing one to another process costs an encode into the mapping rather than
+    a pickle through a pipe. The producer never blocks: events that do not fit
+    are dropped and counted in ``dropped``. A semaphore released once per
+    ``put_many`` lets the consumer sleep until there is something to read; the
+    consumer takes every permit before each read.
+
+    Any thread of the creating process may write: writers are serialized by a
+    lock, so the ring is a single producer as far as the consumer is concerned.
+    Rings are created by the producer and attach by name when passed to a child
+    process.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self.shm = SharedMemory(create=True, size=HEADER_SIZE + capacity * RECORD.size)
+        self.ready = self._notifier()
+        self.dropped = 0
+        self.writeLock = threading.Lock()
+        # only the creating process unlinks, forked children inherit this
+        self.ownerPid = os.getpid()
+        self._map()
+        self.counters[:] = 0
+
+    def _notifier(self):
+        return multiprocessing.Semaphore(0)
+
+    def _map(self):
+        self.counters = np.ndarray(2, dtype="u8", buffer=self.shm.buf)
+        self.records = self.shm.buf[HEADER_SIZE:]
+
+    def __getstate__(self):
+        return {
+            "capacity": self.capacity,
+            "shm": self.shm,
+            "ready": self.ready,
+            "ownerPid": self.ownerPid,
+        }
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.dropped = 0
+        self.writeLock = threading.Lock()
+        self._map()
+
+    def qsize(self) -> int:
+        written, read = self.counters.tolist()
+        return written - read
+
+    def put_many(self, events: Iterable[Event]) -> int:
+        with self.writeLock:
+            written, read = self.counters.tolist()
+            start = written
+            for event in events:
+                if written - read == self.capacity:
+                    self.dropped += 1
+                    continue
+                offset = written % self.capacity * RECORD.size
+                self.records[offset : offset + RECORD.size] = encode(event)
+                written += 1
+            if written != start:
+                # publish the records before waking the consumer up
+                self.counters[0] = written
+                self.ready.release()
+        return written - start
+
+    def get_batch(self, timeout: float = None) -> List[Event]:
+        """Every event written so far, waiting up to ``timeout`` for one."""
+        if not self.qsize():
+            self.ready.acquire(timeout=timeout)
+        # the writes read below released a permit each: left in place, they
+        # would wake the next calls up to an empty ring
+        while self.ready.acquire(block=False):
+            pass
+        written, read = self.counters.tolist()
+        events = []
+        for seq in range(read, written):
+            offset = seq % self.capacity * RECORD.size
+            events.append(decode(self.records[offset : offset + RECORD.size]))
+        self.counters[1] = written
+        return events
+
+    def close(self):
+        # views over the mapping must go before it can be closed
+        del self.counters
+        self.records.release()
+        self.shm.close()
+        if os.getpid() == self.ownerPid:
+            self.shm.unlink()
+
+
+class OverwriteRing(SharedRing):
+    """
+    Shared-memory ring for a consumer that may fall behind, e.g. the dashboard.
+
+    The producer never waits for the consumer: once the ring is full every new
+    event overwrites the oldest one. The consumer keeps its own cursor, skips
+    what was overwritten before it could be read and counts it in ``lost``.
+    Records are validated against the producer's sequence counter after being
+    copied, so a slot rewritten during the copy is discarded rather than
+    returned torn. An event set once per ``put_many`` wakes the consumer up.
+    Writers from several threads are serialized, as for ``SharedRing``.
+    """
+
+    def __init__(self, capacity: int = 65536):
+        super().__init__(capacity)
+        self.read = 0
+        self.lost = 0
+
+    def _notifier(self):
+        return multiprocessing.Event()
+
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self.read = int(self.counters[0])
+        self.lost = 0
+
+    def qsize(self) -> int:
+        return min(int(self.counters[0]) - self.read, self.capacity)
+
+    def put_many(self, events: Iterable[Event]) -> int:
+        with self.writeLock:
+            written = start = int(self.counters[0])
+            for event in events:
+                offset = written % self.capacity * RECORD.size
+                self.records[offset : offset + RECORD.size] = encode(event)
+                written += 1
+                # published one by one: the slot being written is always the
+                # one after the counter, which the consumer knows not to trust
+                self.counters[0] = written
+            if written != start:
+                self.ready.set()
+        return written - start
+
+    def get_batch(self, timeout: float = None) -> List[Event]:
+        """Every event not read nor overwritten yet, waiting up to ``timeout``."""
+        if int(self.counters[0]) == self.read:
+            self.ready.wait(timeout)
+        self.ready.clear()
+        written = int(self.counters[0])
+        first = max(self.read, written - self.capacity)
+        copies = []
+        for seq in range(first, written):
+            offset = seq % self.capacity * RECORD.size
+            copies.append(bytes(self.records[offset : offset + RECORD.size]))
+        # the producer may be rewriting the slot of seq now - capacity
+        valid = max(first, int(self.counters[0]) - self.capacity + 1)
+        self.lost += valid - self.read
+        self.read = written
+        return [decode(record) for record in copies[valid - first :]]
@@ -0,0 +1,206 @@
+# standard
+import itertools
+import logging
+import os
+import random
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# local
+from data.cryptoDatabase import DATABASE_PATH
+from data.history import ArrayHistory
+from engine.backtest import Backtester
+from engine.interface import Bar
+
+BAR_DTYPE = np.dtype(
+    [
+        ("timestamp", "i8"),  # ns since epoch, UTC
+        ("symbol", "i4"),  # index into the symbols list
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("volume", "f8"),
+    ]
+)
+
+# set in each worker by _attach: the shared bars and how to read them
+_shared: dict = {}
+
+
+def parameter_grid(
+    grid: Dict[str, list], samples: int = 0, seed: int = 0
+) -> List[Dict[str, object]]:
+    """
+    Every combination of the ``grid`` values, or ``samples`` distinct
+    combinations drawn at random from them when ``samples`` is positive.
+    """
+    names = list(grid)
+    points = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+    if 0 < samples < len(points):
+        points = random.Random(seed).sample(points, samples)
+    return points
+
+
+def load_shared_bars(
+    symbols: List[str],
+    start: datetime,
+    end: Optional[datetime] = None,
+    path: str = DATABASE_PATH,
+) -> SharedMemory:
+    """
+    Copies the bars of ``symbols`` up to ``end`` into a new shared memory block
+    and returns it. The block starts with ``len(symbols) + 2`` int64 offsets,
+    followed by a ``BAR_DTYPE`` array: the warm-up bars before ``start`` grouped
+    by symbol, symbol ``i`` in ``[offsets[i], offsets[i + 1])``, then the bars
+    to replay in (timestamp, symbol) order up to ``offsets[-1]``.
+    """
+    params: list = list(symbols)
+    where = f"symbol IN ({', '.join('?' for _ in symbols)})"
+    if end is not None:
+        where += " AND timestamp < ?"
+        params.append(str(end))
+    conn = sqlite3.connect(path)
+    try:
+        df = pd.read_sql_query(
+            f"""
+            SELECT timestamp, symbol, open, high, low, close, volume
+            FROM bars
+            WHERE {where}
+            ORDER BY timestamp, symbol
+        """,
+            conn,
+            params=params,
+        )
+    finally:
+        conn.close()
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars["timestamp"] = (
+        pd.to_datetime(df["timestamp"], utc=True)
+        .to_numpy(dtype="datetime64[ns]")
+        .view("i8")
+    )
+    bars["symbol"] = df["symbol"].map({s: i for i, s in enumerate(symbols)})
+    for field in ("open", "high", "low", "close", "volume"):
+        bars[field] = df[field].to_numpy(dtype=float)
+    split = int(np.searchsorted(bars["timestamp"], pd.Timestamp(start).value))
+    # stable, so the bars of each symbol stay in time order
+    order = np.argsort(bars["symbol"][:split], kind="stable")
+    offsets = np.empty(len(symbols) + 2, dtype=np.int64)
+    offsets[:-1] = np.searchsorted(
+        bars["symbol"][:split][order], np.arange(len(symbols) + 1)
+    )
+    offsets[-1] = len(bars)
+
+    shm = SharedMemory(create=True, size=offsets.nbytes + bars.nbytes)
+    np.ndarray(len(offsets), dtype=np.int64, buffer=shm.buf)[:] = offsets
+    shared = np.ndarray(
+        len(bars), dtype=BAR_DTYPE, buffer=shm.buf, offset=offsets.nbytes
+    )
+    shared[:split] = bars[:split][order]
+    shared[split:] = bars[split:]
+    return shm
+
+
+def _attach(name: str, symbols: List[str]):
+    shm = SharedMemory(name=name)
+    offsets = np.ndarray(len(symbols) + 2, dtype=np.int64, buffer=shm.buf).tolist()
+    bars = np.ndarray(
+        offsets[-1], dtype=BAR_DTYPE, buffer=shm.buf, offset=len(offsets) * 8
+    )
+    bars.flags.writeable = False
+    _shared.update(
+        shm=shm,
+        bars=bars[offsets[-2] :],
+        symbols=symbols,
+        # contiguous slices, views of the shared block
+        history=ArrayHistory(
+            {s: bars[offsets[i] : offsets[i + 1]] for i, s in enumerate(symbols)}
+        ),
+    )
+
+
+def _replay(venues: Dict[str, int]) -> Iterator[Bar]:
+    bars = _shared["bars"]
+    symbols = _shared["symbols"]
+    names = [(venues[s], s) for s in symbols]
+    # the columns are iterated in place, rather than converted to lists
+    for ts, symbol, o, h, lo, c, v in zip(
+        bars["timestamp"],
+        bars["symbol"],
+        bars["open"],
+        bars["high"],
+        bars["low"],
+        bars["close"],
+        bars["volume"],
+    ):
+        timestamp = datetime.fromtimestamp(ts / 1e9, tz=timezone.utc)
+        venue, name = names[symbol]
+        yield Bar(venue, name, o, h, lo, c, v, timestamp)
+
+
+def _run_point(strategyCfg: dict, params: dict, account: dict) -> dict:
+    config = {"strategies": [{**strategyCfg, **params}]}
+    backtester = Backtester(
+        config,
+        logging.getLogger("sweep"),
+        history=_shared["history"],
+        **account,
+    )
+    report = backtester.run(_replay(backtester.venues))
+    report.pop("positions")
+    return {**params, **report}
+
+
+def run_sweep(
+    strategyCfg: dict,
+    grid: Dict[str, list],
+    start: datetime,
+    end: Optional[datetime] = None,
+    samples: int = 0,
+    workers: Optional[int] = None,
+    account: Optional[dict] = None,
+    path: str = DATABASE_PATH,
+    log: logging.Logger = logging.getLogger("sweep"),
+) -> pd.DataFrame:
+    """
+    Backtests ``strategyCfg`` for every point of ``grid`` across a process pool
+    and returns the results ranked by PnL.
+
+    The price history is loaded once into shared memory; workers map it instead
+    of receiving a pickled copy per task.
+    """
+    points = parameter_grid(grid, samples)
+    symbols = list(strategyCfg["symbols"])
+    shm = load_shared_bars(symbols, start, end, path)
+    length = np.ndarray(len(symbols) + 2, dtype=np.int64, buffer=shm.buf)[-1]
+    log.info(f"sweeping {len(points)} points over {length} bars")
+    results = []
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            initializer=_attach,
+            initargs=(shm.name, symbols),
+        ) as pool:
+            futures = {
+                pool.submit(_run_point, strategyCfg, params, account or {}): params
+                for params in points
+            }
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    log.error(f"backtest failed for {futures[future]}: {e}")
+    finally:
+        shm.close()
+        shm.unlink()
+    df = pd.DataFrame(results)
+    if df.empty:
+        return df
+    return df.sort_values("pnl", ascending=False, ignore_index=True)
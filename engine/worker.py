@@ -0,0 +1,138 @@
+# standard
+import logging
+import multiprocessing
+import signal
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection, wait
+from threading import Event, Thread
+from typing import Callable, List
+
+# local
+from data.cryptoDatabase import DATABASE_PATH
+from data.history import HistoryLoader
+from engine.account import AccountService
+from engine.interface import Bar, Quote, Signal, StrategyTypeMap, Trade
+from engine.sharedRing import SharedRing
+
+
+def _strategy_main(
+    config: dict,
+    ring: SharedRing,
+    signals: Connection,
+    stopEvent,
+    client,
+    path: str,
+):
+    # the parent coordinates shutdown on SIGINT
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # imported here, the engine imports this module
+    from engine.engine import strategyFactory
+
+    log = logging.getLogger("app")
+    account = AccountService(client, log)
+    strategy = strategyFactory[StrategyTypeMap[config["type"]]](
+        config, signals.send, log, stopEvent, HistoryLoader(path), account, None
+    )
+    # fetched before the first event, so that its signals can be sized
+    strategy.account.refresh()
+    strategy.account.start()
+    strategy.start()
+    while not stopEvent.is_set():
+        events = ring.get_batch()
+        quotes = [e for e in events if isinstance(e, Quote)]
+        trades = [e for e in events if isinstance(e, Trade)]
+        bars = [e for e in events if isinstance(e, Bar)]
+        if quotes:
+            strategy.handle_quotes(quotes)
+        if trades:
+            strategy.handle_trades(trades)
+        if bars:
+            strategy.handle_bars(bars)
+    strategy.wake()
+    strategy.join()
+    strategy.account.stop()
+    strategy.account.join()
+    ring.close()
+    signals.close()
+
+
+class StrategyProcess(Thread):
+    """
+    Runs a strategy in a child process, out of reach of the engine's GIL.
+
+    To the engine it is just another strategy: ``handle_quotes``,
+    ``handle_trades`` and ``handle_bars`` copy the events into a
+    ``SharedRing`` that the child drains into the real strategy, and the
+    signals the strategy emits come back over a pipe and are passed to
+    ``signal_callback`` on this thread.
+
+    The child builds the strategy from ``config`` with its own warm start from
+    the database at ``path``, market data store and account service, fetching
+    the account from ``client``, e.g. the venue's trading client. ``spawn`` must
+    be called before the engine starts its other threads, as the child is
+    forked.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        signal_callback: Callable[[List[Signal]], None],
+        log: logging.Logger,
+        stopEvent: Event,
+        client,
+        capacity: int = 65536,
+        path: str = DATABASE_PATH,
+    ):
+        super().__init__(name=f"{config['name']}")
+        self.config = config
+        self.log = log
+        self.signal_cb = signal_callback
+        self.stopEvent = stopEvent
+        self.ring = SharedRing(capacity)
+        self.signals, self.signalsTx = Pipe(duplex=False)
+        self.childStop = multiprocessing.Event()
+        self.wakeRx, self.wakeTx = Pipe(duplex=False)
+        self.process = Process(
+            target=_strategy_main,
+            args=(config, self.ring, self.signalsTx, self.childStop, client, path),
+            name=f"{config['name']}",
+            daemon=True,
+        )
+
+    def spawn(self):
+        self.process.start()
+        # the child owns the sending end, recv fails once it exits
+        self.signalsTx.close()
+
+    def wake(self):
+        self.wakeTx.send(None)
+
+    def handle_quotes(self, quotes: List[Quote]):
+        self.ring.put_many(quotes)
+
+    def handle_trades(self, trades: List[Trade]):
+        self.ring.put_many(trades)
+
+    def handle_bars(self, bars: List[Bar]):
+        self.ring.put_many(bars)
+
+    def run(self):
+        self.log.info(f"{self.name} started in process {self.process.pid}")
+        while not self.stopEvent.is_set():
+            ready = wait([self.signals, self.wakeRx])
+            if self.signals in ready:
+                try:
+                    self.signal_cb(self.signals.recv())
+                except EOFError:
+                    self.log.error(f"{self.name} process exited unexpectedly")
+                    break
+        self.childStop.set()
+        # the child sleeps on the ring until something is written or released
+        self.ring.ready.release()
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.log.error(f"{self.name} process did not stop, terminating it")
+            self.process.terminate()
+            self.process.join()
+        self.ring.close()
+        self.log.info(f"{self.name} stopped, {self.ring.dropped} events dropped")
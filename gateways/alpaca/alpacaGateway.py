@@ -7,7 +7,8 @@ from alpaca.data.live.crypto import CryptoDataStream
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import MarketOrderRequest
 
-from engine.interface import Trade, Quote, Venue, Bar
+from engine import latency
+from engine.interface import Trade, Quote, Venue, BarBatch
 from gateways import gateway
 
 
@@ -17,7 +18,7 @@ class AlpacaGateway(gateway.Gateway):
         config: dict,
         quote_callback: Callable[[List[Quote]], None],
         trade_callback: Callable[[List[Trade]], None],
-        bar_callback: Callable[[List[Bar]], None],
+        bar_callback: Callable[[BarBatch], None],
         log: logging.Logger,
     ):
         super().__init__(config, quote_callback, trade_callback, bar_callback, log)
@@ -39,6 +40,8 @@ class AlpacaGateway(gateway.Gateway):
 
     async def _on_quote(self, update: alpaca.data.models.quotes.Quote):
         quote = Quote(Venue.ALPACA, update.symbol, update.timestamp)
+        if latency.ENABLED:
+            latency.stamp(quote, latency.GATEWAY)
         quote.bid_prc = update.bid_price
         quote.ask_prc = update.ask_price
         quote.bid_qty = update.bid_size
@@ -47,14 +50,16 @@ class AlpacaGateway(gateway.Gateway):
 
     async def _on_trade(self, update: alpaca.data.models.trades.Trade):
         trade = Trade(Venue.ALPACA, update.symbol, update.timestamp)
+        if latency.ENABLED:
+            latency.stamp(trade, latency.GATEWAY)
         trade.price = update.price
         trade.volume = update.size
         trade.id = update.id
         self.trade_cb([trade])
 
     async def _on_bars(self, update: alpaca.data.models.bars.Bar):
-        bar = Bar(
-            Venue.ALPACA,
+        bars = BarBatch(Venue.ALPACA)
+        bars.append(
             update.symbol,
             update.open,
             update.high,
@@ -62,8 +67,12 @@ class AlpacaGateway(gateway.Gateway):
             update.close,
             update.volume,
             update.timestamp,
+            update.trade_count,
+            update.vwap,
         )
-        self.bar_cb([bar])
+        if latency.ENABLED:
+            latency.stamp_all(bars, latency.GATEWAY)
+        self.bar_cb(bars)
 
     def subscribe(self, symbols_crypto=None, symbols_stocks=None):
         symbols_crypto = (
@@ -105,6 +114,9 @@ class AlpacaGateway(gateway.Gateway):
 
     def trade(self, market_order: MarketOrderRequest):
         try:
-            self.trading.submit_order(order_data=market_order)
+            return self.trading.submit_order(order_data=market_order)
         except Exception as e:
             self.log.error(f"failed to submit order: {e}")
+
+    def get_account(self):
+        return self.trading.get_account()
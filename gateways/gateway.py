@@ -6,7 +6,7 @@ from typing import List, Callable
 
 from alpaca.trading import MarketOrderRequest
 
-from engine.interface import Quote, Trade, Bar
+from engine.interface import Quote, Trade, BarBatch
 
 
 class Gateway(ABC, Thread):
@@ -19,7 +19,7 @@ class Gateway(ABC, Thread):
         config: dict,
         quote_callback: Callable[[List[Quote]], None],
         trade_callback: Callable[[List[Trade]], None],
-        bar_callback: Callable[[List[Bar]], None],
+        bar_callback: Callable[[BarBatch], None],
         log: logging.Logger,
     ):
         super().__init__(name=f"{config['name']}")
@@ -55,4 +55,8 @@ class Gateway(ABC, Thread):
         self.deactivate()
 
     def trade(self, market_order: MarketOrderRequest):
+        """Submits ``market_order``, returns the venue's order or None on failure."""
+        raise NotImplementedError
+
+    def get_account(self):
         raise NotImplementedError
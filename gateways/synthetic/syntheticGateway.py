@@ -0,0 +1,189 @@
+# standard
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from threading import Event, Lock
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from alpaca.trading.requests import MarketOrderRequest
+
+from engine import latency
+from engine.interface import Trade, Quote, Venue, BarBatch
+from gateways import gateway
+
+
+class SyntheticGateway(gateway.Gateway):
+    """
+    Generates market data locally, to load-test the engine without a venue.
+
+    Every symbol gets ``quote_rate`` quotes and ``trade_rate`` trades per second
+    on a random walk, delivered ``batch_size`` at a time like a stream would,
+    and a 1-minute bar every ``bar_interval`` seconds: market time runs
+    ``60 / bar_interval`` times faster than the wall clock, from ``start``. The
+    schedule is kept against the wall clock, so when the engine cannot keep up
+    events are sent back to back and the achieved rates fall short of the
+    targets. The wall clock is ``clock``, and ``step`` sends what is due at a
+    given time, so a test can drive the feed on its own schedule. Orders are
+    filled at once, after ``order_delay`` seconds.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        quote_callback: Callable[[List[Quote]], None],
+        trade_callback: Callable[[List[Trade]], None],
+        bar_callback: Callable[[BarBatch], None],
+        log: logging.Logger,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        super().__init__(config, quote_callback, trade_callback, bar_callback, log)
+        self.symbols: List[str] = []
+        self.quoteRate = config.get("quote_rate", 100.0)
+        self.tradeRate = config.get("trade_rate", 10.0)
+        self.barInterval = config.get("bar_interval", 1.0)
+        self.batchSize = config.get("batch_size", 1)
+        self.orderDelay = config.get("order_delay", 0.0)
+        self.cash = config.get("cash", 100000.0)
+        self.startTime = config.get("start", datetime(2024, 1, 1, tzinfo=timezone.utc))
+        self.random = random.Random(config.get("seed", 0))
+        # seconds since an arbitrary point, the schedule is kept against it
+        self.clock = clock
+        # market time of the events being sent, and 1-minute bars sent so far
+        self.now = self.startTime
+        self.minutes = 0
+        self.stopEvent = Event()
+        self.lock = Lock()
+        # symbol -> last price, and open, high, low, close, volume of its bar
+        self.prices: Dict[str, float] = {}
+        self.building: Dict[str, list] = {}
+        # metrics
+        self.sent = {"quote": 0, "trade": 0, "bar": 0}
+        self.orders = 0
+
+    def subscribe(self, symbols: List[str] = None):
+        for symbol in symbols or self.config["symbols"]:
+            if symbol not in self.symbols:
+                self.symbols.append(symbol)
+                self.prices[symbol] = self.config.get("price", 100.0)
+
+    def unsubscribe(self, symbols: List[str] = None):
+        for symbol in symbols or self.config["symbols"]:
+            if symbol in self.symbols:
+                self.symbols.remove(symbol)
+                self.building.pop(symbol, None)
+
+    def activate(self):
+        started = self.clock()
+        while not self.stopEvent.is_set():
+            due = self.step(self.clock() - started)
+            # sleep until the next event is due, at least a millisecond: the
+            # events due meanwhile are sent back to back
+            wait = due - (self.clock() - started)
+            if wait > 0:
+                self.stopEvent.wait(max(wait, 0.001))
+
+    def step(self, elapsed: float) -> float:
+        """
+        Sends every event due ``elapsed`` seconds after the start that was not
+        sent yet, returns when the next one is due. Called by the thread as the
+        clock goes, or directly to generate a deterministic feed.
+        """
+        while elapsed >= (self.minutes + 1) * self.barInterval:
+            self._send_bars(self.startTime + timedelta(minutes=self.minutes))
+            self.minutes += 1
+        self.now = self.startTime + timedelta(seconds=elapsed * 60 / self.barInterval)
+        symbols = len(self.symbols)
+        quotes = int(elapsed * self.quoteRate * symbols)
+        trades = int(elapsed * self.tradeRate * symbols)
+        while quotes > self.sent["quote"] or trades > self.sent["trade"]:
+            # one batch at a time, of the kind furthest behind, so that quotes
+            # and trades fall behind together when the engine cannot keep up
+            if quotes > self.sent["quote"] and (
+                trades <= self.sent["trade"]
+                or self.sent["quote"] / quotes <= self.sent["trade"] / trades
+            ):
+                self._send_quotes(quotes)
+            else:
+                self._send_trades(trades)
+        return min(
+            (self.sent["quote"] + 1) / (self.quoteRate * symbols or 1e-9),
+            (self.sent["trade"] + 1) / (self.tradeRate * symbols or 1e-9),
+            (self.minutes + 1) * self.barInterval,
+        )
+
+    def deactivate(self):
+        self.stopEvent.set()
+
+    def _send_quotes(self, target: int):
+        if self.sent["quote"] < target:
+            timestamp = self.now
+            quotes = []
+            for _ in range(min(self.batchSize, target - self.sent["quote"])):
+                symbol = self.symbols[self.sent["quote"] % len(self.symbols)]
+                quote = Quote(Venue.SYNTHETIC, symbol, timestamp)
+                if latency.ENABLED:
+                    latency.stamp(quote, latency.GATEWAY)
+                price = self._step(symbol)
+                quote.bid_prc = price - 0.01
+                quote.ask_prc = price + 0.01
+                quote.bid_qty = quote.ask_qty = 1.0
+                quotes.append(quote)
+                self.sent["quote"] += 1
+            self.quote_cb(quotes)
+
+    def _send_trades(self, target: int):
+        if self.sent["trade"] < target:
+            timestamp = self.now
+            trades = []
+            for _ in range(min(self.batchSize, target - self.sent["trade"])):
+                symbol = self.symbols[self.sent["trade"] % len(self.symbols)]
+                trade = Trade(Venue.SYNTHETIC, symbol, timestamp)
+                if latency.ENABLED:
+                    latency.stamp(trade, latency.GATEWAY)
+                trade.price = self._step(symbol)
+                trade.volume = self.random.uniform(0.01, 1.0)
+                trade.id = self.sent["trade"]
+                self._fill(symbol, trade.price, trade.volume)
+                trades.append(trade)
+                self.sent["trade"] += 1
+            self.trade_cb(trades)
+
+    def _send_bars(self, timestamp: datetime):
+        bars = BarBatch(Venue.SYNTHETIC)
+        for symbol in self.symbols:
+            # a minute without trades still gets a bar, at the current price
+            open, high, low, close, volume = self.building.pop(
+                symbol, [self._step(symbol)] * 4 + [0.0]
+            )
+            bars.append(symbol, open, high, low, close, volume, timestamp)
+        if latency.ENABLED:
+            latency.stamp_all(bars, latency.GATEWAY)
+        self.sent["bar"] += len(bars)
+        self.bar_cb(bars)
+
+    def _step(self, symbol: str) -> float:
+        price = self.prices[symbol] * (1 + self.random.gauss(0, 0.001))
+        self.prices[symbol] = price
+        return price
+
+    def _fill(self, symbol: str, price: float, volume: float):
+        bar = self.building.get(symbol)
+        if bar is None:
+            self.building[symbol] = [price, price, price, price, volume]
+        else:
+            bar[1] = max(bar[1], price)
+            bar[2] = min(bar[2], price)
+            bar[3] = price
+            bar[4] += volume
+
+    def trade(self, market_order: MarketOrderRequest):
+        if self.orderDelay:
+            time.sleep(self.orderDelay)
+        with self.lock:
+            self.orders += 1
+            return SimpleNamespace(id=self.orders, status="filled")
+
+    def get_account(self):
+        return SimpleNamespace(equity=self.cash, cash=self.cash, buying_power=self.cash)
@@ -1,38 +1,52 @@
 import dash
 from dash import dcc, html
 import plotly.graph_objs as go
-from dash.dependencies import Input, Output
+from dash.dependencies import ALL, Input, Output, State
 import threading
-import time
-import pandas as pd
+from datetime import datetime, timezone
+
+from engine.interface import BASE_TIMEFRAME, Bar
+from gui.series import SymbolSeries
+
+
+def _datetimes(timestamps):
+    return [datetime.fromtimestamp(t, tz=timezone.utc) for t in timestamps]
 
 
 # Function to run in the background to listen for new data
-def listen_for_data(rx, shared_data):
+def listen_for_data(feed, shared_data, capacity):
     while True:
-        if rx.poll():
-            bar = rx.recv()
+        # sleeps until the engine publishes something
+        for event in feed.get_batch():
+            # only 1-minute bars are plotted so far
+            if not isinstance(event, Bar) or event.timeframe != BASE_TIMEFRAME:
+                continue
 
             # Check if the key exists in the dictionary
-            if bar.symbol not in shared_data:
-                # If not, initialize an empty list
-                shared_data[bar.symbol] = []
+            if event.symbol not in shared_data:
+                # If not, initialize a bounded series
+                shared_data[event.symbol] = SymbolSeries(capacity)
 
-            shared_data[bar.symbol].append(bar)
-        time.sleep(0.1)  # Small delay to prevent this loop from hogging CPU
+            shared_data[event.symbol].append(event.timestamp.timestamp(), event.close)
 
 
-def spawn_dashboard(rx):
+def spawn_dashboard(feed, capacity: int = 10000, points: int = 2000):
     """
     Launches a Dash/Flask dashboard that displays live bar data.
 
-    :param rx: The receiving end of a pipe, used to get live bar data.
+    Each symbol keeps its last ``capacity`` bars. Graphs are drawn once from
+    that history downsampled to ``points`` and then only extended with the new
+    bars, keeping at most ``points`` in the browser.
+
+    :param feed: The ``OverwriteRing`` the engine publishes live data to.
     """
     # Shared data storage
     shared_data = {}
 
     # Start a background thread to listen for new data
-    data_thread = threading.Thread(target=listen_for_data, args=(rx, shared_data))
+    data_thread = threading.Thread(
+        target=listen_for_data, args=(feed, shared_data, capacity)
+    )
     data_thread.start()
 
     # Initialize Dash app
@@ -42,52 +56,61 @@ def spawn_dashboard(rx):
     app.layout = html.Div(
         [
             html.Div(id="graphs-container"),
+            # seq of the last point drawn per symbol, for this browser session
+            dcc.Store(id="drawn", data={}),
             dcc.Interval(
                 id="graph-update", interval=1000, n_intervals=0  # in milliseconds
             ),
         ]
     )
 
-    # Callback to dynamically generate graphs based on symbols
-    @app.callback(
-        Output("graphs-container", "children"), [Input("graph-update", "n_intervals")]
-    )
-    def update_graphs(n):
-        graphs = []
-        for symbol in shared_data.keys():
-            graph = dcc.Graph(
-                id={"type": "dynamic-graph", "index": symbol}, animate=True
-            )
-            graphs.append(graph)
-        return graphs
-
-    # Callback for updating each individual graph
+    def figure(symbol, x, y):
+        trace = go.Scatter(x=_datetimes(x), y=y, mode="lines+markers")
+        layout = go.Layout(
+            title=symbol,
+            xaxis=dict(title="Timestamp"),
+            yaxis=dict(title="Close Price"),
+        )
+        return {"data": [trace], "layout": layout}
+
+    # Single callback writing the drawn seqs: it redraws the graphs when the
+    # set of symbols changes and appends the new points to them otherwise
     @app.callback(
-        Output({"type": "dynamic-graph", "index": dash.dependencies.ALL}, "figure"),
-        [Input("graph-update", "n_intervals")],
+        Output("graphs-container", "children"),
+        Output({"type": "dynamic-graph", "index": ALL}, "extendData"),
+        Output("drawn", "data"),
+        Input("graph-update", "n_intervals"),
+        State("drawn", "data"),
     )
-    def update_individual_graphs(n):
-        figures = []
-        for symbol, bars in shared_data.items():
-            df = pd.DataFrame(
-                [vars(bar) for bar in bars]
-            )  # Convert Bar objects to DataFrame
-
-            # Create the Plotly Graph object
-            trace = go.Scatter(
-                x=df["timestamp"],
-                y=df["close"],  # Assuming you want to plot the closing price
-                mode="lines+markers",
-            )
-
-            layout = go.Layout(
-                title=symbol,
-                xaxis=dict(title="Timestamp"),
-                yaxis=dict(title="Close Price"),
-            )
-
-            figures.append({"data": [trace], "layout": layout})
-        return figures
+    def update_graphs(n, drawn):
+        shown = dash.callback_context.outputs_list[1]
+        symbols = sorted(shared_data)
+        if symbols != sorted(drawn):
+            graphs = []
+            drawn = {}
+            for symbol in symbols:
+                x, y, drawn[symbol] = shared_data[symbol].snapshot(points)
+                graphs.append(
+                    dcc.Graph(
+                        id={"type": "dynamic-graph", "index": symbol},
+                        figure=figure(symbol, x, y),
+                    )
+                )
+            return graphs, [dash.no_update] * len(shown), drawn
+        updates = []
+        for output in shown:
+            symbol = output["id"]["index"]
+            if symbol not in drawn:
+                updates.append(dash.no_update)
+                continue
+            x, y, drawn[symbol] = shared_data[symbol].since(drawn[symbol])
+            if not y:
+                updates.append(dash.no_update)
+                continue
+            updates.append(({"x": [_datetimes(x)], "y": [y]}, [0], points))
+        if not any(u is not dash.no_update for u in updates):
+            return dash.no_update, updates, dash.no_update
+        return dash.no_update, updates, drawn
 
     # Running the server
     app.run_server(debug=True, use_reloader=False)
@@ -0,0 +1,83 @@
+# standard
+from collections import deque
+from threading import Lock
+from typing import List, Tuple
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of ``threshold`` points of ``(x, y)`` picked with the
+    Largest-Triangle-Three-Buckets algorithm, which keeps the visual shape of
+    a line (peaks and troughs included) with far fewer points. The first and
+    last points are always kept.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    # the points between the first and the last split in threshold - 2 buckets
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    indices = np.empty(threshold, dtype=int)
+    indices[0] = a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        # twice the area of the triangle each candidate makes with the
+        # previously selected point and the next bucket's average
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+class SymbolSeries:
+    """
+    The last ``capacity`` closes of a symbol as plotted by the dashboard.
+
+    Points are numbered in arrival order so each browser session can ask for
+    only what it has not drawn yet (``since``); older points fall off the ring
+    and the full view is downsampled (``snapshot``), so memory and render cost
+    stay constant however long the dashboard runs.
+    """
+
+    def __init__(self, capacity: int = 10000):
+        self.lock = Lock()
+        # epoch seconds, numeric for downsampling
+        self.timestamps = deque(maxlen=capacity)
+        self.closes = deque(maxlen=capacity)
+        # number of points appended so far
+        self.seq = 0
+
+    def append(self, timestamp: float, close: float):
+        with self.lock:
+            self.timestamps.append(timestamp)
+            self.closes.append(close)
+            self.seq += 1
+
+    def since(self, seq: int) -> Tuple[List[float], List[float], int]:
+        """Points appended after ``seq`` still held, and the current seq."""
+        with self.lock:
+            n = min(self.seq - seq, len(self.closes))
+            start = len(self.closes) - n
+            timestamps = [self.timestamps[i] for i in range(start, len(self.closes))]
+            closes = [self.closes[i] for i in range(start, len(self.closes))]
+            return timestamps, closes, self.seq
+
+    def snapshot(self, points: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """Every point held, downsampled to ``points``, and the current seq."""
+        with self.lock:
+            x = np.array(self.timestamps)
+            y = np.array(self.closes)
+            seq = self.seq
+        keep = lttb(x, y, points)
+        return x[keep], y[keep], seq
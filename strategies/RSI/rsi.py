@@ -1,15 +1,14 @@
 import logging
-import queue
-import sqlite3
 from typing import List, Callable
 
-from data.indicators import add_RSI_indic
-from engine.interface import Signal, Exposure, Bar
+from data.history import HistoryLoader
+from data.indicators import WilderRSI
+from engine.account import AccountService
+from engine.aggregator import load_bars
+from engine.marketData import MarketDataStore
+from engine.interface import Signal, Exposure, Bar, Quote, Trade
 from strategies.strategy import Strategy
 from threading import Event
-import pandas as pd
-from collections import deque
-from alpaca.trading.client import TradingClient
 
 
 class RSIStrategy(Strategy):
@@ -19,49 +18,48 @@ class RSIStrategy(Strategy):
         signal_callback: Callable[[List[Signal]], None],
         log: logging.Logger,
         stopEvent: Event,
+        history: HistoryLoader,
+        account: AccountService,
+        store: MarketDataStore = None,
     ):
-        super().__init__(config, signal_callback, log, stopEvent)
-        self.data_rsi = deque(maxlen=20160)  # 60min * 24h * 14d = 20160
-        self.rsi = 0.5
+        super().__init__(
+            config, signal_callback, log, stopEvent, history, account, store
+        )
+        # window in bars of the strategy's timeframe, default for 1m bars:
+        # 60min * 24h * 14d = 20160
+        self.rsi = WilderRSI(config.get("rsi_window", 20160))
+        # history replayed at startup to settle the smoothed averages
+        self.warmup = config.get("warmup", 4 * self.rsi.window)
         self.buy = True
         self.sell = True
         self.init_deque()
 
-    def run(self):
-        self.log.info(f"{self.config['name']} started")
-        while not self.stopEvent.is_set():
-            try:
-                bar = self.barBuffer.get(timeout=1)
-            except queue.Empty:
-                pass
-            else:
-                self.process_bar(bar)
-        self.log.info(f"{self.config['name']} stopped")
+    def handle_quotes(self, quotes: List[Quote]):
+        pass  # do not consume quotes
+
+    def handle_trades(self, trades: List[Trade]):
+        pass  # do not consume trades
 
     def init_deque(self):
-        conn = sqlite3.connect("./data/db_crypto.db")
-        query = """
-        SELECT *
-        FROM {table}
-        WHERE symbol == {symbol}
-        """.format(
-            table="bars",
-            # 0 to get the first symbol
-            symbol=self.config["symbols"][0],
+        # 0 to get the first symbol
+        closes = load_bars(
+            self.history,
+            self.config["symbols"][0],
+            self.warmup,
+            self.timeframe,
+            ("close",),
         )
-        df = pd.read_sql_query(query, conn)
-        df.sort_values(by=["timestamp"], inplace=True)
-        # 60min * 24h * 5d = 20160
-        self.data_rsi.extend(df["close"].tail(20160))
+        self.rsi.extend(closes["close"])
 
     def calculate_position_size(self, price, side):
-        account = TradingClient(
-            api_key=self.config["api_key"],
-            secret_key=self.config["secret_key"],
-            paper=self.config["paper"],
-        ).get_account()
-        self.equity = float(account.equity)
-        self.cash = float(account.cash)
+        account = self.account.snapshot()
+        if account is None:
+            self.log.warning(
+                f"{self.config['name']} has no account to size a {side} signal"
+            )
+            return None
+        self.equity = account.equity
+        self.cash = account.cash
 
         if side == "buy":
             capital = self.cash
@@ -72,34 +70,31 @@ class RSIStrategy(Strategy):
         return position_size
 
     def process_bar(self, bar: Bar):
-        self.log.debug(f"strategy processing bar: {bar}")
-
-        self.data_rsi.append(bar.close)
+        self.log.debug("strategy processing bar: %s", bar)
 
-        if len(self.data_rsi) == self.data_rsi.maxlen:
-            # Calculate RSI
-            df = pd.DataFrame(list(self.data_rsi), columns=["close"])
-            # 60min * 24h * 14d = 20160
-            rsi = add_RSI_indic(df, column_name="close", window_length=20160)
+        self.rsi.append(bar.close)
 
+        if self.rsi.ready():
             # Current RSI value
-            current_rsi = rsi.iloc[-1].values[0]
+            current_rsi = self.rsi.value()
 
             # Determine the trading signal
             # RSI below 30%, potential buy signal
             if current_rsi <= 30 and self.buy:
                 quantity = self.calculate_position_size(bar.close, "buy")
-                signal = Signal(
-                    bar.venue, bar.symbol, Exposure.LONG, quantity, bar.close
-                )
-                self.log.debug(
-                    "{name} emitting Buy signal: {signal}".format(
-                        name=self.config["name"],
-                        signal=signal,
+                # skipped without an account to size it, retried on the next bar
+                if quantity is not None:
+                    signal = Signal(
+                        bar.venue, bar.symbol, Exposure.LONG, quantity, bar.close
                     )
-                )
-                self._emit_signals([signal])
-                self.buy = False
+                    self.log.debug(
+                        "{name} emitting Buy signal: {signal}".format(
+                            name=self.config["name"],
+                            signal=signal,
+                        )
+                    )
+                    self._emit_signals([signal])
+                    self.buy = False
             # RSI above 30%, reset buy signal
             elif current_rsi > 30 and not self.buy:
                 self.buy = True
@@ -107,17 +102,18 @@ class RSIStrategy(Strategy):
             # RSI above 70%, potential sell signal
             if current_rsi >= 70 and self.sell:
                 quantity = self.calculate_position_size(bar.close, "sell")
-                signal = Signal(
-                    bar.venue, bar.symbol, Exposure.SHORT, quantity, bar.close
-                )
-                self.log.debug(
-                    "{name} emitting Sell signal: {signal}".format(
-                        name=self.config["name"],
-                        signal=signal,
+                if quantity is not None:
+                    signal = Signal(
+                        bar.venue, bar.symbol, Exposure.SHORT, quantity, bar.close
+                    )
+                    self.log.debug(
+                        "{name} emitting Sell signal: {signal}".format(
+                            name=self.config["name"],
+                            signal=signal,
+                        )
                     )
-                )
-                self._emit_signals([signal])
-                self.sell = False
+                    self._emit_signals([signal])
+                    self.sell = False
             # RSI below 70%, reset sell signal
             elif current_rsi < 70 and not self.sell:
                 self.sell = True
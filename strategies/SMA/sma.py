@@ -1,15 +1,13 @@
 import logging
-import queue
-import sqlite3
 from typing import List, Callable
 
-from engine.interface import Signal, Exposure, Bar
+from data.history import HistoryLoader
+from data.indicators import RollingMean
+from engine.account import AccountService
+from engine.marketData import MarketDataStore
+from engine.interface import Signal, Exposure, Bar, Quote, Trade
 from strategies.strategy import Strategy
 from threading import Event
-import pandas as pd
-import numpy as np
-from collections import deque
-from alpaca.trading.client import TradingClient
 
 
 class SMAStrategy(Strategy):
@@ -19,52 +17,53 @@ class SMAStrategy(Strategy):
         signal_callback: Callable[[List[Signal]], None],
         log: logging.Logger,
         stopEvent: Event,
+        history: HistoryLoader,
+        account: AccountService,
+        store: MarketDataStore = None,
     ):
-        super().__init__(config, signal_callback, log, stopEvent)
-        # 60min * 24h * 5d = 7200
-        self.short_ma = deque(maxlen=7200)
-        # 60min * 24h * 20d = 28800
-        self.long_ma = deque(maxlen=28800)
+        super().__init__(
+            config, signal_callback, log, stopEvent, history, account, store
+        )
+        # windows in bars of the strategy's timeframe, defaults for 1m bars:
+        # 60min * 24h * 5d = 7200 and 60min * 24h * 20d = 28800
+        self.short_ma = RollingMean(config.get("short_window", 7200))
+        self.long_ma = RollingMean(config.get("long_window", 28800))
         self.last_buy = False
         self.init_deque()
 
-    def run(self):
-        self.log.info(f"{self.config['name']} started")
-        while not self.stopEvent.is_set():
-            try:
-                bar = self.barBuffer.get(timeout=1)
-            except queue.Empty:
-                pass
-            else:
-                self.process_bar(bar)
-        self.log.info(f"{self.config['name']} stopped")
+    def handle_quotes(self, quotes: List[Quote]):
+        pass  # do not consume quotes
+
+    def handle_trades(self, trades: List[Trade]):
+        pass  # do not consume trades
 
     def init_deque(self):
-        conn = sqlite3.connect("./data/db_crypto.db")
-        query = """
-        SELECT *
-        FROM {table}
-        WHERE symbol == {symbol}
-        """.format(
-            table="bars",
-            # 0 to get the first symbol
-            symbol=self.config["symbols"][0],
+        # the closes live in the shared store, the means only keep their sums
+        for symbol in self.config["symbols"]:
+            self.store.require(symbol, self.long_ma.window + 1, self.timeframe)
+        # 0 to get the first symbol
+        closes = self.store.window(
+            self.config["symbols"][0], self.long_ma.window, timeframe=self.timeframe
         )
-        df = pd.read_sql_query(query, conn)
-        df.sort_values(by=["timestamp"], inplace=True)
-        # 60min * 24h * 5d = 7200
-        self.short_ma.extend(df["close"].tail(7200))
-        # 60min * 24h * 20d = 28800
-        self.long_ma.extend(df["close"].tail(28800))
+        self.short_ma.seed(closes)
+        self.long_ma.seed(closes)
+
+    def slide(self, ma: RollingMean, closes):
+        # closes ends with the new bar and starts with the evicted one if any
+        if len(closes) > ma.window:
+            ma.slide(closes[-1], closes[0], closes[1:])
+        else:
+            ma.slide(closes[-1], None, closes)
 
     def calculate_position_size(self, price, side):
-        account = TradingClient(
-            api_key=self.config["api_key"],
-            secret_key=self.config["secret_key"],
-            paper=self.config["paper"],
-        ).get_account()
-        self.equity = float(account.equity)
-        self.cash = float(account.cash)
+        account = self.account.snapshot()
+        if account is None:
+            self.log.warning(
+                f"{self.config['name']} has no account to size a {side} signal"
+            )
+            return None
+        self.equity = account.equity
+        self.cash = account.cash
 
         if side == "buy":
             capital = self.cash
@@ -75,44 +74,48 @@ class SMAStrategy(Strategy):
         return position_size
 
     def process_bar(self, bar: Bar):
-        self.log.debug(f"strategy processing bar: {bar}")
+        self.log.debug("strategy processing bar: %s", bar)
 
-        self.short_ma.append(bar.close)
-        self.long_ma.append(bar.close)
+        seq = self._store_bar(bar)
+        closes = self.store.window(
+            bar.symbol, self.long_ma.window + 1, end=seq + 1, timeframe=bar.timeframe
+        )
+        self.slide(self.short_ma, closes[-self.short_ma.window - 1 :])
+        self.slide(self.long_ma, closes)
 
-        if (
-            len(self.short_ma) == self.short_ma.maxlen
-            and len(self.long_ma) == self.long_ma.maxlen
-        ):
-            short_sma = np.mean(self.short_ma)
-            long_sma = np.mean(self.long_ma)
+        if self.short_ma.full() and self.long_ma.full():
+            short_sma = self.short_ma.mean()
+            long_sma = self.long_ma.mean()
 
             # Determine the trading signal
             if short_sma > long_sma and not self.last_buy:
                 # Short-term SMA crosses above long-term SMA - Buy Signal
                 quantity = self.calculate_position_size(bar.close, "buy")
-                signal = Signal(
-                    bar.venue, bar.symbol, Exposure.LONG, quantity, bar.close
-                )
-                self.log.debug(
-                    "{name} emitting Buy signal: {signal}".format(
-                        name=self.config["name"],
-                        signal=signal,
+                # skipped without an account to size it, retried on the next bar
+                if quantity is not None:
+                    signal = Signal(
+                        bar.venue, bar.symbol, Exposure.LONG, quantity, bar.close
+                    )
+                    self.log.debug(
+                        "{name} emitting Buy signal: {signal}".format(
+                            name=self.config["name"],
+                            signal=signal,
+                        )
                     )
-                )
-                self._emit_signals([signal])
-                self.last_buy = True
+                    self._emit_signals([signal])
+                    self.last_buy = True
             elif short_sma < long_sma and self.last_buy:
                 # Short-term SMA crosses below long-term SMA - Sell Signal
                 quantity = self.calculate_position_size(bar.close, "sell")
-                signal = Signal(
-                    bar.venue, bar.symbol, Exposure.SHORT, quantity, bar.close
-                )
-                self.log.debug(
-                    "{name} emitting Sell signal: {signal}".format(
-                        name=self.config["name"],
-                        signal=signal,
+                if quantity is not None:
+                    signal = Signal(
+                        bar.venue, bar.symbol, Exposure.SHORT, quantity, bar.close
+                    )
+                    self.log.debug(
+                        "{name} emitting Sell signal: {signal}".format(
+                            name=self.config["name"],
+                            signal=signal,
+                        )
                     )
-                )
-                self._emit_signals([signal])
-                self.last_buy = False
+                    self._emit_signals([signal])
+                    self.last_buy = False
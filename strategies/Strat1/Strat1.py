@@ -1,6 +1,8 @@
 import logging
-import queue
 from typing import List, Callable
+from data.history import HistoryLoader
+from engine.account import AccountService
+from engine.marketData import MarketDataStore
 from engine.interface import Trade, Quote, Signal
 from strategies.strategy import Strategy
 from threading import Event
@@ -13,23 +15,17 @@ class Strat1Strategy(Strategy):
         signal_callback: Callable[[List[Signal]], None],
         log: logging.Logger,
         stopEvent: Event,
+        history: HistoryLoader,
+        account: AccountService,
+        store: MarketDataStore = None,
     ):
-        super().__init__(config, signal_callback, log, stopEvent)
+        super().__init__(
+            config, signal_callback, log, stopEvent, history, account, store
+        )
 
     def handle_trades(self, trades: List[Trade]):
         pass  # do not consume trades
 
-    def run(self):
-        self.log.info(f"{self.config['name']} started")
-        while not self.stopEvent.is_set():
-            try:
-                quote = self.quoteBuffer.get(timeout=1)
-            except queue.Empty:
-                pass
-            else:
-                self.process_quote(quote)
-        self.log.info(f"{self.config['name']} stopped")
-
     def process_quote(self, quote: Quote):
-        self.log.debug(f"strategy processing quote: {quote}")
+        self.log.debug("strategy processing quote: %s", quote)
         pass
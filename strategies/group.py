@@ -0,0 +1,52 @@
+# standard
+import logging
+from threading import Condition, Event, Thread
+from typing import List
+
+# local
+from strategies.strategy import Strategy
+
+
+class StrategyGroup(Thread):
+    """
+    Runs several strategies on a single thread.
+
+    The strategies' mailboxes all signal the group's condition, so the thread
+    sleeps until any of them receives something and then dispatches every
+    strategy with pending input. Strategies set ``thread: <group name>`` in
+    their configuration to share one.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        strategies: List[Strategy],
+        log: logging.Logger,
+        stopEvent: Event,
+    ):
+        super().__init__(name=name)
+        self.strategies = strategies
+        self.log = log
+        self.stopEvent = stopEvent
+        self.wakeup = Condition()
+        for strategy in strategies:
+            strategy.share_wakeup(self.wakeup)
+
+    def pending(self) -> bool:
+        return any(strategy.pending() for strategy in self.strategies)
+
+    def wake(self):
+        with self.wakeup:
+            self.wakeup.notify_all()
+
+    def run(self):
+        names = ", ".join(s.name for s in self.strategies)
+        self.log.info(f"{self.name} started: {names}")
+        while not self.stopEvent.is_set():
+            with self.wakeup:
+                while not self.pending() and not self.stopEvent.is_set():
+                    self.wakeup.wait()
+            for strategy in self.strategies:
+                if strategy.pending():
+                    strategy.dispatch()
+        self.log.info(f"{self.name} stopped")
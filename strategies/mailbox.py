@@ -0,0 +1,78 @@
+# standard
+from collections import deque
+from threading import Condition
+from typing import Dict, Iterable, List, Optional
+
+
+class Mailbox:
+    """
+    Inbox of market data for one strategy, delivered in batches.
+
+    Producers hand over lists with ``put_many`` and the strategy takes
+    everything that accumulated since its last wakeup with ``get_batch``, so a
+    burst costs one lock round trip per side instead of one per item. Several
+    mailboxes may share ``condition`` so their owner can wait on all of them.
+    """
+
+    def __init__(self, condition: Optional[Condition] = None):
+        self.condition = condition if condition is not None else Condition()
+        self.items = deque()
+        self.dropped = 0
+
+    def _add(self, items: Iterable):
+        self.items.extend(items)
+
+    def _take(self) -> List:
+        batch = list(self.items)
+        self.items.clear()
+        return batch
+
+    def put_many(self, items: Iterable):
+        with self.condition:
+            self._add(items)
+            self.condition.notify_all()
+
+    def get_batch(self, timeout: Optional[float] = None) -> List:
+        """Everything queued, waiting up to ``timeout`` seconds for something."""
+        with self.condition:
+            if not self.qsize():
+                self.condition.wait(timeout)
+            return self._take()
+
+    def drain(self) -> List:
+        """Everything queued, without waiting."""
+        with self.condition:
+            return self._take()
+
+    def qsize(self) -> int:
+        return len(self.items)
+
+
+class ConflatingMailbox(Mailbox):
+    """
+    Mailbox keeping only the latest item per symbol: an item replaces the one
+    of the same symbol still waiting, which is counted in ``dropped``. A slow
+    consumer therefore always sees the current market state and its backlog is
+    bounded by the number of symbols.
+    """
+
+    def __init__(self, condition: Optional[Condition] = None):
+        super().__init__(condition)
+        self.items: Dict[str, object] = {}
+
+    def _add(self, items: Iterable):
+        for item in items:
+            if item.symbol in self.items:
+                self.dropped += 1
+            self.items[item.symbol] = item
+
+    def _take(self) -> List:
+        batch = list(self.items.values())
+        self.items.clear()
+        return batch
+
+
+mailboxFactory = {
+    "fifo": Mailbox,
+    "conflate": ConflatingMailbox,
+}
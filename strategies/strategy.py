@@ -1,12 +1,16 @@
 # standard
 import logging
 from typing import List, Callable
-from abc import ABC, abstractmethod
-from queue import SimpleQueue
-from threading import Thread, Event
+from abc import ABC
+from threading import Condition, Thread, Event
 
 # local
-from engine.interface import Trade, Quote, Signal, Bar
+from data.history import HistoryLoader
+from engine import latency
+from engine.account import AccountService
+from engine.marketData import MarketDataStore
+from engine.interface import BASE_TIMEFRAME, Trade, Quote, Signal, Bar
+from strategies.mailbox import Mailbox, mailboxFactory
 
 
 class Strategy(ABC, Thread):
@@ -16,31 +20,140 @@ class Strategy(ABC, Thread):
         signal_callback: Callable[[List[Signal]], None],
         log: logging.Logger,
         stopEvent: Event,
+        history: HistoryLoader,
+        account: AccountService,
+        store: MarketDataStore = None,
     ):
         super().__init__(name=f"{config['name']}")
         self.config = config
         self.log = log
         self.signal_cb = signal_callback
-        self.quoteBuffer = SimpleQueue()
-        self.tradeBuffer = SimpleQueue()
-        self.barBuffer = SimpleQueue()
+        # one condition for all the mailboxes: any of them wakes the strategy
+        self.wakeup = Condition()
+        # quotes can be conflated to the latest per symbol, see mailbox.py
+        self.quoteBuffer: Mailbox = mailboxFactory[config.get("quote_mailbox", "fifo")](
+            self.wakeup
+        )
+        self.tradeBuffer = Mailbox(self.wakeup)
+        self.barBuffer = Mailbox(self.wakeup)
         self.stopEvent = stopEvent
+        # bars are routed to the strategy for this timeframe only
+        self.timeframe = config.get("timeframe", BASE_TIMEFRAME)
+        # warm-start reads, shared with the other strategies when engine-owned
+        self.history = history
+        # cached account state, refreshed by its owner off the strategy thread
+        self.account = account
+        # latest bars, shared with the other strategies and appended by the
+        # engine when engine-owned, otherwise appended by this strategy
+        self.privateStore = store is None
+        self.store = MarketDataStore(self.history) if store is None else store
+        # event being processed, whose stamps its signals carry
+        self.current = None
 
     def handle_quotes(self, quotes: List[Quote]):
-        for quote in quotes:
-            self.quoteBuffer.put(quote)
+        self.quoteBuffer.put_many(quotes)
+        if latency.ENABLED:
+            latency.gauge(f"{self.name} quotes", self.quoteBuffer.qsize())
 
     def handle_trades(self, trades: List[Trade]):
-        for trade in trades:
-            self.tradeBuffer.put(trade)
+        self.tradeBuffer.put_many(trades)
+        if latency.ENABLED:
+            latency.gauge(f"{self.name} trades", self.tradeBuffer.qsize())
 
     def handle_bars(self, bars: List[Bar]):
-        for bar in bars:
-            self.barBuffer.put(bar)
+        self.barBuffer.put_many(bars)
+        if latency.ENABLED:
+            latency.gauge(f"{self.name} bars", self.barBuffer.qsize())
 
-    def _emit_signals(self, signals: List[Signal]):
-        self.signal_cb(signals)
+    def share_wakeup(self, wakeup: Condition):
+        """Signals ``wakeup`` instead, to be waited on along other strategies."""
+        self.wakeup = wakeup
+        for mailbox in (self.quoteBuffer, self.tradeBuffer, self.barBuffer):
+            mailbox.condition = wakeup
+
+    def pending(self) -> bool:
+        return bool(
+            self.quoteBuffer.qsize()
+            or self.tradeBuffer.qsize()
+            or self.barBuffer.qsize()
+        )
+
+    def wake(self):
+        """Wakes the waiting thread up, e.g. after ``stopEvent`` is set."""
+        with self.wakeup:
+            self.wakeup.notify_all()
+
+    def dispatch(self):
+        """Processes everything received since the last dispatch."""
+        if latency.ENABLED:
+            self._dispatch_timed()
+            return
+        for quote in self.quoteBuffer.drain():
+            self.process_quote(quote)
+        for trade in self.tradeBuffer.drain():
+            self.process_trade(trade)
+        for bar in self.barBuffer.drain():
+            self.process_bar(bar)
+
+    def _dispatch_timed(self):
+        for name, mailbox, process in (
+            ("quote", self.quoteBuffer, self.process_quote),
+            ("trade", self.tradeBuffer, self.process_trade),
+            ("bar", self.barBuffer, self.process_bar),
+        ):
+            for event in mailbox.drain():
+                dequeued = latency.now()
+                self.current = event
+                process(event)
+                processed = latency.now()
+                stamps = event.stamps
+                if stamps:
+                    # the stages shared with other strategies are recorded once
+                    # by the engine, only this strategy's are recorded here
+                    latency.record(
+                        [
+                            stamps[-1],
+                            (latency.DEQUEUED, dequeued),
+                            (latency.PROCESSED, processed),
+                        ],
+                        name,
+                        total=False,
+                    )
+                    latency.observe(
+                        latency.transition(name, stamps[0][0], latency.PROCESSED),
+                        processed - stamps[0][1],
+                    )
+        self.current = None
 
-    @abstractmethod
     def run(self):
-        raise NotImplementedError
+        self.log.info(f"{self.config['name']} started")
+        while not self.stopEvent.is_set():
+            with self.wakeup:
+                while not self.pending() and not self.stopEvent.is_set():
+                    self.wakeup.wait()
+            self.dispatch()
+        self.log.info(
+            f"{self.config['name']} stopped, "
+            f"{self.quoteBuffer.dropped} quotes conflated"
+        )
+
+    def process_quote(self, quote: Quote):
+        pass  # override to consume quotes
+
+    def process_trade(self, trade: Trade):
+        pass  # override to consume trades
+
+    def process_bar(self, bar: Bar):
+        pass  # override to consume bars
+
+    def _store_bar(self, bar: Bar) -> int:
+        """Seq of ``bar`` in ``self.store``, storing it first if the store is ours."""
+        return self.store.append(bar) if self.privateStore else bar.seq
+
+    def _emit_signals(self, signals: List[Signal]):
+        if latency.ENABLED:
+            stamps = self.current.stamps if self.current is not None else None
+            emitted = (latency.SIGNAL, latency.now())
+            for signal in signals:
+                signal.stamps = [*(stamps or ()), emitted]
+        self.signal_cb(signals)
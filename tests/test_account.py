@@ -0,0 +1,62 @@
+import logging
+import time
+import unittest
+from types import SimpleNamespace
+
+from engine.account import AccountService
+
+
+class FakeTradingClient:
+    def __init__(self):
+        self.calls = 0
+        self.cash = 500.0
+        self.down = False
+
+    def get_account(self):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("account unavailable")
+        return SimpleNamespace(equity="1000", cash=str(self.cash), buying_power="2000")
+
+
+class TestAccountService(unittest.TestCase):
+    def test_snapshot_is_cached(self):
+        client = FakeTradingClient()
+        account = AccountService(client, logging.getLogger("test"))
+        account.refresh()
+        self.assertEqual(account.snapshot().cash, 500.0)
+        self.assertEqual(account.snapshot().equity, 1000.0)
+        self.assertEqual(client.calls, 1)
+
+    def test_snapshot_never_fetches(self):
+        client = FakeTradingClient()
+        client.down = True
+        account = AccountService(client, logging.getLogger("test"))
+        account.refresh()
+        # the failed refresh is logged, the caller gets no account
+        self.assertIsNone(account.snapshot())
+        self.assertEqual(client.calls, 1)
+        self.assertTrue(account.refreshEvent.is_set())
+
+    def test_refresh_on_request(self):
+        client = FakeTradingClient()
+        account = AccountService(client, logging.getLogger("test"), interval=60)
+        account.start()
+        try:
+            deadline = time.monotonic() + 5
+            while account.latest is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            client.cash = 250.0
+            account.request_refresh()
+            while account.latest.cash != 250.0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(account.snapshot().cash, 250.0)
+            self.assertEqual(client.calls, 2)
+        finally:
+            account.stop()
+            account.join(timeout=5)
+        self.assertFalse(account.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from data.history import ArrayHistory
+from data.journal import decode, encode
+from engine.aggregator import SEED_COLUMNS, BarAggregator, load_bars, resample
+from engine.interface import Bar, Trade, Venue
+from engine.marketData import FIELDS, MarketDataStore
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def bar(i, close=None):
+    close = float(i) if close is None else close
+    ts = START + timedelta(minutes=i)
+    return Bar(Venue.ALPACA, "BTC/USD", close, close + 1, close - 1, close, 1.0, ts)
+
+
+def rows(n):
+    out = np.zeros(n, dtype=[(f, "i8" if f == "timestamp" else float) for f in FIELDS])
+    out["timestamp"] = [
+        int((START + timedelta(minutes=i)).timestamp()) * 10**9 for i in range(n)
+    ]
+    for field in ("open", "close"):
+        out[field] = np.arange(n)
+    out["high"] = np.arange(n) + 1
+    out["low"] = np.arange(n) - 1
+    out["volume"] = 1.0
+    return out
+
+
+class TestBarAggregator(unittest.TestCase):
+    def test_completes_on_the_last_minute(self):
+        aggregator = BarAggregator(["1m", "5m", "15m"])
+        completed = [a for i in range(15) for a in aggregator.add_bar(bar(i))]
+        self.assertEqual([a.timeframe for a in completed], ["5m"] * 3 + ["15m"])
+        first = completed[0]
+        self.assertEqual(first.timestamp, START)
+        self.assertEqual(
+            (first.open, first.high, first.low, first.close, first.volume),
+            (0.0, 5.0, -1.0, 4.0, 5.0),
+        )
+        # the 15m bar comes after the 5m bar completed by the same minute
+        self.assertEqual(completed[-1].close, 14.0)
+        self.assertEqual(completed[-1].volume, 15.0)
+
+    def test_missing_last_minute_closes_on_next_interval(self):
+        aggregator = BarAggregator(["5m"])
+        for i in range(4):
+            self.assertEqual(aggregator.add_bar(bar(i)), [])
+        completed = aggregator.add_bar(bar(6))
+        self.assertEqual([(a.timestamp, a.close) for a in completed], [(START, 3.0)])
+        # late minute of the interval already completed
+        self.assertEqual(aggregator.add_bar(bar(4)), [])
+        self.assertEqual(aggregator.late, 1)
+
+    def test_trades_complete_on_flush(self):
+        aggregator = BarAggregator(["5m"], source="trades")
+        for i, price in enumerate([10.0, 12.0, 9.0]):
+            trade = Trade(Venue.ALPACA, "BTC/USD", START + timedelta(minutes=i))
+            trade.price, trade.volume = price, 2.0
+            self.assertEqual(aggregator.add_trade(trade), [])
+        self.assertEqual(aggregator.add_bar(bar(0)), [])
+        self.assertEqual(aggregator.flush(START + timedelta(minutes=4)), [])
+        (completed,) = aggregator.flush(START + timedelta(minutes=5))
+        self.assertEqual(
+            (completed.open, completed.high, completed.low, completed.close),
+            (10.0, 12.0, 9.0, 9.0),
+        )
+        self.assertEqual(completed.volume, 6.0)
+
+    def test_restart_mid_interval_drops_the_partial_bar(self):
+        aggregator = BarAggregator(["1h"])
+        completed = [a for i in range(25, 120) for a in aggregator.add_bar(bar(i))]
+        self.assertEqual([a.timestamp for a in completed], [START + timedelta(hours=1)])
+        self.assertEqual(completed[0].volume, 60.0)
+        self.assertEqual(aggregator.dropped, 1)
+
+    def test_restart_mid_interval_resumes_from_history(self):
+        aggregator = BarAggregator(["15m", "1h"])
+        aggregator.seed(Venue.ALPACA, "BTC/USD", rows(25)[list(SEED_COLUMNS)])
+        # the last minute stored is sent again by the stream
+        completed = [a for i in range(24, 60) for a in aggregator.add_bar(bar(i))]
+        self.assertEqual([a.timeframe for a in completed], ["15m"] * 3 + ["1h"])
+        (hourly,) = resample(rows(60), "1h")
+        self.assertEqual(
+            (
+                completed[-1].open,
+                completed[-1].high,
+                completed[-1].low,
+                completed[-1].close,
+                completed[-1].volume,
+            ),
+            (
+                hourly["open"],
+                hourly["high"],
+                hourly["low"],
+                hourly["close"],
+                hourly["volume"],
+            ),
+        )
+        self.assertEqual((aggregator.late, aggregator.dropped), (0, 0))
+
+    def test_gap_after_history_drops_the_partial_bars(self):
+        aggregator = BarAggregator(["1h"])
+        aggregator.seed(Venue.ALPACA, "BTC/USD", rows(20))
+        completed = [a for i in range(25, 120) for a in aggregator.add_bar(bar(i))]
+        self.assertEqual([a.timestamp for a in completed], [START + timedelta(hours=1)])
+        self.assertEqual(aggregator.dropped, 1)
+
+    def test_resample_matches_live_aggregation(self):
+        aggregator = BarAggregator(["15m"])
+        live = [a for i in range(62) for a in aggregator.add_bar(bar(i))]
+        # the history starts and ends mid-interval
+        resampled = resample(rows(62)[3:], "15m")
+        self.assertEqual(list(resampled["close"]), [a.close for a in live[1:]])
+        self.assertEqual(list(resampled["high"]), [a.high for a in live[1:]])
+        self.assertEqual(list(resampled["volume"]), [15.0, 15.0, 15.0])
+
+    def test_store_warm_starts_longer_timeframes(self):
+        history = ArrayHistory({"BTC/USD": rows(300)})
+        self.assertEqual(
+            list(load_bars(history, "BTC/USD", 2, "1h", ("close",))["close"]),
+            [239.0, 299.0],
+        )
+        store = MarketDataStore(history)
+        store.require("BTC/USD", 3, "1h")
+        self.assertEqual(
+            list(store.window("BTC/USD", 3, timeframe="1h")), [179.0, 239.0, 299.0]
+        )
+        # 1m bars and hourly bars are separate streams
+        self.assertNotIn("BTC/USD", store)
+        aggregator = BarAggregator(["1h"])
+        (hourly,) = [a for i in range(300, 360) for a in aggregator.add_bar(bar(i))]
+        self.assertEqual(store.append(hourly), 3)
+        self.assertEqual(store.window("BTC/USD", 1, timeframe="1h")[0], 359.0)
+
+    def test_journal_keeps_timeframe(self):
+        aggregated = bar(0)
+        aggregated.timeframe = "1h"
+        self.assertEqual(decode(encode(aggregated)).timeframe, "1h")
+        self.assertEqual(decode(encode(bar(0))).timeframe, "1m")
+
+
+if __name__ == "__main__":
+    unittest.main()
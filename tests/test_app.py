@@ -1,30 +1,169 @@
+import itertools
+import logging
+import os
+import tempfile
 import unittest
+from argparse import Namespace
+from datetime import datetime, timedelta, timezone
+
+from benchmarks.bench_engine import (
+    SyntheticDatabase,
+    bench_config,
+    compare,
+    run_benchmark,
+    shortfalls,
+)
+from engine import latency
+from engine.engine import Engine
+from engine.interface import Venue
+from gateways.synthetic.syntheticGateway import SyntheticGateway
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def bench_args(**overrides):
+    args = dict(
+        symbols=2,
+        quote_rate=100,
+        trade_rate=20,
+        bar_interval=0.2,
+        batch_size=1,
+        quote_mailbox="fifo",
+        warmup=0.2,
+        duration=0.3,
+    )
+    args.update(overrides)
+    return Namespace(**args)
 
 
 class TestEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
     def test_engine(self):
-        pass
+        args = bench_args(batch_size=4)
+        config = bench_config(args, self.tmpdir.name)
+        log = logging.getLogger("test")
+        engine = Engine(config, log, SyntheticDatabase(config, log, 60))
+        self.addCleanup(latency.reset)
+        self.addCleanup(latency.enable, False)
+        self.addCleanup(engine.dbcxn.close_live)
+        self.addCleanup(engine.feed.close)
+        gateway = engine.venues[Venue.SYNTHETIC]
+        gateway.subscribe()
+        # the engine handles the events on the calling thread
+        latency.reset()
+        stored = engine.marketData.count("SYN0/USD")
+        gateway.step(1.1)
+        self.assertEqual(gateway.sent, {"quote": 220, "trade": 44, "bar": 10})
+        histograms = latency.snapshot()["histograms"]
+        for kind in ("quote", "trade", "bar"):
+            self.assertEqual(
+                histograms[f"{kind} gateway->queued"]["count"], gateway.sent[kind]
+            )
+        self.assertEqual(engine.marketData.count("SYN0/USD"), stored + 5)
 
+    def test_benchmark(self):
+        cwd = os.getcwd()
+        result = run_benchmark(bench_args(), self.tmpdir.name)
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, "db_crypto.db")))
+        self.assertEqual(result["parameters"]["symbols"], 2)
+        self.assertIn("quotes_per_s", result["throughput"])
+        self.assertIn("memory", result)
 
-class TestGateway(unittest.TestCase):
-    def test_gateway(self):
-        pass
+    def test_shortfalls(self):
+        result = {
+            "parameters": vars(bench_args()),
+            "throughput": {"quotes_per_s": 150, "trades_per_s": 40, "bars_per_s": 6},
+        }
+        self.assertEqual(shortfalls(result, 0.9), ["quotes_per_s", "bars_per_s"])
+        self.assertEqual(shortfalls(result, 0.5), [])
 
+    def test_compare_flags_regressions(self):
+        def result(rate, p99, growth):
+            return {
+                "parameters": {},
+                "throughput": {"messages_per_s": rate},
+                "histograms": {
+                    "quote gateway->queued": {"p50_us": 10.0, "p99_us": p99}
+                },
+                "memory": {"growth_mb": growth},
+            }
 
-class TestStrategy(unittest.TestCase):
-    def test_strat1(self):
-        pass
+        baseline = result(1000.0, 50.0, 1.0)
+        self.assertEqual(compare(result(950.0, 55.0, 2.0), baseline, 0.25, 16), [])
+        self.assertEqual(
+            compare(result(500.0, 100.0, 40.0), baseline, 0.25, 16),
+            [
+                "messages_per_s",
+                "quote gateway->queued p99_us",
+                "memory growth_mb",
+            ],
+        )
 
-    def test_rsi(self):
-        pass
 
-    def test_sma(self):
-        pass
+class TestGateway(unittest.TestCase):
+    def gateway(self, quotes, trades, bars, **config):
+        return SyntheticGateway(
+            {
+                "name": "synthetic",
+                "symbols": ["A/USD", "B/USD"],
+                "quote_rate": 200,
+                "trade_rate": 50,
+                "bar_interval": 0.1,
+                "start": START,
+                **config,
+            },
+            quotes.extend,
+            trades.extend,
+            bars.extend,
+            logging.getLogger("test"),
+            clock=lambda: 0.0,
+        )
 
+    def test_gateway(self):
+        quotes, trades, bars = [], [], []
+        gateway = self.gateway(quotes, trades, bars)
+        gateway.subscribe()
+        self.assertAlmostEqual(gateway.step(0.55), 0.5525)
+        self.assertEqual((len(quotes), len(trades), len(bars)), (220, 55, 10))
+        self.assertEqual({q.symbol for q in quotes}, {"A/USD", "B/USD"})
+        self.assertEqual(
+            [b.timestamp for b in bars[::2]],
+            [START + timedelta(minutes=i) for i in range(5)],
+        )
+        for bar in bars:
+            self.assertEqual(bar.venue, Venue.SYNTHETIC)
+            self.assertLessEqual(bar.low, min(bar.open, bar.close))
+            self.assertGreaterEqual(bar.high, max(bar.open, bar.close))
+        # events are stamped with the market time of the bar being built
+        self.assertTrue(
+            all(t.timestamp == START + timedelta(minutes=5.5) for t in trades)
+        )
+        # nothing more is due until the clock moves on
+        gateway.step(0.55)
+        self.assertEqual((len(quotes), len(trades), len(bars)), (220, 55, 10))
+        gateway.step(0.65)
+        self.assertEqual((len(quotes), len(trades), len(bars)), (260, 65, 12))
+        self.assertEqual(gateway.trade(None).status, "filled")
+        self.assertEqual(gateway.get_account().equity, 100000.0)
 
-# class MyTestCase(unittest.TestCase):
-#     def test_something(self):
-#         self.assertEqual(True, False)
+    def test_thread_follows_the_clock(self):
+        quotes, trades, bars = [], [], []
+        gateway = self.gateway(quotes, trades, bars)
+        # the clock starts, then stands still at 0.35s: the thread sends what is
+        # due by then and waits
+        ticks = itertools.chain([0.0], itertools.repeat(0.35))
+        gateway.clock = lambda: next(ticks)
+        gateway.subscribe()
+        gateway.start()
+        gateway.stopEvent.wait(0.05)
+        gateway.stop()
+        gateway.join(timeout=1)
+        self.assertFalse(gateway.is_alive())
+        self.assertEqual((len(quotes), len(trades), len(bars)), (140, 35, 6))
 
 
 if __name__ == "__main__":
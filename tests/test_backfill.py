@@ -0,0 +1,128 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from data import cryptoDatabase
+from data.backfill import Backfill, RateLimiter
+from data.cryptoDatabase import CryptoDatabase
+from tests.test_cryptoDatabase import START, FakeHistoricalClient
+
+
+class FlakyHistoricalClient(FakeHistoricalClient):
+    """Fails the first request for the first ETH/USD chunk."""
+
+    failed = False
+
+    def get_crypto_bars(self, request_params):
+        first = request_params.start.date() == (START - timedelta(days=3)).date()
+        if request_params.symbol_or_symbols == ["ETH/USD"] and first:
+            if not FlakyHistoricalClient.failed:
+                FlakyHistoricalClient.failed = True
+                raise ConnectionError("reset by peer")
+        return super().get_crypto_bars(request_params)
+
+
+class TestBackfill(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "db.db")
+        self.config = {
+            "database": {
+                "api_key": "",
+                "secret_key": "",
+                "start_date": (START - timedelta(days=3)).strftime("%Y-%m-%d"),
+                "crypto": {"symbols": ["BTC/USD", "ETH/USD"]},
+                "backfill": {"chunk_days": 2, "workers": 2},
+            }
+        }
+        FlakyHistoricalClient.failed = False
+        patches = [
+            mock.patch.object(cryptoDatabase, "DATABASE_PATH", self.path),
+            mock.patch.object(
+                cryptoDatabase, "CryptoHistoricalDataClient", FlakyHistoricalClient
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def checkpoints(self):
+        conn = sqlite3.connect(self.path)
+        rows = conn.execute(
+            "SELECT symbol, rows FROM backfill_chunks ORDER BY symbol, start"
+        ).fetchall()
+        conn.close()
+        return rows
+
+    def test_chunks_are_aligned_on_start(self):
+        backfill = Backfill(None, logging.getLogger("test"), chunk_days=2)
+        chunks = backfill.chunks(["BTC/USD"], START, START + timedelta(days=5))
+        self.assertEqual(
+            [c[1] for c in chunks], [START + timedelta(days=d) for d in (0, 2, 4)]
+        )
+        # chunks ending before the watermark are skipped
+        chunks = backfill.chunks(
+            ["BTC/USD"],
+            START,
+            START + timedelta(days=5),
+            {"BTC/USD": START + timedelta(days=2)},
+        )
+        self.assertEqual(
+            [c[1] for c in chunks], [START + timedelta(days=d) for d in (2, 4)]
+        )
+
+    def test_failed_chunk_is_retried_on_restart(self):
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        # the first ETH/USD chunk failed and was not recorded
+        self.assertEqual(
+            self.checkpoints(), [("BTC/USD", 0), ("BTC/USD", 120), ("ETH/USD", 120)]
+        )
+        self.assertEqual(db.watermarks["ETH/USD"], START + timedelta(minutes=119))
+
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        fetched = [(r.symbol_or_symbols[0], r.start.date()) for r in db.api.requests]
+        # completed chunks are not fetched again
+        self.assertNotIn(("BTC/USD", (START - timedelta(days=3)).date()), fetched)
+        self.assertIn(("ETH/USD", (START - timedelta(days=3)).date()), fetched)
+        self.assertEqual(len(self.checkpoints()), 4)
+
+    def test_chunks_under_watermark_are_checkpointed(self):
+        CryptoDatabase(self.config, logging.getLogger("test"))
+        # a database filled before chunks were checkpointed, from a later start
+        conn = sqlite3.connect(self.path)
+        conn.execute("DELETE FROM backfill_chunks")
+        conn.commit()
+        conn.close()
+        self.config["database"]["start_date"] = (START - timedelta(days=7)).strftime(
+            "%Y-%m-%d"
+        )
+
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        first = {(r.symbol_or_symbols[0], r.start.date()) for r in db.api.requests}
+        self.assertNotIn(("BTC/USD", (START - timedelta(days=7)).date()), first)
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        # nothing under the watermarks is fetched on the next start either
+        for request in db.api.requests:
+            self.assertGreaterEqual(request.start.date(), START.date())
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_spaces_requests_after_burst(self):
+        limiter = RateLimiter(rate=50, burst=2)
+        started = time.monotonic()
+        for _ in range(4):
+            limiter.acquire()
+        # two immediately, then one every 20ms
+        self.assertGreaterEqual(time.monotonic() - started, 0.035)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from data.cryptoDatabase import BARS_SCHEMA
+from engine.backtest import Backtester
+from engine import sweep
+from engine.sweep import parameter_grid, run_sweep
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def strategy_config(type, name, **params):
+    return {
+        "type": type,
+        "name": name,
+        "venues": ["alpaca"],
+        "symbols": ["BTC/USD"],
+        **params,
+    }
+
+
+class StoredBarsTestCase(unittest.TestCase):
+    """Three days of 1-minute BTC/USD bars in a temporary database."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "db.db")
+        rng = np.random.default_rng(0)
+        closes = 40000 + np.cumsum(rng.normal(0, 25, 3 * 1440))
+        conn = sqlite3.connect(self.path)
+        conn.execute(BARS_SCHEMA)
+        conn.executemany(
+            "INSERT INTO bars (symbol, timestamp, open, high, low, close, volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                ("BTC/USD", str(START + timedelta(minutes=i)), c, c, c, c, 1.0)
+                for i, c in enumerate(closes)
+            ],
+        )
+        conn.commit()
+        conn.close()
+        self.config = {
+            "strategies": [
+                strategy_config("sma", "sma", short_window=30, long_window=120),
+                strategy_config("rsi", "rsi", rsi_window=14, warmup=200),
+            ]
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+
+class TestBacktester(StoredBarsTestCase):
+    def test_replays_bars_after_start(self):
+        backtester = Backtester(
+            self.config,
+            logging.getLogger("test"),
+            start=START + timedelta(days=1),
+            path=self.path,
+        )
+        report = backtester.run()
+        self.assertEqual(report["bars"], 2 * 1440)
+        self.assertGreater(report["fills"], 0)
+        self.assertAlmostEqual(
+            report["equity"],
+            report["cash"]
+            + report["positions"].get("BTC/USD", 0.0)
+            * backtester.account.prices["BTC/USD"],
+        )
+
+    def test_warm_start_excludes_replayed_bars(self):
+        backtester = Backtester(
+            self.config,
+            logging.getLogger("test"),
+            start=START + timedelta(days=1),
+            path=self.path,
+        )
+        sma = backtester.strategies[0]
+        self.assertEqual(len(sma.long_ma), 120)
+        self.assertEqual(
+            backtester.marketData.window("BTC/USD", 1)[-1],
+            stored_close(self.path, 1439),
+        )
+
+    def test_routes_aggregated_bars_by_timeframe(self):
+        config = {
+            "strategies": [
+                strategy_config(
+                    "sma", "sma", short_window=4, long_window=16, timeframe="15m"
+                )
+            ]
+        }
+        backtester = Backtester(
+            config,
+            logging.getLogger("test"),
+            start=START + timedelta(days=1),
+            path=self.path,
+        )
+        # warm-started from the 1-minute bars before start
+        self.assertEqual(
+            backtester.marketData.window("BTC/USD", 1, timeframe="15m")[-1],
+            stored_close(self.path, 1439),
+        )
+        report = backtester.run()
+        self.assertEqual(report["bars"], 2 * 1440)
+        self.assertEqual(backtester.marketData.count("BTC/USD", "15m"), 17 + 2 * 96)
+
+
+class TestSweep(StoredBarsTestCase):
+    def test_grid_and_random_search(self):
+        grid = {"a": [1, 2, 3], "b": [10, 20]}
+        self.assertEqual(len(parameter_grid(grid)), 6)
+        sampled = parameter_grid(grid, samples=4)
+        self.assertEqual(len(sampled), 4)
+        self.assertEqual(len({tuple(p.items()) for p in sampled}), 4)
+
+    def test_matches_single_backtest(self):
+        sma = self.config["strategies"][0]
+        start = START + timedelta(days=1)
+        results = run_sweep(
+            sma,
+            {"short_window": [30, 60], "long_window": [120]},
+            start,
+            workers=2,
+            path=self.path,
+        )
+        self.assertEqual(len(results), 2)
+        self.assertGreaterEqual(results["pnl"][0], results["pnl"][1])
+        row = results[results["short_window"] == 30].iloc[0]
+        report = Backtester(
+            {"strategies": [sma]}, logging.getLogger("test"), start, path=self.path
+        ).run()
+        self.assertAlmostEqual(row["pnl"], report["pnl"])
+        self.assertEqual(row["fills"], report["fills"])
+
+    def test_workers_map_the_bars_without_copies(self):
+        start = START + timedelta(days=1)
+        shm = sweep.load_shared_bars(["ETH/USD", "BTC/USD"], start, path=self.path)
+        try:
+            sweep._attach(shm.name, ["ETH/USD", "BTC/USD"])
+            shared = sweep._shared
+            history = shared["history"]
+            self.assertEqual(len(history.load("ETH/USD", 10)), 0)
+            warmup = history.load("BTC/USD", 2000, ("close",))
+            self.assertEqual(len(warmup), 1440)
+            self.assertEqual(warmup["close"][-1], stored_close(self.path, 1439))
+            self.assertTrue(np.shares_memory(warmup, shared["bars"].base))
+            bars = list(sweep._replay({"ETH/USD": 0, "BTC/USD": 1}))
+            self.assertEqual(len(bars), 2 * 1440)
+            self.assertEqual(bars[0].timestamp, start)
+            self.assertEqual(bars[0].close, stored_close(self.path, 1440))
+        finally:
+            sweep._shared.pop("shm").close()
+            sweep._shared.clear()
+            shm.close()
+            shm.unlink()
+
+
+def stored_close(path, minute):
+    conn = sqlite3.connect(path)
+    close = conn.execute(
+        "SELECT close FROM bars WHERE timestamp = ?",
+        (str(START + timedelta(minutes=minute)),),
+    ).fetchone()[0]
+    conn.close()
+    return close
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from data import columnar
+from data.columnar import ColumnarBars, export_bars, replay_bars
+from data.cryptoDatabase import BARS_SCHEMA
+from data.history import HistoryLoader
+from engine.backtest import Backtester
+from engine.interface import Venue
+
+START = datetime(2024, 1, 30, tzinfo=timezone.utc)
+
+
+@unittest.skipIf(columnar.pa is None, "pyarrow is not installed")
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "db.db")
+        self.root = os.path.join(self.tmpdir.name, "columnar")
+        # three days a day apart, across January and February
+        self.insert([(START + timedelta(days=i), float(i)) for i in range(3)])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def insert(self, bars):
+        conn = sqlite3.connect(self.path)
+        conn.execute(BARS_SCHEMA)
+        conn.executemany(
+            "INSERT OR REPLACE INTO bars (symbol, timestamp, close, volume)"
+            " VALUES (?, ?, ?, ?)",
+            [("BTC/USD", str(ts), close, 1.0) for ts, close in bars],
+        )
+        conn.commit()
+        conn.close()
+
+    def test_partitioned_by_symbol_and_month(self):
+        self.assertEqual(export_bars(self.path, self.root), {"BTC/USD": 2})
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.root, "BTC-USD"))),
+            ["2024-01.arrow", "2024-02.arrow"],
+        )
+
+    def test_range_pushdown(self):
+        export_bars(self.path, self.root)
+        reader = ColumnarBars(self.root)
+        rows = reader.read("BTC/USD", ("timestamp", "close"))
+        self.assertEqual(list(rows["close"]), [0.0, 1.0, 2.0])
+        self.assertEqual(rows["timestamp"][0], int(START.timestamp()) * 1_000_000_000)
+        rows = reader.read(
+            "BTC/USD", start=START + timedelta(days=1), end=START + timedelta(days=2)
+        )
+        self.assertEqual(list(rows["close"]), [1.0])
+        self.assertEqual(len(reader.read("ETH/USD")), 0)
+        with self.assertRaises(ValueError):
+            reader.read("BTC/USD", ("spread",))
+
+    def test_load_matches_history_loader(self):
+        export_bars(self.path, self.root)
+        columns = ("timestamp", "close", "volume")
+        expected = HistoryLoader(self.path).load("BTC/USD", 2, columns)
+        rows = ColumnarBars(self.root).load("BTC/USD", 2, columns)
+        self.assertEqual(rows.tolist(), expected.tolist())
+        until = ColumnarBars(self.root, until=START + timedelta(days=2))
+        self.assertEqual(list(until.load("BTC/USD", 5)["close"]), [0.0, 1.0])
+
+    def test_export_is_incremental(self):
+        export_bars(self.path, self.root)
+        self.assertEqual(export_bars(self.path, self.root), {"BTC/USD": 0})
+        self.insert([(START + timedelta(days=3), 3.0)])
+        # only the month that changed is written again
+        self.assertEqual(export_bars(self.path, self.root), {"BTC/USD": 1})
+        rows = ColumnarBars(self.root).read("BTC/USD")
+        self.assertEqual(list(rows["close"]), [0.0, 1.0, 2.0, 3.0])
+
+    def test_late_backfill_is_exported(self):
+        export_bars(self.path, self.root)
+        # a bar of January arrives after February was exported, and one changes
+        self.insert([(START - timedelta(days=1), -1.0), (START, 0.5)])
+        self.assertEqual(export_bars(self.path, self.root), {"BTC/USD": 1})
+        rows = ColumnarBars(self.root).read("BTC/USD")
+        self.assertEqual(list(rows["close"]), [-1.0, 0.5, 1.0, 2.0])
+        self.assertEqual(export_bars(self.path, self.root, full=True), {"BTC/USD": 2})
+
+    def test_backtest_replays_the_store(self):
+        self.insert([(START + timedelta(days=3 + i), 3.0 + i) for i in range(3)])
+        export_bars(self.path, self.root)
+        config = {
+            "strategies": [
+                {
+                    "type": "sma",
+                    "name": "sma",
+                    "venues": ["alpaca"],
+                    "symbols": ["BTC/USD"],
+                    "short_window": 1,
+                    "long_window": 2,
+                }
+            ]
+        }
+        start = START + timedelta(days=2)
+        backtester = Backtester(
+            config, logging.getLogger("test"), start, path=self.path
+        )
+        expected = [
+            (b.symbol, b.timestamp, b.close, b.trade_count)
+            for b in backtester.load_bars()
+        ]
+        bars = list(replay_bars(ColumnarBars(self.root), backtester.venues, start))
+        self.assertEqual(
+            [(b.symbol, b.timestamp, b.close, b.trade_count) for b in bars], expected
+        )
+        self.assertEqual(bars[0].venue, Venue.ALPACA)
+
+
+if __name__ == "__main__":
+    unittest.main()
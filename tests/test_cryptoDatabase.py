@@ -0,0 +1,182 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+
+from data import cryptoDatabase
+from data.cryptoDatabase import CryptoDatabase
+from engine.interface import Bar, BarBatch, Venue
+
+START = datetime.now(timezone.utc).replace(
+    hour=0, minute=0, second=0, microsecond=0
+) - timedelta(days=1)
+
+
+class FakeHistoricalClient:
+    """Serves 1-minute bars for the first two hours of yesterday."""
+
+    def __init__(self, *args, **kwargs):
+        self.requests = []
+
+    def get_crypto_bars(self, request_params):
+        self.requests.append(request_params)
+        # the request model converts its bounds to naive UTC
+        start = pd.Timestamp(request_params.start).tz_localize("UTC")
+        end = pd.Timestamp(request_params.end).tz_localize("UTC")
+        rows = []
+        for symbol in request_params.symbol_or_symbols:
+            for i in range(120):
+                ts = pd.Timestamp(START + timedelta(minutes=i))
+                if start <= ts < end:
+                    rows.append((symbol, ts, 1.0, 2.0, 0.5, 1.5, 10.0, 3.0, 1.2))
+        df = pd.DataFrame(
+            rows,
+            columns=[
+                "symbol",
+                "timestamp",
+                "open",
+                "high",
+                "low",
+                "close",
+                "volume",
+                "trade_count",
+                "vwap",
+            ],
+        ).set_index(["symbol", "timestamp"])
+        return SimpleNamespace(df=df)
+
+
+class TestCryptoDatabase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "db.db")
+        self.config = {
+            "database": {
+                "api_key": "",
+                "secret_key": "",
+                "start_date": START.strftime("%Y-%m-%d"),
+                "crypto": {"symbols": ["BTC/USD", "ETH/USD"]},
+            }
+        }
+        patches = [
+            mock.patch.object(cryptoDatabase, "DATABASE_PATH", self.path),
+            mock.patch.object(
+                cryptoDatabase, "CryptoHistoricalDataClient", FakeHistoricalClient
+            ),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def count(self, symbol):
+        conn = sqlite3.connect(self.path)
+        n = conn.execute(
+            "SELECT COUNT(*) FROM bars WHERE symbol = ?", (symbol,)
+        ).fetchone()[0]
+        conn.close()
+        return n
+
+    def test_populate_sets_watermarks(self):
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        self.assertEqual(self.count("BTC/USD"), 120)
+        self.assertEqual(db.watermarks["BTC/USD"], START + timedelta(minutes=119))
+
+    def test_restart_fetches_nothing_twice(self):
+        CryptoDatabase(self.config, logging.getLogger("test"))
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        self.assertEqual(
+            db.api.requests[0].start,
+            (START + timedelta(minutes=119)).replace(tzinfo=None),
+        )
+        self.assertEqual(self.count("BTC/USD"), 120)
+        self.assertEqual(self.count("ETH/USD"), 120)
+
+    def test_append_bars_upserts(self):
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        # a bar already stored, sent again, replaces it
+        resent = Bar(Venue.ALPACA, "BTC/USD", 1, 1, 1, 1, 1, START)
+        fresh = Bar(
+            Venue.ALPACA, "BTC/USD", 1, 1, 1, 1, 1, START + timedelta(minutes=120)
+        )
+        db.append_bars([resent, fresh])
+        db.close_live()
+        self.assertEqual(self.count("BTC/USD"), 121)
+        self.assertEqual(db.watermarks["BTC/USD"], fresh.timestamp)
+        conn = sqlite3.connect(self.path)
+        close = conn.execute(
+            "SELECT close FROM bars WHERE symbol = ? AND timestamp = ?",
+            ("BTC/USD", str(START)),
+        ).fetchone()[0]
+        conn.close()
+        self.assertEqual(close, 1.0)
+
+    def test_append_bar_batch(self):
+        db = CryptoDatabase(self.config, logging.getLogger("test"))
+        batch = BarBatch(Venue.ALPACA)
+        ts = START + timedelta(minutes=120)
+        batch.append("ETH/USD", 1.0, 2.0, 0.5, 1.5, 10.0, ts, 4.0, 1.3)
+        db.append_bars(batch)
+        db.close_live()
+        conn = sqlite3.connect(self.path)
+        row = conn.execute(
+            "SELECT close, trade_count, vwap FROM bars WHERE symbol = ? "
+            "AND timestamp = ?",
+            ("ETH/USD", str(ts)),
+        ).fetchone()
+        conn.close()
+        self.assertEqual(row, (1.5, 4, 1.3))
+        self.assertEqual(db.watermarks["ETH/USD"], ts)
+
+    def test_migrates_legacy_table(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            """
+            CREATE TABLE bars (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME,
+                symbol TEXT,
+                close REAL,
+                high REAL,
+                low REAL,
+                trade_count INTEGER,
+                open REAL,
+                volume REAL,
+                vwap REAL,
+                added_on DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        ts = str(START)
+        conn.executemany(
+            "INSERT INTO bars (timestamp, symbol, close) VALUES (?, ?, ?)",
+            [(ts, "BTC/USD", 1.0), (ts, "BTC/USD", 2.0), (ts, "ETH/USD", 3.0)],
+        )
+        conn.commit()
+        conn.close()
+
+        CryptoDatabase(self.config, logging.getLogger("test"))
+        conn = sqlite3.connect(self.path)
+        self.assertEqual(conn.execute("PRAGMA user_version").fetchone()[0], 1)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(bars)")]
+        self.assertNotIn("id", columns)
+        # the most recently inserted duplicate wins
+        close = conn.execute(
+            "SELECT close FROM bars WHERE symbol = 'BTC/USD' AND timestamp = ?",
+            (ts,),
+        ).fetchone()[0]
+        conn.close()
+        self.assertEqual(close, 2.0)
+        self.assertEqual(self.count("BTC/USD"), 120)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from data.cryptoDatabase import BARS_SCHEMA
+from data.history import HistoryLoader
+
+
+class TestHistoryLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "db.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute(BARS_SCHEMA)
+        start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        conn.executemany(
+            "INSERT INTO bars (symbol, timestamp, close, volume) VALUES (?, ?, ?, ?)",
+            [
+                (symbol, str(start + timedelta(minutes=i)), float(i), 1.0)
+                for symbol in ("BTC/USD", "ETH/USD")
+                for i in range(100)
+            ],
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_latest_rows_oldest_first(self):
+        rows = HistoryLoader(self.path).load("BTC/USD", 10, ("close", "volume"))
+        self.assertEqual(list(rows["close"]), [float(i) for i in range(90, 100)])
+        self.assertEqual(list(rows["volume"]), [1.0] * 10)
+        self.assertFalse(rows.flags.writeable)
+
+    def test_cache_extends_backwards(self):
+        loader = HistoryLoader(self.path)
+        self.assertEqual(len(loader.load("BTC/USD", 10)), 10)
+        rows = loader.load("BTC/USD", 30)
+        self.assertEqual(list(rows["close"]), [float(i) for i in range(70, 100)])
+        # shorter requests are served from the cache
+        self.assertEqual(
+            list(loader.load("BTC/USD", 5)["close"]), [95.0, 96.0, 97.0, 98.0, 99.0]
+        )
+        self.assertEqual(len(loader.load("BTC/USD", 1000)), 100)
+
+    def test_rejects_unknown_columns(self):
+        with self.assertRaises(ValueError):
+            HistoryLoader(self.path).load("BTC/USD", 10, ("close; DROP TABLE bars",))
+
+
+if __name__ == "__main__":
+    unittest.main()
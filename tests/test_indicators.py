@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from data.indicators import RollingMean, WilderRSI, add_RSI_indic
+
+
+class TestRollingMean(unittest.TestCase):
+    def test_matches_numpy_mean(self):
+        rng = np.random.default_rng(0)
+        closes = 40000 + np.cumsum(rng.normal(0, 25, 5000))
+        ma = RollingMean(300)
+        for i, close in enumerate(closes):
+            ma.append(close)
+            if i >= 299:
+                self.assertAlmostEqual(
+                    ma.mean(), np.mean(closes[i - 299 : i + 1]), places=8
+                )
+        self.assertTrue(ma.full())
+
+    def test_not_full_until_window(self):
+        ma = RollingMean(3)
+        ma.extend([1.0, 2.0])
+        self.assertFalse(ma.full())
+        self.assertEqual(ma.mean(), 1.5)
+        ma.extend([3.0, 4.0])
+        self.assertTrue(ma.full())
+        self.assertEqual(ma.mean(), 3.0)
+
+    def test_slide_over_external_window(self):
+        closes = np.arange(20.0)
+        ma = RollingMean(5)
+        ma.seed(closes[:3])
+        for i in range(3, 20):
+            window = closes[max(0, i - 5) : i + 1]
+            if len(window) > 5:
+                ma.slide(closes[i], window[0], window[1:])
+            else:
+                ma.slide(closes[i], None, window)
+        self.assertTrue(ma.full())
+        self.assertEqual(ma.mean(), 17.0)
+
+
+class TestWilderRSI(unittest.TestCase):
+    def test_matches_batch(self):
+        rng = np.random.default_rng(1)
+        closes = 40000 + np.cumsum(rng.normal(0, 25, 2000))
+        for window in (14, 60):
+            batch = add_RSI_indic(pd.DataFrame({"close": closes}), "close", window)
+            rsi = WilderRSI(window)
+            for i, close in enumerate(closes):
+                rsi.append(close)
+                self.assertEqual(rsi.ready(), i >= window)
+                if rsi.ready():
+                    self.assertAlmostEqual(rsi.value(), batch.iloc[i, 0], places=8)
+
+
+if __name__ == "__main__":
+    unittest.main()
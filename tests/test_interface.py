@@ -0,0 +1,47 @@
+import pickle
+import unittest
+from datetime import datetime, timezone
+
+from engine.interface import Bar, BarBatch, Venue
+
+
+class TestBarBatch(unittest.TestCase):
+    def test_round_trip(self):
+        ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        bars = [
+            Bar(Venue.ALPACA, symbol, 1.0, 2.0, 0.5, 1.5 + i, 10.0, ts)
+            for i, symbol in enumerate(["BTC/USD", "ETH/USD"])
+        ]
+        batch = BarBatch.from_bars(Venue.ALPACA, bars)
+        self.assertEqual(len(batch), 2)
+        self.assertEqual([b.symbol for b in batch], ["BTC/USD", "ETH/USD"])
+        self.assertEqual(batch[1].close, 2.5)
+        self.assertEqual(repr(batch[0]), repr(bars[0]))
+
+    def test_every_field_survives_a_round_trip(self):
+        ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        bar = Bar(Venue.ALPACA, "BTC/USD", 1.0, 2.0, 0.5, 1.5, 10.0, ts)
+        bar.trade_count = 7.0
+        bar.vwap = 1.2
+        bar.exchange = 3.0
+        bar.timeframe = "15m"
+        bar.seq = 42
+        bar.stamps = [(0, 100), (1, 200)]
+        other = Bar(Venue.ALPACA, "ETH/USD", 3.0, 4.0, 2.5, 3.5, 20.0, ts)
+        batch = BarBatch.from_bars(Venue.ALPACA, [other, bar])
+        for copy in (batch[1], batch.take([1])[0]):
+            for field in Bar.__slots__:
+                self.assertEqual(getattr(copy, field), getattr(bar, field), field)
+        self.assertIsNone(batch[0].trade_count)
+        self.assertEqual(batch[0].timeframe, "1m")
+
+    def test_slotted_bar_pickles(self):
+        bar = Bar(Venue.ALPACA, "BTC/USD", 1.0, 2.0, 0.5, 1.5, 10.0, None)
+        bar.vwap = 1.2
+        self.assertFalse(hasattr(bar, "__dict__"))
+        copy = pickle.loads(pickle.dumps(bar))
+        self.assertEqual((copy.close, copy.vwap), (1.5, 1.2))
+
+
+if __name__ == "__main__":
+    unittest.main()
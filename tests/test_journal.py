@@ -0,0 +1,80 @@
+import logging
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from config.configuration import start_async_loggers
+from data.journal import RECORD, JournalHandler, encode, read_journal
+from engine.interface import Bar, Exposure, Quote, Signal, Venue
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "data.journal")
+        self.ts = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def events(self):
+        quote = Quote(Venue.ALPACA, "BTC/USD", self.ts)
+        quote.bid_prc, quote.bid_qty, quote.ask_prc = 42000.5, 0.25, 42001.0
+        bar = Bar(Venue.ALPACA, "ETH/USD", 1.0, 2.0, 0.5, 1.5, 10.0, self.ts)
+        bar.vwap = 1.25
+        signal = Signal(Venue.ALPACA, "BTC/USD", Exposure.SHORT, 0.1, 42000.0)
+        return [quote, bar, signal]
+
+    def test_handler_round_trip(self):
+        handler = JournalHandler(self.path)
+        log = logging.Logger("journal-test")
+        log.addHandler(handler)
+        for event in self.events():
+            log.info(event)
+        log.info("text messages are not journaled")
+        handler.close()
+
+        self.assertEqual(os.path.getsize(self.path), 3 * RECORD.size)
+        quote, bar, signal = read_journal(self.path)
+        self.assertEqual(repr(quote), repr(self.events()[0]))
+        self.assertIsNone(quote.ask_qty)
+        self.assertEqual(repr(bar), repr(self.events()[1]))
+        self.assertEqual(bar.vwap, 1.25)
+        self.assertEqual(repr(signal), repr(self.events()[2]))
+
+    def test_long_symbol_is_rejected(self):
+        quote = Quote(Venue.ALPACA, "ABCDEFGHIJKLM/USD", self.ts)
+        with self.assertRaises(ValueError):
+            encode(quote)
+        quote.symbol = "ABCDEFGHIJKL/USD"
+        self.assertEqual(len(encode(quote)), RECORD.size)
+
+    def test_torn_record_is_ignored(self):
+        handler = JournalHandler(self.path)
+        handler.journal.write(self.events()[0])
+        handler.close()
+        with open(self.path, "ab") as file:
+            file.write(b"\x01\x02\x03")
+        self.assertEqual(len(list(read_journal(self.path))), 1)
+
+    def test_async_logger_keeps_objects(self):
+        log = logging.getLogger("journal-async-test")
+        log.propagate = False
+        log.setLevel(logging.INFO)
+        handler = JournalHandler(self.path)
+        log.addHandler(handler)
+        (listener,) = start_async_loggers(["journal-async-test"])
+        try:
+            self.assertNotIn(handler, log.handlers)
+            for event in self.events():
+                log.info(event)
+        finally:
+            listener.stop()
+            log.handlers.clear()
+            handler.close()
+        self.assertEqual(len(list(read_journal(self.path))), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timezone
+
+from data.history import ArrayHistory
+from engine import latency
+from engine.interface import Bar, Exposure, Signal, Venue
+from strategies.strategy import Strategy
+
+TS = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class SignallingStrategy(Strategy):
+    def __init__(self):
+        self.signals = []
+        super().__init__(
+            {"name": "s"},
+            self.signals.extend,
+            logging.getLogger("test"),
+            threading.Event(),
+            ArrayHistory({}),
+            1,
+        )
+
+    def process_bar(self, bar):
+        self._emit_signals(
+            [Signal(bar.venue, bar.symbol, Exposure.LONG, 1.0, bar.close)]
+        )
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles_are_within_bucket_precision(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(11, 1) for _ in range(20000)]
+        histogram = latency.Histogram()
+        for value in values:
+            histogram.record(int(value))
+        values.sort()
+        for p in (50, 90, 99):
+            exact = values[int(len(values) * p / 100) - 1]
+            self.assertAlmostEqual(histogram.percentile(p) / exact, 1.0, delta=0.03)
+        self.assertEqual(histogram.max, int(values[-1]))
+        self.assertEqual(histogram.percentile(100), histogram.max)
+
+    def test_small_values_are_exact(self):
+        histogram = latency.Histogram()
+        for value in range(64):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(50), 31)
+        self.assertEqual(latency.Histogram().percentile(50), 0.0)
+
+
+class TestLatency(unittest.TestCase):
+    def setUp(self):
+        latency.reset()
+        latency.enable()
+
+    def tearDown(self):
+        latency.enable(False)
+        latency.reset()
+
+    def test_record_observes_transitions_and_total(self):
+        latency.record(
+            [(latency.GATEWAY, 0), (latency.ENGINE, 1000), (latency.QUEUED, 3000)],
+            "quote",
+        )
+        histograms = latency.snapshot()["histograms"]
+        self.assertEqual(
+            sorted(histograms),
+            ["quote engine->queued", "quote gateway->engine", "quote gateway->queued"],
+        )
+        self.assertEqual(histograms["quote gateway->queued"]["max_us"], 3.0)
+        self.assertEqual(histograms["quote engine->queued"]["count"], 1)
+
+    def test_dump_writes_the_snapshot(self):
+        latency.observe("bar gateway->engine", 5000)
+        latency.gauge("orders ALPACA", 3)
+        latency.gauge("orders ALPACA", 1)
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "latency.json")
+            latency.dump(path)
+            with open(path) as file:
+                data = json.load(file)
+        self.assertEqual(data["histograms"]["bar gateway->engine"]["p50_us"], 5.0)
+        self.assertEqual(
+            data["gauges"]["orders ALPACA"], {"value": 1, "max": 3, "samples": 2}
+        )
+
+    def test_signals_carry_the_stamps_of_their_bar(self):
+        strategy = SignallingStrategy()
+        bar = Bar(Venue.ALPACA, "BTC/USD", 1.0, 1.0, 1.0, 1.0, 1.0, TS)
+        latency.stamp(bar, latency.GATEWAY)
+        latency.stamp(bar, latency.QUEUED)
+        strategy.handle_bars([bar])
+        strategy.dispatch()
+
+        (signal,) = strategy.signals
+        self.assertEqual(
+            [stage for stage, _ in signal.stamps],
+            [latency.GATEWAY, latency.QUEUED, latency.SIGNAL],
+        )
+        snapshot = latency.snapshot()
+        self.assertEqual(
+            sorted(snapshot["histograms"]),
+            [
+                "bar dequeued->processed",
+                "bar gateway->processed",
+                "bar queued->dequeued",
+            ],
+        )
+        self.assertEqual(snapshot["gauges"]["s bars"]["max"], 1)
+        self.assertIsNone(strategy.current)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import threading
+import unittest
+from datetime import datetime, timezone
+
+from engine.interface import Quote, Venue
+from strategies.mailbox import ConflatingMailbox, Mailbox
+
+
+def quote(symbol, bid):
+    q = Quote(Venue.ALPACA, symbol, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    q.bid_prc = bid
+    return q
+
+
+class TestMailbox(unittest.TestCase):
+    def test_batches_in_order(self):
+        mailbox = Mailbox()
+        mailbox.put_many([1, 2])
+        mailbox.put_many([3])
+        self.assertEqual(mailbox.qsize(), 3)
+        self.assertEqual(mailbox.get_batch(timeout=0), [1, 2, 3])
+        self.assertEqual(mailbox.get_batch(timeout=0), [])
+
+    def test_conflates_to_latest_quote_per_symbol(self):
+        mailbox = ConflatingMailbox()
+        mailbox.put_many([quote("BTC/USD", 1.0), quote("ETH/USD", 2.0)])
+        mailbox.put_many([quote("BTC/USD", 3.0)])
+        batch = mailbox.get_batch(timeout=0)
+        self.assertEqual(
+            [(q.symbol, q.bid_prc) for q in batch],
+            [
+                ("BTC/USD", 3.0),
+                ("ETH/USD", 2.0),
+            ],
+        )
+        self.assertEqual(mailbox.dropped, 1)
+
+    def test_wakes_on_put(self):
+        mailbox = Mailbox()
+        timer = threading.Timer(0.05, mailbox.put_many, ([1],))
+        timer.start()
+        self.assertEqual(mailbox.get_batch(timeout=5), [1])
+        timer.join()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from data.history import ArrayHistory
+from engine.interface import Bar, Venue
+from engine.marketData import FIELDS, MarketDataStore
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def bar(i, symbol="BTC/USD"):
+    ts = START + timedelta(minutes=i)
+    return Bar(Venue.ALPACA, symbol, i, i, i, float(i), 1.0, ts)
+
+
+class TestMarketDataStore(unittest.TestCase):
+    def test_windows_are_contiguous_read_only_views(self):
+        store = MarketDataStore(slack=2)
+        store.require("BTC/USD", 3)
+        seqs = [store.append(bar(i)) for i in range(12)]
+        self.assertEqual(seqs, list(range(12)))
+        window = store.window("BTC/USD", 3)
+        self.assertEqual(list(window), [9.0, 10.0, 11.0])
+        self.assertFalse(window.flags.writeable)
+        self.assertFalse(window.flags.owndata)
+        self.assertEqual(list(store.window("BTC/USD", 2, end=10)), [8.0, 9.0])
+        timestamps = store.window("BTC/USD", 1, "timestamp")
+        self.assertEqual(timestamps[0], int((START.timestamp() + 11 * 60) * 1e9))
+
+    def test_rejects_overwritten_and_unknown_symbols(self):
+        store = MarketDataStore(slack=1)
+        store.require("BTC/USD", 3)
+        for i in range(10):
+            store.append(bar(i))
+        with self.assertRaises(IndexError):
+            store.window("BTC/USD", 3, end=7)
+        self.assertIsNone(store.append(bar(0, "ETH/USD")))
+        self.assertNotIn("ETH/USD", store)
+
+    def test_warm_start_from_history(self):
+        rows = np.zeros(
+            5, dtype=[("timestamp", "i8")] + [(f, "f8") for f in FIELDS[1:]]
+        )
+        rows["close"] = np.arange(5.0)
+        store = MarketDataStore(ArrayHistory({"BTC/USD": rows}))
+        store.require("BTC/USD", 4)
+        self.assertEqual(list(store.window("BTC/USD", 10)), [1.0, 2.0, 3.0, 4.0])
+        self.assertEqual(store.append(bar(5)), 4)
+        self.assertEqual(list(store.window("BTC/USD", 2)), [4.0, 5.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import logging
+import threading
+import unittest
+from types import SimpleNamespace
+
+from engine.interface import Exposure, Signal, Venue
+from engine.orderRouter import OrderRouter
+
+
+class FakeGateway:
+    def __init__(self):
+        self.orders = []
+        self.release = threading.Event()
+
+    def trade(self, market_order):
+        self.release.wait(timeout=5)
+        if market_order.symbol == "BAD/USD":
+            return None
+        self.orders.append(market_order)
+        return SimpleNamespace(id=len(self.orders), status="accepted")
+
+
+class TestOrderRouter(unittest.TestCase):
+    def setUp(self):
+        self.gateway = FakeGateway()
+        self.acks = []
+        self.router = OrderRouter(
+            {Venue.ALPACA: self.gateway},
+            logging.getLogger("test"),
+            on_ack=self.acks.append,
+        )
+        self.router.start()
+
+    def test_submit_returns_before_the_venue_answers(self):
+        good = self.router.submit(
+            Signal(Venue.ALPACA, "BTC/USD", Exposure.LONG, 0.1, 42000.0)
+        )
+        bad = self.router.submit(
+            Signal(Venue.ALPACA, "BAD/USD", Exposure.SHORT, 1.0, 1.0)
+        )
+        self.assertEqual(good.status, "pending")
+        self.gateway.release.set()
+        self.router.stop()
+
+        self.assertEqual((good.status, good.order_id), ("accepted", "1"))
+        self.assertEqual(bad.status, "failed")
+        self.assertEqual(self.acks, [good])
+        self.assertEqual(self.gateway.orders[0].side.value, "buy")
+        summary = self.router.summary()["ALPACA"]
+        self.assertEqual(
+            (summary["submitted"], summary["acknowledged"], summary["failed"]),
+            (2, 1, 1),
+        )
+        self.assertGreaterEqual(summary["p99_ms"], summary["p50_ms"])
+
+    def test_worker_survives_a_bad_signal(self):
+        bad = self.router.submit(
+            Signal(Venue.ALPACA, "BTC/USD", Exposure.LONG, None, 42000.0)
+        )
+
+        def on_ack(ticket):
+            self.acks.append(ticket)
+            raise RuntimeError("account refresh failed")
+
+        self.router.on_ack = on_ack
+        good = self.router.submit(
+            Signal(Venue.ALPACA, "ETH/USD", Exposure.LONG, 1.0, 2000.0)
+        )
+        self.gateway.release.set()
+        self.router.stop()
+
+        self.assertEqual(bad.status, "failed")
+        self.assertIn("qty", bad.error)
+        self.assertEqual((good.status, good.order_id), ("accepted", "1"))
+        self.assertEqual(self.acks, [good])
+        summary = self.router.summary()["ALPACA"]
+        self.assertEqual((summary["acknowledged"], summary["failed"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+from data.quoteWriter import QuoteWriter
+from engine.interface import Quote, Venue
+
+
+class TestQuoteWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "db.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_batches_and_drains_on_stop(self):
+        writer = QuoteWriter(
+            logging.getLogger("test"),
+            batch_size=10,
+            flush_interval=0.05,
+            path=self.path,
+        )
+        writer.start()
+        for i in range(25):
+            quote = Quote(Venue.ALPACA, "BTC/USD", datetime.now(timezone.utc))
+            quote.bid_prc, quote.bid_qty = 100.0 + i, 1.0
+            quote.ask_prc, quote.ask_qty = 101.0 + i, 2.0
+            writer.submit(quote)
+        writer.stop()
+        writer.join(timeout=5)
+
+        stats = writer.stats()
+        self.assertEqual(stats["written"], 25)
+        self.assertEqual(stats["backlog"], 0)
+        self.assertGreaterEqual(stats["flushes"], 3)
+        conn = sqlite3.connect(self.path)
+        rows = conn.execute(
+            "SELECT bid_price FROM quotes ORDER BY bid_price"
+        ).fetchall()
+        conn.close()
+        self.assertEqual([r[0] for r in rows], [100.0 + i for i in range(25)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from gui.series import SymbolSeries, lttb
+
+
+class TestLTTB(unittest.TestCase):
+    def test_keeps_ends_and_extremes(self):
+        x = np.arange(1000.0)
+        y = np.sin(x / 50)
+        y[500] = 10.0
+        keep = lttb(x, y, 100)
+        self.assertEqual(len(keep), 100)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertIn(500, keep)
+        self.assertTrue(np.all(np.diff(keep) > 0))
+
+    def test_short_series_untouched(self):
+        self.assertEqual(list(lttb(np.arange(5.0), np.arange(5.0), 10)), list(range(5)))
+
+
+class TestSymbolSeries(unittest.TestCase):
+    def test_bounded_and_incremental(self):
+        series = SymbolSeries(capacity=10)
+        for i in range(25):
+            series.append(float(i), float(i))
+        self.assertEqual(len(series.closes), 10)
+        x, y, seq = series.since(22)
+        self.assertEqual((y, seq), ([22.0, 23.0, 24.0], 25))
+        # points that fell off the ring are skipped
+        self.assertEqual(series.since(0)[1][0], 15.0)
+        x, y, seq = series.snapshot(4)
+        self.assertEqual(list(y[[0, -1]]), [15.0, 24.0])
+        self.assertEqual(len(y), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
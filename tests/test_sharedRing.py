@@ -0,0 +1,138 @@
+import multiprocessing
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from engine.interface import Bar, Quote, Venue
+from engine.sharedRing import OverwriteRing, SharedRing
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def bar(i):
+    ts = START + timedelta(minutes=i)
+    return Bar(Venue.ALPACA, "BTC/USD", *[float(i)] * 4, 1.0, ts)
+
+
+def _echo_closes(ring, conn, n):
+    closes = []
+    while len(closes) < n:
+        closes.extend(b.close for b in ring.get_batch(timeout=5))
+    conn.send(closes)
+    ring.close()
+
+
+class TestSharedRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = SharedRing(capacity=4)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_round_trip(self):
+        quote = Quote(Venue.ALPACA, "ETH/USD", START)
+        quote.bid_prc, quote.ask_prc = 1.0, 2.0
+        self.assertEqual(self.ring.put_many([bar(0), quote]), 2)
+        events = self.ring.get_batch(timeout=0)
+        self.assertEqual([repr(e) for e in events], [repr(bar(0)), repr(quote)])
+        self.assertEqual(self.ring.qsize(), 0)
+
+    def test_drops_when_full_and_wraps(self):
+        self.assertEqual(self.ring.put_many(bar(i) for i in range(6)), 4)
+        self.assertEqual(self.ring.dropped, 2)
+        self.assertEqual([b.close for b in self.ring.get_batch(0)], [0, 1, 2, 3])
+        self.ring.put_many(bar(i) for i in range(6, 9))
+        self.assertEqual([b.close for b in self.ring.get_batch(0)], [6, 7, 8])
+
+    def test_no_wakeup_left_after_reading(self):
+        for i in range(3):
+            self.ring.put_many([bar(i)])
+        self.assertEqual([b.close for b in self.ring.get_batch(0)], [0, 1, 2])
+        self.assertFalse(self.ring.ready.acquire(block=False))
+        self.ring.put_many([bar(3)])
+        self.assertEqual([b.close for b in self.ring.get_batch(0)], [3])
+
+    def test_child_process(self):
+        rx, tx = multiprocessing.Pipe(duplex=False)
+        child = multiprocessing.Process(target=_echo_closes, args=(self.ring, tx, 6))
+        child.start()
+        for i in range(0, 6, 2):
+            while self.ring.qsize() > 2:
+                pass
+            self.ring.put_many([bar(i), bar(i + 1)])
+        self.assertTrue(rx.poll(timeout=10))
+        self.assertEqual(rx.recv(), [float(i) for i in range(6)])
+        child.join()
+
+
+class TestOverwriteRing(unittest.TestCase):
+    def setUp(self):
+        self.ring = OverwriteRing(capacity=4)
+
+    def tearDown(self):
+        self.ring.close()
+
+    def test_overwrites_oldest(self):
+        self.assertEqual(self.ring.put_many(bar(i) for i in range(10)), 10)
+        self.assertEqual(self.ring.qsize(), 4)
+        closes = [b.close for b in self.ring.get_batch(timeout=0)]
+        # the slot after the counter is never trusted
+        self.assertEqual(closes, [7.0, 8.0, 9.0])
+        self.assertEqual(self.ring.lost, 7)
+        self.ring.put_many([bar(10)])
+        self.assertEqual([b.close for b in self.ring.get_batch(0)], [10.0])
+
+    def test_child_process_wakes_on_data(self):
+        rx, tx = multiprocessing.Pipe(duplex=False)
+        child = multiprocessing.Process(target=_echo_closes, args=(self.ring, tx, 3))
+        child.start()
+        self.ring.put_many([bar(0)])
+        self.ring.put_many([bar(1), bar(2)])
+        self.assertTrue(rx.poll(timeout=10))
+        self.assertEqual(rx.recv(), [0.0, 1.0, 2.0])
+        child.join()
+
+
+class TestConcurrentWriters(unittest.TestCase):
+    WRITERS, EVENTS = 4, 2000
+
+    def write_concurrently(self, ring):
+        def write(writer):
+            for i in range(0, self.EVENTS, 5):
+                first = writer * self.EVENTS + i
+                ring.put_many([bar(first + j) for j in range(5)])
+
+        threads = [
+            threading.Thread(target=write, args=(w,)) for w in range(self.WRITERS)
+        ]
+        list(t.start() for t in threads)
+        list(t.join() for t in threads)
+        closes = [b.close for b in ring.get_batch(timeout=0)]
+        ring.close()
+        return closes
+
+    def assertNothingLost(self, closes):
+        total = self.WRITERS * self.EVENTS
+        self.assertEqual(len(closes), total)
+        self.assertEqual(len(set(range(total)) - set(closes)), 0)
+        for writer in range(self.WRITERS):
+            # each writer's events in the order it wrote them
+            own = [c for c in closes if c // self.EVENTS == writer]
+            self.assertTrue(own == sorted(own))
+
+    def test_shared_ring(self):
+        ring = SharedRing(capacity=self.WRITERS * self.EVENTS)
+        closes = self.write_concurrently(ring)
+        self.assertEqual(ring.dropped, 0)
+        self.assertNothingLost(closes)
+
+    def test_overwrite_ring(self):
+        # one more slot, the one after the counter is never trusted
+        ring = OverwriteRing(capacity=self.WRITERS * self.EVENTS + 1)
+        closes = self.write_concurrently(ring)
+        self.assertEqual(ring.lost, 0)
+        self.assertNothingLost(closes)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import logging
+import threading
+import unittest
+from datetime import datetime, timezone
+
+from data.history import ArrayHistory
+from engine.account import AccountService
+from engine.interface import Bar, Quote, Venue
+from strategies.SMA.sma import SMAStrategy
+from strategies.group import StrategyGroup
+from strategies.strategy import Strategy
+from tests.test_account import FakeTradingClient
+
+TS = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class RecordingStrategy(Strategy):
+    def __init__(self, name, stopEvent):
+        config = {"name": name, "quote_mailbox": "conflate"}
+        super().__init__(
+            config, None, logging.getLogger("test"), stopEvent, ArrayHistory({}), 1
+        )
+        self.seen = []
+        self.done = threading.Event()
+
+    def process_quote(self, quote):
+        self.seen.append(("quote", quote.bid_prc))
+
+    def process_bar(self, bar):
+        self.seen.append(("bar", bar.close))
+        self.done.set()
+
+
+def quote(bid):
+    q = Quote(Venue.ALPACA, "BTC/USD", TS)
+    q.bid_prc = bid
+    return q
+
+
+def bar(close):
+    return Bar(Venue.ALPACA, "BTC/USD", close, close, close, close, 1.0, TS)
+
+
+class TestStrategyRun(unittest.TestCase):
+    def setUp(self):
+        self.stopEvent = threading.Event()
+
+    def test_waits_on_every_mailbox_and_stops_promptly(self):
+        strategy = RecordingStrategy("s", self.stopEvent)
+        strategy.handle_quotes([quote(1.0), quote(2.0)])
+        strategy.handle_bars([bar(3.0)])
+        strategy.start()
+        self.assertTrue(strategy.done.wait(timeout=5))
+        self.assertEqual(strategy.seen, [("quote", 2.0), ("bar", 3.0)])
+        self.stopEvent.set()
+        strategy.wake()
+        strategy.join(timeout=1)
+        self.assertFalse(strategy.is_alive())
+
+    def test_group_runs_strategies_on_one_thread(self):
+        strategies = [RecordingStrategy(n, self.stopEvent) for n in ("a", "b")]
+        group = StrategyGroup(
+            "group", strategies, logging.getLogger("test"), self.stopEvent
+        )
+        group.start()
+        strategies[1].handle_bars([bar(1.0)])
+        self.assertTrue(strategies[1].done.wait(timeout=5))
+        self.assertEqual(strategies[0].seen, [])
+        self.stopEvent.set()
+        group.wake()
+        group.join(timeout=1)
+        self.assertFalse(group.is_alive())
+
+
+class TestSMAStrategy(unittest.TestCase):
+    def test_signal_skipped_without_account(self):
+        client = FakeTradingClient()
+        client.down = True
+        log = logging.getLogger("test")
+        account = AccountService(client, log)
+        account.refresh()
+        signals = []
+        strategy = SMAStrategy(
+            {
+                "name": "sma",
+                "symbols": ["BTC/USD"],
+                "short_window": 2,
+                "long_window": 3,
+            },
+            signals.extend,
+            log,
+            threading.Event(),
+            ArrayHistory({}),
+            account,
+        )
+        for close in (3.0, 2.0, 1.0, 5.0):
+            strategy.process_bar(bar(close))
+        # the crossing is not signalled without an account to size it
+        self.assertEqual(signals, [])
+        self.assertFalse(strategy.last_buy)
+
+        client.down = False
+        account.refresh()
+        strategy.process_bar(bar(6.0))
+        self.assertEqual(len(signals), 1)
+        self.assertAlmostEqual(signals[0].qty, 500.0 * 0.02 / 6.0)
+        self.assertTrue(strategy.last_buy)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import logging
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from data.tickStore import INDEX_DTYPE, TickStore, read_ticks, segment_path
+from engine.interface import Quote, Trade, Venue
+
+START = datetime(2024, 1, 1, 23, tzinfo=timezone.utc)
+
+
+def quote(i):
+    quote = Quote(Venue.ALPACA, "BTC/USD", START + timedelta(seconds=i))
+    quote.bid_prc, quote.bid_qty = 100.0 + i, 1.0
+    quote.ask_prc, quote.ask_qty = 101.0 + i, 2.0
+    return quote
+
+
+def trade(i):
+    trade = Trade(Venue.ALPACA, "BTC/USD", START + timedelta(seconds=i))
+    trade.price, trade.volume = 100.0 + i, 0.5
+    return trade
+
+
+class TestTickStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def store(self, **kwargs):
+        return TickStore(logging.getLogger("test"), root=self.root, **kwargs)
+
+    def read(self, kind, start, end):
+        return read_ticks(kind, "BTC/USD", start, end, root=self.root)
+
+    def test_writes_from_thread_and_drains_on_stop(self):
+        store = self.store(batch_size=100, flush_interval=0.05)
+        store.start()
+        for i in range(250):
+            store.submit(quote(i))
+            store.submit(trade(i))
+        store.stop()
+        store.join(timeout=5)
+        self.assertEqual(store.stats()["written"], 500)
+        self.assertEqual(store.stats()["backlog"], 0)
+        trades = self.read("trades", START, START + timedelta(days=1))
+        self.assertEqual(len(trades), 250)
+        self.assertEqual(trades["id"][0], -1)
+
+    def test_bad_batch_is_dropped(self):
+        store = self.store()
+        naive = quote(0)
+        naive.timestamp = naive.timestamp.replace(tzinfo=None)
+        store.write([naive, quote(1)])
+        store.write([trade(2)])
+        store.close()
+        self.assertEqual((store.flushes, store.written), (1, 1))
+        self.assertEqual(len(self.read("quotes", START, START + timedelta(days=1))), 0)
+        trades = self.read("trades", START, START + timedelta(days=1))
+        self.assertEqual(list(trades["price"]), [102.0])
+
+    def test_range_reads_across_days(self):
+        store = self.store(index_interval=16)
+        # one hour before midnight and one after
+        store.write([quote(i) for i in range(0, 7200, 10)])
+        store.close()
+        first = segment_path(self.root, "quotes", "BTC/USD", "2024-01-01")
+        self.assertEqual(os.path.getsize(first), 360 * 40)
+        index = np.fromfile(first[: -len(".ticks")] + ".idx", dtype=INDEX_DTYPE)
+        self.assertEqual(list(index["record"][:3]), [0, 16, 32])
+
+        rows = self.read(
+            "quotes", START + timedelta(seconds=3595), START + timedelta(seconds=3625)
+        )
+        self.assertEqual(
+            list(rows["bid_price"]), [100.0 + i for i in (3600, 3610, 3620)]
+        )
+        self.assertEqual(
+            len(self.read("quotes", START, START + timedelta(hours=2))), 720
+        )
+        self.assertEqual(len(self.read("trades", START, START + timedelta(hours=2))), 0)
+
+    def test_reopen_appends_after_torn_record(self):
+        store = self.store(index_interval=4)
+        store.write([quote(i) for i in range(10)])
+        store.close()
+        path = segment_path(self.root, "quotes", "BTC/USD", "2024-01-01")
+        with open(path, "ab") as file:
+            file.write(b"\0" * 7)
+        # the torn record is ignored by readers, and cut off by the writer
+        self.assertEqual(
+            len(self.read("quotes", START, START + timedelta(hours=1))), 10
+        )
+        store = self.store(index_interval=4)
+        store.write([quote(i) for i in range(10, 20)])
+        store.close()
+        rows = self.read("quotes", START, START + timedelta(hours=1))
+        self.assertEqual(list(rows["bid_price"]), [100.0 + i for i in range(20)])
+        rows = self.read(
+            "quotes", START + timedelta(seconds=9), START + timedelta(seconds=13)
+        )
+        self.assertEqual(list(rows["bid_price"]), [109.0, 110.0, 111.0, 112.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
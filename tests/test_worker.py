@@ -0,0 +1,80 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from data.cryptoDatabase import BARS_SCHEMA
+from engine.interface import Bar, Exposure, Venue
+from engine.worker import StrategyProcess
+from tests.test_account import FakeTradingClient
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def bar(i, close):
+    ts = START + timedelta(minutes=i)
+    return Bar(Venue.ALPACA, "BTC/USD", close, close, close, close, 1.0, ts)
+
+
+class TestStrategyProcess(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        # no history: the strategy warms up on the bars sent
+        self.path = os.path.join(self.tmpdir.name, "db.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute(BARS_SCHEMA)
+        conn.close()
+
+    def test_signal_round_trip(self):
+        signals = []
+        received = threading.Event()
+
+        def on_signals(batch):
+            signals.extend(batch)
+            received.set()
+
+        stopEvent = threading.Event()
+        worker = StrategyProcess(
+            {
+                "type": "sma",
+                "name": "sma",
+                "venues": ["alpaca"],
+                "symbols": ["BTC/USD"],
+                "short_window": 2,
+                "long_window": 3,
+            },
+            on_signals,
+            logging.getLogger("test"),
+            stopEvent,
+            capacity=64,
+            client=FakeTradingClient(),
+            path=self.path,
+        )
+        worker.spawn()
+        worker.start()
+        try:
+            # the short mean crosses above the long one on the last bar
+            worker.handle_bars([bar(i, c) for i, c in enumerate((3.0, 2.0, 1.0))])
+            worker.handle_bars([bar(3, 5.0)])
+            self.assertTrue(received.wait(timeout=10))
+        finally:
+            stopEvent.set()
+            worker.wake()
+            worker.join(timeout=10)
+        self.assertFalse(worker.is_alive())
+        self.assertFalse(worker.process.is_alive())
+        (signal,) = signals
+        self.assertEqual(
+            (signal.venue, signal.symbol, signal.exposure),
+            (Venue.ALPACA, "BTC/USD", Exposure.LONG),
+        )
+        self.assertEqual(signal.prc, 5.0)
+        self.assertAlmostEqual(signal.qty, 500.0 * 0.02 / 5.0)
+
+
+if __name__ == "__main__":
+    unittest.main()